@@ -17,6 +17,24 @@ class AgentFactory:
             
         return Agent(name, archetype=archetype_enum, sensitivity=sensitivity, id=agent_id)
 
+    @staticmethod
+    def create_cohort(names, archetypes, agent_ids, sensitivities, sportiness=None, skip_tendency=None):
+        """
+        Создает пачку агентов из заранее сэмплированных массивов параметров
+        (используется при ротации, чтобы не тянуть случайные числа по одному).
+        """
+        agents = []
+        for i, name in enumerate(names):
+            agents.append(Agent(
+                name,
+                archetype=archetypes[i],
+                sensitivity=float(sensitivities[i]),
+                id=agent_ids[i],
+                sportiness=float(sportiness[i]) if sportiness is not None else None,
+                skip_tendency=float(skip_tendency[i]) if skip_tendency is not None else None
+            ))
+        return agents
+
     @staticmethod
     def create_agent_with_relations(index, existing_agents):
         """Создает случайного агента со случайными начальными отношениями к существующим агентам."""
@@ -0,0 +1,141 @@
+import os
+import json
+
+# Калибровка памяти университетского прогона (пиковый RSS за несколько дней):
+# 340 агентов ~55 МБ, 790 ~127 МБ, 1540 ~425 МБ — доминирует матрица отношений и ее копии.
+BASE_MEMORY_BYTES = 64 * 1024 * 1024
+BYTES_PER_PAIR = 170
+MEMORY_HEADROOM = 1.25
+
+# Доля доступной памяти, которую пакет может занять под сценарии
+DEFAULT_MEMORY_FRACTION = 0.8
+
+
+def available_cores() -> list:
+    """Ядра, доступные процессу (с учетом affinity/cgroup cpuset), иначе 0..cpu_count-1."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def available_memory() -> int:
+    """Доступная память в байтах: psutil, если установлен, иначе MemAvailable из /proc/meminfo."""
+    try:
+        import psutil
+        return int(psutil.virtual_memory().available)
+    except ImportError:
+        pass
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def scenario_population(config: dict) -> int:
+    """Размер коллектива университетского сценария (бакалавры + магистры), как в UniversityCollective."""
+    return int(config.get("total_bac", 1500)) + int(config.get("total_mag", 120))
+
+
+def estimate_memory(config: dict) -> int:
+    """Оценка пикового RSS сценария в байтах: база + O(N²) на матрицу отношений, с запасом."""
+    n = scenario_population(config)
+    return int((BASE_MEMORY_BYTES + BYTES_PER_PAIR * n * n) * MEMORY_HEADROOM)
+
+
+def estimate_config_memory(config_path: str) -> int:
+    with open(config_path, "r", encoding="utf-8") as f:
+        return estimate_memory(json.load(f))
+
+
+class BatchPlan:
+    """
+    План исполнения пакета: число воркеров, потоков OpenMP на воркер, непересекающиеся
+    наборы ядер для привязки и бюджет памяти для допуска сценариев.
+    """
+
+    def __init__(self, workers: int, threads_per_worker: int, core_slices: list, memory_budget: int):
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker
+        self.core_slices = core_slices
+        self.memory_budget = memory_budget
+
+    def describe(self) -> str:
+        budget = f"{self.memory_budget / 2**30:.1f} ГБ" if self.memory_budget else "без ограничения"
+        return (f"воркеров: {self.workers}, потоков OpenMP на воркер: {self.threads_per_worker}, "
+                f"бюджет памяти: {budget}")
+
+
+def plan_batch(job_memory: list, workers: int = None, memory_budget: int = None) -> BatchPlan:
+    """
+    Выбирает число воркеров так, чтобы workers * threads <= ядер (без переподписки OpenMP):
+    по умолчанию — не больше ядер, задач и числа самых крупных сценариев, влезающих в бюджет памяти.
+    """
+    cores = available_cores()
+    if memory_budget is None:
+        memory_budget = int(available_memory() * DEFAULT_MEMORY_FRACTION)
+
+    if workers is None:
+        workers = min(len(cores), max(1, len(job_memory)))
+        if memory_budget and job_memory:
+            fit, used = 0, 0
+            for need in sorted(job_memory, reverse=True):
+                if used + need > memory_budget:
+                    break
+                used += need
+                fit += 1
+            workers = min(workers, max(1, fit))
+    workers = max(1, int(workers))
+
+    threads = max(1, len(cores) // workers)
+    if workers > len(cores):
+        print(f"Scheduler: воркеров ({workers}) больше ядер ({len(cores)}), привязка к ядрам отключена", flush=True)
+        core_slices = [None] * workers
+    else:
+        core_slices = [cores[i * threads:(i + 1) * threads] for i in range(workers)]
+    return BatchPlan(workers, threads, core_slices, memory_budget)
+
+
+def configure_worker_threads(threads: int, cores: list = None):
+    """
+    Ограничивает OpenMP потоками воркера и привязывает процесс к его ядрам.
+    Вызывается до первого импорта emotion_engine: libgomp читает OMP_NUM_THREADS при загрузке.
+    """
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ.setdefault("OMP_PROC_BIND", "close")
+    # NumPy/BLAS тоже не должны плодить потоки сверх выделенных ядер
+    for var in ("OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    if cores and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, cores)
+        except OSError as e:
+            print(f"Scheduler: не удалось привязать воркер к ядрам {cores}: {e}", flush=True)
+
+
+class MemoryGate:
+    """
+    Допуск задач по бюджету памяти: задача стартует, только если ее оценка влезает в остаток.
+    Задача крупнее всего бюджета допускается, когда других задач не выполняется.
+    """
+
+    def __init__(self, budget: int):
+        self.budget = budget
+        self.in_use = 0
+        self.running = 0
+
+    def can_admit(self, need: int) -> bool:
+        if not self.budget or self.running == 0:
+            return True
+        return self.in_use + need <= self.budget
+
+    def acquire(self, need: int):
+        self.in_use += need
+        self.running += 1
+
+    def release(self, need: int):
+        self.in_use -= need
+        self.running -= 1
@@ -0,0 +1,109 @@
+import os
+import pickle
+import random
+import datetime
+import numpy as np
+
+# Версия формата контрольной точки (меняется при несовместимых изменениях состава)
+CHECKPOINT_VERSION = 1
+DEFAULT_CHECKPOINT_DIR = os.path.join("data", "output", "checkpoints")
+
+
+def save_checkpoint(session, path: str):
+    """
+    Сохраняет полное состояние сессии на границе дня: коллектив (агенты, расписания
+    UniversityManager, календарь), матрицы ядра, состояние генераторов random/NumPy
+    и курсоры приемников логов. Запись атомарная (временный файл + os.replace).
+    Приемники логов предварительно дописываются, чтобы данные до точки уже были на диске.
+    """
+    collective = session.collective
+    engine = collective.cpp_engine
+
+    sink_state = {"run_id": session.run_id, "run_store_path": None}
+    if session.ch_logger:
+        session.ch_logger.flush()
+        sink_state["kind"] = "clickhouse"
+    elif session.run_store:
+        session.run_store.close()
+        sink_state["kind"] = "run_store"
+        sink_state["run_store_path"] = session.run_store.path
+    else:
+        sink_state["kind"] = None
+
+    history = session.emotion_history
+    if history:
+        history.flush()
+
+    engine_state = None
+    if engine is not None and collective._engine_in_sync():
+        # Матрица отношений в Python-объектах между слотами не синхронизируется, берем из ядра
+        engine_state = {
+            "emotions": engine.emotions_array().copy(),
+            "relations": engine.relations_array().copy(),
+        }
+
+    state = {
+        "version": CHECKPOINT_VERSION,
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "day_id": collective.current_step,
+        "random_state": random.getstate(),
+        "numpy_random_state": np.random.get_state(),
+        "engine": engine_state,
+        "sink": sink_state,
+        "session": {
+            "output_dir": session.output_dir,
+            "run_metadata": session.run_metadata,
+            "simulation_started": session.simulation_started,
+            "relations_layout": session._relations_layout,
+            "layout": session.layout,
+            "registry_map": session._registry_map,
+            "last_logged_day": session.last_logged_day,
+            "logging_policy": session.logging_policy,
+            "steady_state": session.steady_state,
+            "first_log_states": session.first_log_states,
+            "first_log_interactions": session.first_log_interactions,
+            "emotion_history": None if history is None else {
+                "path": history.path,
+                "max_agents": history.max_agents,
+                "slots_per_day": history.slots_per_day,
+                "frames_written": history.frames_written,
+            },
+        },
+    }
+
+    # Ядро (pybind11) не сериализуется: восстанавливается из матриц при загрузке
+    collective.cpp_engine = None
+    try:
+        state["collective"] = collective
+        tmp_path = path + ".tmp"
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    finally:
+        collective.cpp_engine = engine
+
+
+def load_checkpoint(path: str) -> dict:
+    """Читает контрольную точку; коллектив уже содержит матрицы, ядро создается заново."""
+    with open(path, "rb") as f:
+        state = pickle.load(f)
+    if state.get("version") != CHECKPOINT_VERSION:
+        raise ValueError(f"{path}: неподдерживаемая версия контрольной точки {state.get('version')}")
+
+    collective = state["collective"]
+    engine_state = state["engine"]
+    if engine_state is not None:
+        # relations_matrix коллектива остается как в точке (Python-копия обновляется лениво);
+        # ядро создается заново и получает матрицы, сохраненные из него
+        collective._sync_to_cpp(sync_relations=False)
+        collective.cpp_engine.set_relations_array(engine_state["relations"])
+        collective.cpp_engine.set_emotions_array(engine_state["emotions"])
+
+    random.setstate(state["random_state"])
+    np.random.set_state(state["numpy_random_state"])
+    return state
+
+
+def checkpoint_path_for(scenario_name: str, checkpoint_dir: str = DEFAULT_CHECKPOINT_DIR) -> str:
+    return os.path.join(checkpoint_dir, f"{scenario_name}.ckpt")
@@ -4,7 +4,55 @@ import clickhouse_connect
 import uuid
 import numpy as np
 import datetime
-import time
+import atexit
+from core.clickhouse_writer import AsyncBatchWriter, InsertBatch, QueuePolicy
+from core import log_columns
+
+# layout — номер раскладки индексов агентов (agent_registry.layout), под которой записана строка
+STATES_COLUMNS = [
+    'run_id', 'day_id', 'slot_id', 'agent_id',
+    'sadness_joy', 'fear_calm', 'anger_humility', 'disgust_acceptance',
+    'habit_surprise', 'shame_confidence', 'alienation_openness', 'layout'
+]
+RELATIONS_COLUMNS = [
+    'run_id', 'day_id', 'slot_id', 'subject_id', 'object_id',
+    'utility', 'affinity', 'trust', 'layout'
+]
+INTERACTIONS_COLUMNS = ['run_id', 'day_id', 'slot_id', 'from_id', 'to_id', 'type', 'layout']
+REGISTRY_COLUMNS = ['run_id', 'layout', 'agent_id', 'string_id', 'name', 'group_id', 'archetype']
+STATES_AGG_COLUMNS = [
+    'run_id', 'day_id', 'slot_id', 'agents',
+    'sadness_joy', 'fear_calm', 'anger_humility', 'disgust_acceptance',
+    'habit_surprise', 'shame_confidence', 'alienation_openness'
+]
+INTERACTIONS_AGG_COLUMNS = ['run_id', 'day_id', 'slot_id', 'type', 'count']
+
+# Таблицы с (run_id, day_id): при возобновлении запуска строки после контрольной точки удаляются.
+# run_progress хранит только max(day_id) и догоняется продолжением расчета.
+DAY_KEYED_TABLES = (
+    'agent_states', 'agent_relations', 'agent_relations_delta', 'interactions',
+    'agent_states_agg', 'interactions_agg',
+    'daily_emotions_by_archetype', 'daily_emotions_by_group', 'daily_interactions',
+)
+
+
+class RelationsMode:
+    """Режимы записи снимков матрицы отношений."""
+    FULL = "full"    # Каждый снимок целиком в agent_relations
+    DELTA = "delta"  # Ключевые кадры в agent_relations, между ними — дельты в agent_relations_delta
+
+
+def _np_columns(result: np.ndarray, num_columns: int) -> list:
+    """
+    Колонки результата query_np: при разных типах колонок это структурированный массив (поля по именам),
+    при одинаковых — двумерный (строки, колонки). Пустой результат — пустые колонки.
+    """
+    if result.dtype.names:
+        return [result[name] for name in result.dtype.names]
+    if result.size == 0:
+        return [np.zeros(0, dtype=result.dtype) for _ in range(num_columns)]
+    return [result[:, i] for i in range(num_columns)]
+
 
 class ClickHouseLogger:
     def __init__(self):
@@ -18,202 +66,268 @@ class ClickHouseLogger:
         self.port = int(os.getenv("CLICKHOUSE_PORT", "8123"))
         self.secure = os.getenv("CLICKHOUSE_SECURE", "False").lower() in ("true", "1", "yes")
         
+        # Фоновая запись: размер очереди пакетов и политика при переполнении (block / drop_oldest / downsample)
+        self.queue_size = int(os.getenv("CLICKHOUSE_QUEUE_SIZE", "64"))
+        self.queue_policy = os.getenv("CLICKHOUSE_QUEUE_POLICY", QueuePolicy.BLOCK).lower()
+        
+        # Режим снимков отношений: full — полная матрица каждый раз, delta — ключевые кадры + изменившиеся ячейки
+        self.relations_mode = os.getenv("CLICKHOUSE_RELATIONS_MODE", RelationsMode.FULL).lower()
+        self.keyframe_every = max(1, int(os.getenv("CLICKHOUSE_KEYFRAME_EVERY", "10")))
+        self._last_relations = None # Последняя залогированная матрица (база для дельт)
+        self._snapshots_since_keyframe = 0
+        
+        # Сжатие трафика (true / false / lz4 / zstd) и асинхронные вставки на стороне сервера
+        compress = os.getenv("CLICKHOUSE_COMPRESS", "lz4").lower()
+        self.compress = {"true": True, "1": True, "false": False, "0": False}.get(compress, compress)
+        self.async_insert = os.getenv("CLICKHOUSE_ASYNC_INSERT", "False").lower() in ("true", "1", "yes")
+        
+        # Каталог сброса неудавшихся пакетов (пустое значение отключает сброс)
+        self.spill_dir = os.getenv("CLICKHOUSE_SPILL_DIR", os.path.join("data", "output", "clickhouse_spill")) or None
+        
         self.relations_buffer = [] # Буфер для накопления данных за день
+        self.layout = 0 # Текущая раскладка индексов агентов (см. log_agent_registry)
+        self.writer = None
         
         try:
-            self.client = clickhouse_connect.get_client(
-                host=self.host,
-                port=self.port,
-                username=self.user,
-                password=self.password,
-                secure=self.secure,
-                settings={'insert_deduplicate': 0}
-            )
+            self.client = self._connect()
             print(f"ClickHouseLogger: Успешно подключено к ClickHouse ({self.host}:{self.port})", flush=True)
         except Exception as e:
             print(f"ПРЕДУПРЕЖДЕНИЕ: СУБД ClickHouse недоступна по адресу {self.host}:{self.port} ({e}). Логирование в БД будет отключено.", flush=True)
             self.client = None
+            
+        if self.client:
+            # Отдельное соединение для фонового потока: запросы time-travel идут параллельно вставкам
+            self.writer = AsyncBatchWriter(self._connect(), max_queue=self.queue_size, policy=self.queue_policy,
+                                           spill_dir=self.spill_dir)
+            atexit.register(self.close)
 
-    def log_run_metadata(self, run_name: str, description: str, scenario_name: str = "default"):
-        """Логирует метаданные (название и описание) симуляции для удобного поиска в БД."""
+    def _connect(self):
+        settings = {'insert_deduplicate': 0}
+        if self.async_insert:
+            # Сервер буферизует мелкие вставки сам; ждем подтверждения, чтобы ошибки попадали в сброс
+            settings.update({'async_insert': 1, 'wait_for_async_insert': 1})
+        return clickhouse_connect.get_client(
+            host=self.host,
+            port=self.port,
+            username=self.user,
+            password=self.password,
+            secure=self.secure,
+            compress=self.compress,
+            settings=settings
+        )
+
+    def _enqueue(self, table, data, column_names, droppable=True):
+        """Ставит пакет в очередь фонового писателя (поток симуляции не ждет сети)."""
+        if not self.writer or not data:
+            return
+        self.writer.submit(InsertBatch(table, data, column_names, droppable=droppable))
+
+    def start_new_run(self):
+        """Новый run_id при переиспользовании соединения следующим запуском (пакетный режим)."""
+        self.flush_day_relations()
+        self.run_id = str(uuid.uuid4())
+        self.layout = 0
+        self._last_relations = None
+        self._snapshots_since_keyframe = 0
+
+    def resume_run(self, run_id: str, after_day: int = None, layout: int = 0):
+        """
+        Продолжает запуск run_id с контрольной точки: строки с day_id > after_day, записанные
+        до падения, удаляются вместе с реестрами раскладок новее layout;
+        первый снимок отношений после возобновления — ключевой кадр.
+        """
+        self.flush_day_relations()
+        self.run_id = str(run_id)
+        self.layout = int(layout)
+        self._last_relations = None
+        self._snapshots_since_keyframe = 0
+        if not self.client or after_day is None:
+            return
+        params = {'run_id': self.run_id, 'day_id': int(after_day), 'layout': self.layout}
+        deletes = [(table, "day_id > {day_id:UInt32}") for table in DAY_KEYED_TABLES]
+        deletes.append(('agent_registry', "layout > {layout:UInt32}"))
+        for table, condition in deletes:
+            try:
+                self.client.command(
+                    f"ALTER TABLE {table} DELETE WHERE run_id = {{run_id:UUID}} AND {condition}",
+                    parameters=params, settings={'mutations_sync': 1}
+                )
+            except Exception as e:
+                print(f"ClickHouse: не удалось очистить {table} после дня {after_day}: {e}", flush=True)
+
+    def flush(self):
+        """Дожидается записи всех поставленных пакетов, не закрывая соединение."""
+        if self.writer:
+            self.flush_day_relations()
+            self.writer.flush()
+
+    def close(self):
+        """Дописывает очередь и закрывает фоновый писатель."""
+        if self.writer:
+            self.flush_day_relations()
+            self.writer.close()
+            self.writer = None
+
+    def log_run_metadata(self, run_name: str, description: str, scenario_name: str = "default", logging_policy: str = ""):
+        """Логирует метаданные (название, описание, политику логирования) симуляции для удобного поиска в БД."""
         if not self.client:
             return
         
-        try:
-            self.client.insert(
-                'simulation_runs',
-                [[self.run_id, datetime.datetime.now(), run_name, description, scenario_name]],
-                column_names=['run_id', 'start_time', 'run_name', 'description', 'scenario_name']
-            )
-        except Exception as e:
-            print(f"Ошибка при сохранении метаданных симуляции: {e}", flush=True)
+        self._enqueue(
+            'simulation_runs',
+            [[self.run_id, datetime.datetime.now(), run_name, description, scenario_name, logging_policy]],
+            ['run_id', 'start_time', 'run_name', 'description', 'scenario_name', 'logging_policy'],
+            droppable=False
+        )
+
+    def _key_columns(self, num_rows: int, day_id: int, slot_id: int):
+        """Общие ключевые колонки пакета (run_id, day_id, slot_id) в колоночном виде."""
+        return [
+            [self.run_id] * num_rows,
+            np.full(num_rows, day_id, dtype=np.uint32),
+            np.full(num_rows, slot_id, dtype=np.uint8),
+        ]
 
-    def log_agent_states(self, day_id: int, slot_id: int, engine):
+    def _enqueue_columns(self, table, columns, column_names):
+        if not self.writer or len(columns[0]) == 0:
+            return
+        self.writer.submit(InsertBatch(table, columns, column_names, column_oriented=True))
+
+    def log_agent_states(self, day_id: int, slot_id: int, engine, agent_idx=None):
         """
         Извлекает эмоциональные состояния из C++ ядра and сохраняет в agent_states таблицу.
-        Векторизованная обработка с использованием библиотеки numpy.
+        Колоночная вставка: каждая ось эмоций уходит отдельным int8-массивом.
+        agent_idx — индексы панели агентов (None — все агенты).
         """
-        state = engine.state
-        num_agents = state.num_agents
-        emotions = np.array(state.emotions, dtype=np.int8).reshape((num_agents, 7))
+        agent_ids, emotions = log_columns.state_rows(engine, agent_idx)
         
-        # Подготовка данных без цикла
-        data = list(zip(
-            [self.run_id] * num_agents,
-            [day_id] * num_agents,
-            [slot_id] * num_agents,
-            range(num_agents),
-            emotions[:, 0].tolist(),
-            emotions[:, 1].tolist(),
-            emotions[:, 2].tolist(),
-            emotions[:, 3].tolist(),
-            emotions[:, 4].tolist(),
-            emotions[:, 5].tolist(),
-            emotions[:, 6].tolist()
-        ))
+        columns = self._key_columns(len(agent_ids), day_id, slot_id)
+        columns.append(agent_ids)
+        columns.extend(np.ascontiguousarray(emotions[:, axis]) for axis in range(7))
+        columns.append(np.full(len(agent_ids), self.layout, dtype=np.uint32))
         
-        if self.client:
-            self.client.insert('agent_states', data, column_names=[
-                'run_id', 'day_id', 'slot_id', 'agent_id',
-                'sadness_joy', 'fear_calm', 'anger_humility', 'disgust_acceptance',
-                'habit_surprise', 'shame_confidence', 'alienation_openness'
-            ])
+        self._enqueue_columns('agent_states', columns, STATES_COLUMNS)
 
-    def log_agent_relations(self, day_id: int, slot_id: int, engine):
+    def log_state_aggregates(self, day_id: int, slot_id: int, engine, agent_idx=None):
+        """Режим aggregate_only: одна строка за слот — число агентов и средние по осям."""
+        count, means = log_columns.state_means(engine, agent_idx)
+        columns = self._key_columns(1, day_id, slot_id)
+        columns.append(np.array([count], dtype=np.uint32))
+        columns.extend(means[axis:axis + 1] for axis in range(7))
+        self._enqueue_columns('agent_states_agg', columns, STATES_AGG_COLUMNS)
+
+    def log_agent_relations(self, day_id: int, slot_id: int, engine, force_keyframe: bool = False, agent_idx=None):
         """
         Extracts relations из C++ ядра and сохраняет в БУФЕР (для последующей отправки раз в день).
+        В режиме delta пишет только изменившиеся с прошлого снимка ячейки; полный ключевой кадр —
+        раз в keyframe_every снимков, при смене размера матрицы или по force_keyframe
+        (смена состава коллектива меняет индексацию агентов).
         """
-        state = engine.state
-        n = state.num_agents
-        relations = np.array(state.relations, dtype=np.int8).reshape((n, n, 3))
+        relations = engine.relations_array()
+        n = relations.shape[0]
         
-        ii, jj = np.indices((n, n))
-        mask = ii != jj
+        is_keyframe = (
+            self.relations_mode != RelationsMode.DELTA
+            or force_keyframe
+            or self._last_relations is None
+            or self._last_relations.shape != relations.shape
+            or self._snapshots_since_keyframe >= self.keyframe_every
+        )
         
-        sub_ids = ii[mask]
-        obj_ids = jj[mask]
+        # Пары (субъект, объект) без диагонали в порядке строк матрицы (внутри панели, если задана)
+        mask = log_columns.relation_mask(n, agent_idx)
+        if is_keyframe:
+            table = 'agent_relations'
+            self._snapshots_since_keyframe = 1
+        else:
+            mask &= (relations != self._last_relations).any(axis=2)
+            table = 'agent_relations_delta'
+            self._snapshots_since_keyframe += 1
+            
+        if self.relations_mode == RelationsMode.DELTA:
+            self._last_relations = relations
+            
+        sub_ids, obj_ids = np.nonzero(mask)
         rel_values = relations[mask]
         
-        num_rows = len(sub_ids)
-        
-        # Подготовка данных через zip
-        data_slot = list(zip(
-            [self.run_id] * num_rows,
-            [day_id] * num_rows,
-            [slot_id] * num_rows,
-            sub_ids.tolist(),
-            obj_ids.tolist(),
-            rel_values[:, 0].tolist(),
-            rel_values[:, 1].tolist(),
-            rel_values[:, 2].tolist()
-        ))
-        
         # Добавляем в дневной буфер
-        self.relations_buffer.extend(data_slot)
+        self.relations_buffer.append((
+            table, day_id, slot_id, self.layout,
+            sub_ids.astype(np.uint32), obj_ids.astype(np.uint32),
+            np.ascontiguousarray(rel_values[:, 0]),
+            np.ascontiguousarray(rel_values[:, 1]),
+            np.ascontiguousarray(rel_values[:, 2])
+        ))
 
     def flush_day_relations(self):
         """Отправляет накопленные за день отношения в ClickHouse."""
         if not self.client or not self.relations_buffer:
             return
             
-        print(f"ClickHouseLogger: Флеш дневного буфера ({len(self.relations_buffer)} записей)...", flush=True)
+        total_size = sum(len(snapshot[4]) for snapshot in self.relations_buffer)
+        print(f"ClickHouseLogger: Флеш дневного буфера ({total_size} записей)...", flush=True)
         
         # Отправляем пачками по 100к (для стабильности даже локально)
         batch_size = 100000
-        total_size = len(self.relations_buffer)
-        
-        for start_idx in range(0, total_size, batch_size):
-            end_idx = min(start_idx + batch_size, total_size)
-            chunk = self.relations_buffer[start_idx:end_idx]
-            self._flush_relations(chunk)
+        for table, day_id, slot_id, layout, *values in self.relations_buffer:
+            num_rows = len(values[0])
+            for start_idx in range(0, num_rows, batch_size):
+                end_idx = min(start_idx + batch_size, num_rows)
+                columns = self._key_columns(end_idx - start_idx, day_id, slot_id)
+                columns.extend(col[start_idx:end_idx] for col in values)
+                columns.append(np.full(end_idx - start_idx, layout, dtype=np.uint32))
+                self._flush_relations(columns, table)
             
         # Очищаем буфер после отправки
         self.relations_buffer = []
 
-    def _flush_relations(self, data):
-        if not self.client or not data: return
-        try:
-            self.client.insert('agent_relations', data, column_names=[
-                'run_id', 'day_id', 'slot_id', 'subject_id', 'object_id',
-                'utility', 'affinity', 'trust'
-            ])
-        except Exception as e:
-            print(f"Ошибка при вставке отношений (localhost): {e}", flush=True)
-            try:
-                time.sleep(0.5)
-                self.client.insert('agent_relations', data)
-            except:
-                pass
+    def _flush_relations(self, columns, table='agent_relations'):
+        self._enqueue_columns(table, columns, RELATIONS_COLUMNS)
 
-    def log_interactions(self, day_id: int, slot_id: int, engine, interactions_list=None, name_to_id=None):
+    def log_interactions(self, day_id: int, slot_id: int, engine, interactions_list=None, name_to_id=None, agent_idx=None):
         """
         Logs interactions from the last cycle.
         If interactions_list is provided (Python model), logs it.
         Otherwise logs from engine.last_day_interactions (C++ model).
         """
-        data = []
-        type_map = {'refusal': 0, 'success': 1, 'fail': -1}
-        cpp_type_map = {0: 0, 1: 1, 2: -1} # Map C++ enum directly to ClickHouse ints
-        
-        if interactions_list and name_to_id:
-            for from_name, to_name, status in interactions_list:
-                # В списке могут быть системные сообщения, игнорируем их
-                if from_name not in name_to_id or to_name not in name_to_id:
-                    continue
-                    
-                row = [
-                    self.run_id,
-                    day_id,
-                    slot_id,
-                    name_to_id[from_name],
-                    name_to_id[to_name],
-                    type_map.get(status, 0)
-                ]
-                data.append(row)
-                if len(data) >= 20000:
-                    self._flush_interactions(data)
-                    data = []
-        else:
-            # Лог из C++ движка
-            for inter in engine.last_day_interactions:
-                row = [
-                    self.run_id,
-                    day_id,
-                    slot_id,
-                    inter.from_idx,
-                    inter.to_idx,
-                    cpp_type_map.get(inter.type, 0)
-                ]
-                data.append(row)
-                if len(data) >= 20000:
-                    self._flush_interactions(data)
-                    data = []
+        from_ids, to_ids, types = log_columns.filter_interactions(
+            *log_columns.interaction_columns(engine, interactions_list, name_to_id), agent_idx
+        )
             
-        if data:
-            self._flush_interactions(data)
+        num_rows = len(types)
+        batch_size = 20000
+        for start_idx in range(0, num_rows, batch_size):
+            end_idx = min(start_idx + batch_size, num_rows)
+            columns = self._key_columns(end_idx - start_idx, day_id, slot_id)
+            columns.append(from_ids[start_idx:end_idx])
+            columns.append(to_ids[start_idx:end_idx])
+            columns.append(types[start_idx:end_idx])
+            columns.append(np.full(end_idx - start_idx, self.layout, dtype=np.uint32))
+            self._flush_interactions(columns)
 
-    def _flush_interactions(self, data):
-        if not self.client: return
-        try:
-            self.client.insert('interactions', data, column_names=[
-                'run_id', 'day_id', 'slot_id', 'from_id', 'to_id', 'type'
-            ])
-        except Exception as e:
-            print(f"Ошибка при вставке взаимодействий в ClickHouse: {e}", flush=True)
-            try:
-                time.sleep(1)
-                self.client.insert('interactions', data, column_names=[
-                    'run_id', 'day_id', 'slot_id', 'from_id', 'to_id', 'type'
-                ])
-            except Exception as e2:
-                print(f"Критическая ошибка ClickHouse (Interactions): {e2}", flush=True)
+    def log_interaction_aggregates(self, day_id: int, slot_id: int, engine, interactions_list=None, name_to_id=None, agent_idx=None):
+        """Режим aggregate_only: количество взаимодействий каждого типа за слот."""
+        _, _, types = log_columns.filter_interactions(
+            *log_columns.interaction_columns(engine, interactions_list, name_to_id), agent_idx
+        )
+        kinds, counts = log_columns.interaction_counts(types)
+        columns = self._key_columns(len(kinds), day_id, slot_id)
+        columns.extend([kinds, counts])
+        self._enqueue_columns('interactions_agg', columns, INTERACTIONS_AGG_COLUMNS)
+
+    def _flush_interactions(self, columns):
+        self._enqueue_columns('interactions', columns, INTERACTIONS_COLUMNS)
 
-    def log_agent_registry(self, collective):
+    def log_agent_registry(self, collective, layout: int = 0):
         """
         Логирует реестр агентов: связывает числовые ID (из C++ ядра) со строковыми ID and метаданными.
-        Вызывается один раз в начале симуляции.
+        Вызывается в начале симуляции и при каждой смене состава: числовые ID последующих строк
+        сопоставляются реестру своей раскладки layout.
         """
         if not self.client: return
+        # Снимки отношений прежней раскладки уходят с ее номером
+        self.flush_day_relations()
+        self.layout = int(layout)
         
         data = []
         n = len(collective.agents)
@@ -233,6 +347,7 @@ class ClickHouseLogger:
                 
                 row = [
                     self.run_id,
+                    self.layout,
                     i,
                     str(string_id),
                     str(name),
@@ -241,31 +356,52 @@ class ClickHouseLogger:
                 ]
                 data.append(row)
                 
-            if data:
-                self.client.insert('agent_registry', data, column_names=[
-                    'run_id', 'agent_id', 'string_id', 'name', 'group_id', 'archetype'
-                ])
+            self._enqueue('agent_registry', data, REGISTRY_COLUMNS, droppable=False)
 
     def fetch_state(self, target_run_id: str, day_id: int, slot_id: int):
         """
         Retrieves a simulation snapshot from ClickHouse.
+        Параметризованные запросы, результат — колонки NumPy без построчного разбора:
+        emotions: {'agent_id': (K,), 'values': (K, 7) int8},
+        relations: {'subject_id', 'object_id': (M,), 'values': (M, 3) int8}.
+        Отношения берутся из agent_relations_at (ключевой кадр + дельты), т.е. последний снимок не позже момента.
         """
+        # Дожидаемся записи очереди, чтобы снимок текущего запуска был полным
+        if self.writer:
+            self.writer.flush()
+            
+        params = {'run_id': target_run_id, 'day_id': int(day_id), 'slot_id': int(slot_id)}
+        
         # Получение emotions
-        emotions_query = f"""
-            SELECT agent_id, sadness_joy, fear_calm, anger_humility, disgust_acceptance, 
+        emotions_res = self.client.query_np(
+            """
+            SELECT agent_id, sadness_joy, fear_calm, anger_humility, disgust_acceptance,
                    habit_surprise, shame_confidence, alienation_openness
             FROM agent_states
-            WHERE run_id = '{target_run_id}' AND day_id = {day_id} AND slot_id = {slot_id}
+            WHERE run_id = {run_id:UUID} AND day_id = {day_id:UInt32} AND slot_id = {slot_id:UInt8}
             ORDER BY agent_id
-        """
-        emotions_res = self.client.query(emotions_query)
+            """,
+            parameters=params
+        )
+        emo_cols = _np_columns(emotions_res, 8)
+        emotions = {
+            'agent_id': emo_cols[0].astype(np.int64),
+            'values': np.column_stack(emo_cols[1:]).astype(np.int8),
+        }
         
         # Получение relations
-        relations_query = f"""
-            SELECT ID субъекта, ID объекта, utility, affinity, trust
-            FROM agent_relations
-            WHERE run_id = '{target_run_id}' AND day_id = {day_id} AND slot_id = {slot_id}
-        """
-        relations_res = self.client.query(relations_query)
+        relations_res = self.client.query_np(
+            """
+            SELECT subject_id, object_id, utility, affinity, trust
+            FROM agent_relations_at(run_id = {run_id:UUID}, day_id = {day_id:UInt32}, slot_id = {slot_id:UInt8})
+            """,
+            parameters=params
+        )
+        rel_cols = _np_columns(relations_res, 5)
+        relations = {
+            'subject_id': rel_cols[0].astype(np.int64),
+            'object_id': rel_cols[1].astype(np.int64),
+            'values': np.column_stack(rel_cols[2:]).astype(np.int8),
+        }
         
-        return emotions_res.result_rows, relations_res.result_rows
+        return emotions, relations
@@ -0,0 +1,295 @@
+import os
+import json
+import threading
+import time
+import datetime
+import numpy as np
+from collections import deque
+
+
+class QueuePolicy:
+    """Политики поведения при переполнении очереди записи."""
+    BLOCK = "block"              # Симуляция ждет освобождения места (без потерь)
+    DROP_OLDEST = "drop_oldest"  # Вытесняется самый старый пакет из очереди
+    DOWNSAMPLE = "downsample"    # Под нагрузкой принимается только каждый k-й пакет таблицы
+
+    ALL = (BLOCK, DROP_OLDEST, DOWNSAMPLE)
+
+
+class InsertBatch:
+    """Подготовленный пакет для вставки: таблица, данные и имена колонок."""
+    __slots__ = ("table", "data", "column_names", "column_oriented", "droppable")
+
+    def __init__(self, table, data, column_names, column_oriented=False, droppable=True):
+        self.table = table
+        self.data = data
+        self.column_names = column_names
+        self.column_oriented = column_oriented
+        # Метаданные запуска и реестр агентов никогда не отбрасываются
+        self.droppable = droppable
+
+
+class SpillStore:
+    """
+    Каталог сжатых файлов .npz с пакетами, которые не удалось записать в ClickHouse.
+    Пакет хранится в колоночном виде (строковые колонки — юникод, даты — datetime64),
+    поэтому файл читается без pickle и переигрывается колоночной вставкой.
+    """
+
+    def __init__(self, spill_dir: str):
+        self.spill_dir = spill_dir
+        os.makedirs(spill_dir, exist_ok=True)
+        self._counter = 0
+
+    def spill(self, batch: InsertBatch) -> str:
+        columns = batch.data if batch.column_oriented else [list(col) for col in zip(*batch.data)]
+        arrays = {f"col_{i}": self._to_array(col) for i, col in enumerate(columns)}
+        meta = {"table": batch.table, "column_names": list(batch.column_names), "droppable": batch.droppable}
+
+        self._counter += 1
+        stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        file_name = f"{stamp}_{os.getpid()}_{self._counter:06d}_{batch.table}.npz"
+        tmp_path = os.path.join(self.spill_dir, file_name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(f, __meta__=np.array(json.dumps(meta)), **arrays)
+        # Атомарное появление файла: реплей не увидит недописанный пакет
+        path = os.path.join(self.spill_dir, file_name)
+        os.replace(tmp_path, path)
+        return path
+
+    def pending(self) -> list:
+        """Файлы пакетов в порядке записи."""
+        if not os.path.isdir(self.spill_dir):
+            return []
+        return sorted(os.path.join(self.spill_dir, name) for name in os.listdir(self.spill_dir) if name.endswith(".npz"))
+
+    @staticmethod
+    def load(path: str) -> InsertBatch:
+        with np.load(path) as npz:
+            meta = json.loads(str(npz["__meta__"]))
+            columns = [SpillStore._from_array(npz[f"col_{i}"]) for i in range(len(meta["column_names"]))]
+        return InsertBatch(meta["table"], columns, meta["column_names"], column_oriented=True, droppable=meta["droppable"])
+
+    @staticmethod
+    def _to_array(col):
+        arr = np.asarray(col)
+        if arr.dtype == object:
+            # Единственные объектные колонки схемы — даты (start_time)
+            arr = np.array(col, dtype="datetime64[us]")
+        return arr
+
+    @staticmethod
+    def _from_array(arr):
+        if arr.dtype.kind == "U":
+            return arr.tolist()
+        if arr.dtype.kind == "M":
+            return arr.astype("datetime64[us]").astype(datetime.datetime).tolist()
+        return arr
+
+
+def replay_spill(client, spill_dir: str, limit: int = None) -> tuple:
+    """
+    Переигрывает пакеты из каталога сброса в ClickHouse; записанные файлы удаляются.
+    Останавливается на первой ошибке (СУБД, скорее всего, еще недоступна).
+    Возвращает (записано, осталось).
+    """
+    store = SpillStore(spill_dir)
+    files = store.pending()
+    written = 0
+    for path in files[:limit] if limit else files:
+        batch = SpillStore.load(path)
+        client.insert(batch.table, batch.data, column_names=batch.column_names, column_oriented=True)
+        os.remove(path)
+        written += 1
+    return written, len(files) - written
+
+
+class AsyncBatchWriter:
+    """
+    Фоновый писатель ClickHouse: поток-потребитель и ограниченная очередь пакетов.
+    Поток симуляции только ставит пакеты в очередь, сетевые вставки и повторы
+    выполняются в отдельном потоке.
+    """
+
+    # Экспоненциальная задержка между попытками реплея сброшенных пакетов (сек.)
+    REPLAY_BASE_DELAY = 1.0
+    REPLAY_MAX_DELAY = 60.0
+    # Сколько файлов переигрывать за один проход, чтобы не задерживать свежие пакеты
+    REPLAY_FILES_PER_PASS = 8
+
+    def __init__(self, client, max_queue: int = 64, policy: str = QueuePolicy.BLOCK, downsample_every: int = 2, spill_dir: str = None):
+        if policy not in QueuePolicy.ALL:
+            raise ValueError(f"Неизвестная политика очереди: {policy}")
+        self.client = client
+        self.max_queue = max(1, int(max_queue))
+        self.policy = policy
+        self.downsample_every = max(2, int(downsample_every))
+
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._in_flight = 0
+        self._downsample_counters = {}
+
+        self.dropped_batches = 0
+        self.failed_batches = 0
+        self.written_batches = 0
+        self.spilled_batches = 0
+
+        # Сброс на диск: при ошибке пакет сохраняется локально, а не теряется.
+        # Пока СУБД недоступна (_healthy = False), новые пакеты сразу уходят в сброс,
+        # не тратя время на таймауты; реплей идет с экспоненциальной задержкой.
+        self.spill = SpillStore(spill_dir) if spill_dir else None
+        self._healthy = True
+        self._replay_delay = self.REPLAY_BASE_DELAY
+        self._next_replay = time.monotonic()  # Остатки прошлых запусков переигрываются сразу
+
+        self._thread = threading.Thread(target=self._run, name="clickhouse-writer", daemon=True)
+        self._thread.start()
+
+    def pending(self) -> int:
+        """Число пакетов, ожидающих записи (включая текущий)."""
+        with self._cond:
+            return len(self._queue) + self._in_flight
+
+    def submit(self, batch: InsertBatch):
+        """Ставит пакет в очередь согласно политике переполнения."""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("AsyncBatchWriter уже закрыт")
+
+            if len(self._queue) >= self.max_queue and batch.droppable:
+                if self.policy == QueuePolicy.DROP_OLDEST:
+                    self._drop_oldest()
+                elif self.policy == QueuePolicy.DOWNSAMPLE:
+                    counter = self._downsample_counters.get(batch.table, 0) + 1
+                    self._downsample_counters[batch.table] = counter
+                    if counter % self.downsample_every != 0:
+                        self.dropped_batches += 1
+                        return
+
+            # BLOCK (а также неотбрасываемые пакеты) — ждем места в очереди
+            while len(self._queue) >= self.max_queue and not self._closed:
+                self._cond.wait()
+
+            self._queue.append(batch)
+            self._cond.notify_all()
+
+    def _drop_oldest(self):
+        for i, queued in enumerate(self._queue):
+            if queued.droppable:
+                del self._queue[i]
+                self.dropped_batches += 1
+                return
+
+    def flush(self, timeout=None) -> bool:
+        """Дожидается записи всех поставленных пакетов."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._queue or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout=None):
+        """Дописывает очередь и останавливает поток."""
+        self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        if self.dropped_batches or self.failed_batches:
+            print(f"ClickHouseWriter: отброшено пакетов: {self.dropped_batches}, не записано: {self.failed_batches}", flush=True)
+        if self.spill and self.spill.pending():
+            print(f"ClickHouseWriter: {len(self.spill.pending())} пакетов ожидают реплея в {self.spill.spill_dir} "
+                  f"(будут записаны при следующем запуске или через scripts/replay_clickhouse_spill.py)", flush=True)
+
+    def _run(self):
+        while True:
+            self._maybe_replay()
+            with self._cond:
+                while not self._queue and not self._closed:
+                    if self.spill and self._replay_due_in() is not None:
+                        self._cond.wait(self._replay_due_in())
+                        break
+                    self._cond.wait()
+                if not self._queue:
+                    if self._closed:
+                        return
+                    continue
+                batch = self._queue.popleft()
+                self._in_flight += 1
+                self._cond.notify_all()
+
+            try:
+                self._insert(batch)
+            finally:
+                with self._cond:
+                    self._in_flight -= 1
+                    self._cond.notify_all()
+
+    def _replay_due_in(self):
+        """Секунды до следующей попытки реплея или None, если сброс пуст."""
+        if not self.spill or (self._healthy and not self.spill.pending()):
+            return None
+        return max(0.0, self._next_replay - time.monotonic())
+
+    def _maybe_replay(self):
+        if not self.spill or time.monotonic() < self._next_replay:
+            return
+        try:
+            written, remaining = replay_spill(self.client, self.spill.spill_dir, limit=self.REPLAY_FILES_PER_PASS)
+        except Exception as e:
+            self._healthy = False
+            self._replay_delay = min(self._replay_delay * 2, self.REPLAY_MAX_DELAY)
+            self._next_replay = time.monotonic() + self._replay_delay
+            print(f"ClickHouseWriter: реплей не удался ({e}), следующая попытка через {self._replay_delay:.0f} с", flush=True)
+            return
+
+        if written:
+            self.written_batches += written
+            print(f"ClickHouseWriter: переиграно пакетов из сброса: {written}, осталось: {remaining}", flush=True)
+        self._healthy = True
+        self._replay_delay = self.REPLAY_BASE_DELAY
+        self._next_replay = time.monotonic() + (0 if remaining else self.REPLAY_BASE_DELAY)
+
+    def _spill_batch(self, batch: InsertBatch):
+        try:
+            self.spill.spill(batch)
+            self.spilled_batches += 1
+        except Exception as e:
+            self.failed_batches += 1
+            print(f"Критическая ошибка: не удалось сохранить пакет {batch.table} на диск: {e}", flush=True)
+
+    def _insert(self, batch: InsertBatch):
+        if self.spill:
+            if not self._healthy:
+                self._spill_batch(batch)
+                return
+            try:
+                self.client.insert(batch.table, batch.data, column_names=batch.column_names,
+                                   column_oriented=batch.column_oriented)
+                self.written_batches += 1
+            except Exception as e:
+                print(f"Ошибка при вставке в {batch.table}: {e}. Пакет сохранен на диск для реплея.", flush=True)
+                self._healthy = False
+                self._next_replay = time.monotonic() + self._replay_delay
+                self._spill_batch(batch)
+            return
+
+        try:
+            self.client.insert(batch.table, batch.data, column_names=batch.column_names,
+                               column_oriented=batch.column_oriented)
+            self.written_batches += 1
+        except Exception as e:
+            print(f"Ошибка при вставке в {batch.table}: {e}", flush=True)
+            try:
+                time.sleep(1)
+                self.client.insert(batch.table, batch.data, column_names=batch.column_names,
+                                   column_oriented=batch.column_oriented)
+                self.written_batches += 1
+            except Exception as e2:
+                self.failed_batches += 1
+                print(f"Критическая ошибка ClickHouse ({batch.table}): {e2}", flush=True)
@@ -2,7 +2,9 @@
 Type stubs for the compiled C++ high-performance module `emotion_engine`.
 """
 
-from typing import List
+from typing import Dict, List
+
+import numpy as np
 
 class Interaction:
     from_idx: int
@@ -57,6 +59,8 @@ class Engine:
         scoring_trust: str
     ) -> None: ...
     def set_agent_archetype(self, agent_idx: int, arch_idx: int) -> None: ...
+    def get_relation_row(self, agent_idx: int) -> List[int]: ...
+    def get_primary_emotions(self, indices: List[int]) -> List[int]: ...
     def influence_emotions(self) -> None: ...
     def apply_relation_decay(self) -> None: ...
     def react_to_relations(self) -> None: ...
@@ -72,3 +76,38 @@ class Engine:
     def set_agent_names(self, names: List[str]) -> None: ...
     def save_states_csv(self, filename: str) -> None: ...
     def save_interactions_csv(self, filename: str) -> None: ...
+    def emotions_array(self) -> np.ndarray: ...
+    def relations_array(self) -> np.ndarray: ...
+    def set_emotions_array(self, values: np.ndarray) -> None: ...
+    def set_relations_array(self, values: np.ndarray) -> None: ...
+    def interactions_array(self) -> np.ndarray: ...
+
+class EnsembleEngine:
+    num_replicas: int
+    num_agents: int
+
+    def __init__(self, num_replicas: int, num_agents: int) -> None: ...
+    def set_archetype_config(
+        self,
+        idx: int,
+        refusal_chance: float,
+        decay_rate: float,
+        temperature: float,
+        emotion_decay: float,
+        refusal_vulnerability: float,
+        emotion_coefficients: List[float],
+        scoring_affinity: str,
+        scoring_utility: str,
+        scoring_trust: str
+    ) -> None: ...
+    def set_agent_archetype(self, agent_idx: int, arch_idx: int) -> None: ...
+    def set_sensitivities(self, values: List[float]) -> None: ...
+    def set_emission_weights(self, values: List[float]) -> None: ...
+    def seed(self, base_seed: int) -> None: ...
+    def perform_daily_cycle(self, interactions_per_day: int) -> None: ...
+    def replica(self, index: int) -> Engine: ...
+    def emotions_array(self) -> np.ndarray: ...
+    def relations_array(self) -> np.ndarray: ...
+    def set_emotions_array(self, values: np.ndarray) -> None: ...
+    def set_relations_array(self, values: np.ndarray) -> None: ...
+    def summary(self) -> Dict[str, np.ndarray]: ...
@@ -0,0 +1,202 @@
+import os
+import json
+import struct
+import numpy as np
+
+# Заголовок файла: сигнатура, версия, слотов в дне, емкость по агентам, число осей
+HEADER_FORMAT = "<8sIIII"
+HEADER_SIZE = 64
+MAGIC = b"EMOHIST\0"
+VERSION = 1
+NUM_AXES = 7
+
+# Значение для отсутствующих данных (пропущенный слот, агента еще нет в ядре)
+MISSING = -128
+
+# Раскладки индексов агентов хранятся рядом с файлом: <path>.layouts.json
+LAYOUTS_SUFFIX = ".layouts.json"
+
+
+def _header(slots_per_day: int, max_agents: int) -> bytes:
+    return struct.pack(HEADER_FORMAT, MAGIC, VERSION, slots_per_day, max_agents, NUM_AXES).ljust(HEADER_SIZE, b"\0")
+
+
+class EmotionHistoryWriter:
+    """
+    Дозапись истории эмоций в файл фиксированной раскладки (день, слот, агент, ось) int8.
+    Кадр (day, slot) лежит по смещению HEADER_SIZE + (day * slots_per_day + slot) * max_agents * 7,
+    поэтому любой процесс может отобразить файл в память и читать окна за O(1).
+    Индекс агента — индекс C++ ядра (Collective._id_map) на момент записи; раскладка
+    индексов (номер и имена агентов) фиксируется set_layout() с первого кадра, к которому относится.
+    Если агентов становится больше емкости, файл переписывается с более широким кадром.
+    """
+
+    def __init__(self, path: str, max_agents: int, slots_per_day: int):
+        self.path = path
+        self.max_agents = int(max_agents)
+        self.slots_per_day = int(slots_per_day)
+        self.frame_size = self.max_agents * NUM_AXES
+        self.layouts = []
+        self.layout = None
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "wb+")
+        self._file.write(_header(self.slots_per_day, self.max_agents))
+        self.frames_written = 0
+        self._write_layouts()
+
+    @classmethod
+    def reopen(cls, path: str, frames_written: int):
+        """Продолжает запись существующего файла (возобновление); кадры после frames_written отбрасываются."""
+        writer = cls.__new__(cls)
+        with open(path, "rb") as f:
+            _, _, slots_per_day, max_agents, _ = struct.unpack(HEADER_FORMAT, f.read(struct.calcsize(HEADER_FORMAT)))
+        writer.path = path
+        writer.max_agents = max_agents
+        writer.slots_per_day = slots_per_day
+        writer.frame_size = max_agents * NUM_AXES
+        writer._file = open(path, "r+b")
+        writer._file.truncate(HEADER_SIZE + frames_written * writer.frame_size)
+        writer.frames_written = frames_written
+        writer.layouts = [entry for entry in read_layouts(path) if entry["frame"] < frames_written]
+        writer.layout = writer.layouts[-1]["layout"] if writer.layouts else None
+        writer._write_layouts()
+        return writer
+
+    def set_layout(self, layout: int, agents, day_id: int, slot_id: int):
+        """Фиксирует раскладку индексов (agents[i] — имя агента с индексом i), действующую с кадра (day, slot)."""
+        self.layouts.append({
+            "frame": day_id * self.slots_per_day + slot_id,
+            "layout": int(layout),
+            "agents": [str(name) for name in agents],
+        })
+        self.layout = layout
+        self._write_layouts()
+
+    def record(self, day_id: int, slot_id: int, emotions):
+        """Записывает кадр эмоций (n, 7) за день и слот; пропущенные кадры заполняются MISSING."""
+        if slot_id >= self.slots_per_day:
+            raise ValueError(f"slot_id {slot_id} вне раскладки файла ({self.slots_per_day} слотов в дне)")
+        frame_idx = day_id * self.slots_per_day + slot_id
+
+        # Сначала расширение: пропуск пишется уже с шириной нового кадра
+        n = emotions.shape[0]
+        if n > self.max_agents:
+            self._grow(n)
+
+        if frame_idx > self.frames_written:
+            self._file.seek(HEADER_SIZE + self.frames_written * self.frame_size)
+            gap = np.full(self.frame_size, MISSING, dtype=np.int8)
+            for _ in range(frame_idx - self.frames_written):
+                self._file.write(gap.tobytes())
+
+        frame = np.full((self.max_agents, NUM_AXES), MISSING, dtype=np.int8)
+        frame[:n] = emotions
+
+        self._file.seek(HEADER_SIZE + frame_idx * self.frame_size)
+        self._file.write(frame.tobytes())
+        self.frames_written = max(self.frames_written, frame_idx + 1)
+
+    def _grow(self, n: int):
+        """Переписывает файл с емкостью не меньше n (с запасом на следующие наборы); старые кадры дополняются MISSING."""
+        capacity = max(n, self.max_agents + self.max_agents // 4)
+        pad = np.full((capacity - self.max_agents) * NUM_AXES, MISSING, dtype=np.int8).tobytes()
+        tmp_path = self.path + ".tmp"
+        self._file.flush()
+        self._file.seek(HEADER_SIZE)
+        with open(tmp_path, "wb") as out:
+            out.write(_header(self.slots_per_day, capacity))
+            for _ in range(self.frames_written):
+                out.write(self._file.read(self.frame_size))
+                out.write(pad)
+        self._file.close()
+        # Читатели, уже отобразившие старый файл, продолжают видеть его до refresh()
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, "r+b")
+        self.max_agents = capacity
+        self.frame_size = capacity * NUM_AXES
+
+    def _write_layouts(self):
+        tmp_path = self.path + LAYOUTS_SUFFIX + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.layouts, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path + LAYOUTS_SUFFIX)
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+def read_layouts(path: str) -> list:
+    """Раскладки индексов файла истории: [{"frame", "layout", "agents"}] по возрастанию кадра."""
+    layouts_path = path + LAYOUTS_SUFFIX
+    if not os.path.exists(layouts_path):
+        return []
+    with open(layouts_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class EmotionHistory:
+    """
+    Чтение истории эмоций через np.memmap (только чтение, без загрузки всего файла).
+    data[day, slot, agent, axis] — int8, MISSING для отсутствующих значений.
+    Для файла, который еще дописывается, refresh() переотображает его по текущему размеру
+    (и емкости: при росте коллектива файл переписывается с более широким кадром).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.refresh()
+
+    def refresh(self):
+        with open(self.path, "rb") as f:
+            magic, version, slots_per_day, max_agents, num_axes = struct.unpack(
+                HEADER_FORMAT, f.read(struct.calcsize(HEADER_FORMAT))
+            )
+        if magic != MAGIC:
+            raise ValueError(f"{self.path}: не файл истории эмоций")
+        if version != VERSION:
+            raise ValueError(f"{self.path}: неподдерживаемая версия формата {version}")
+
+        self.slots_per_day = slots_per_day
+        self.max_agents = max_agents
+        self.num_axes = num_axes
+        self.layouts = read_layouts(self.path)
+
+        frame_size = self.max_agents * self.num_axes
+        day_size = frame_size * self.slots_per_day
+        self.num_days = max(0, (os.path.getsize(self.path) - HEADER_SIZE) // day_size)
+        if self.num_days == 0:
+            self.data = np.full((0, self.slots_per_day, self.max_agents, self.num_axes), MISSING, dtype=np.int8)
+            return
+        # Недописанный последний день не отображается до следующего refresh()
+        self.data = np.memmap(
+            self.path, dtype=np.int8, mode="r", offset=HEADER_SIZE,
+            shape=(self.num_days, self.slots_per_day, self.max_agents, self.num_axes)
+        )
+
+    def agents(self, day_id: int, slot_id: int) -> list:
+        """Имена агентов по индексам кадра (day, slot) — раскладка, действовавшая на момент записи."""
+        frame_idx = day_id * self.slots_per_day + slot_id
+        current = []
+        for entry in self.layouts:
+            if entry["frame"] > frame_idx:
+                break
+            current = entry["agents"]
+        return current
+
+    def frame(self, day_id: int, slot_id: int) -> np.ndarray:
+        """Эмоции всех агентов (max_agents, 7) на момент (day, slot)."""
+        return self.data[day_id, slot_id]
+
+    def window(self, day_from: int, day_to: int, slots=None, agents=None) -> np.ndarray:
+        """Окно [day_from, day_to] включительно: (дни, слоты, агенты, оси); slots/agents — срез или индексы."""
+        view = self.data[day_from:day_to + 1]
+        if slots is not None:
+            view = view[:, slots]
+        if agents is not None:
+            view = view[:, :, agents]
+        return view
@@ -0,0 +1,206 @@
+import os
+import json
+import time
+import socket
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# Очередь заданий пакета в файле SQLite: воркеры на одной или нескольких машинах (общий каталог)
+# забирают задания под аренду, продлевают ее и возвращают в очередь задания пропавших воркеров.
+DEFAULT_QUEUE_PATH = os.path.join("data", "queue", "batch.db")
+DEFAULT_LEASE_SECONDS = 600
+DEFAULT_MAX_ATTEMPTS = 3
+
+# Состояния задания
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id          TEXT PRIMARY KEY,
+    payload     TEXT NOT NULL,
+    priority    REAL NOT NULL DEFAULT 0,
+    status      TEXT NOT NULL DEFAULT 'pending',
+    owner       TEXT,
+    lease_until REAL,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    enqueued    REAL,
+    started     REAL,
+    finished    REAL,
+    error       TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, priority);
+"""
+
+
+def worker_id() -> str:
+    """Идентификатор воркера: хост и PID (уникален среди машин с общим каталогом очереди)."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class Job:
+    """Задание, выданное воркеру: id, полезная нагрузка (dict) и номер попытки."""
+
+    def __init__(self, job_id: str, payload: dict, attempts: int):
+        self.id = job_id
+        self.payload = payload
+        self.attempts = attempts
+
+    def __repr__(self):
+        return f"Job({self.id!r}, attempt {self.attempts})"
+
+
+class JobQueue:
+    """
+    Очередь заданий в файле SQLite. Каждая операция — короткая транзакция BEGIN IMMEDIATE
+    в отдельном соединении (безопасно для процессов и fork). Журнал — классический rollback journal:
+    WAL требует общей памяти и не работает на сетевых файловых системах.
+
+    Выдача: сначала задания с большим priority (оценка памяти — крупные первыми).
+    Аренда: задание RUNNING принадлежит воркеру до lease_until; просроченная аренда означает,
+    что воркер пропал, и задание возвращается в очередь (или FAILED после max_attempts попыток).
+    """
+
+    def __init__(self, path: str = DEFAULT_QUEUE_PATH, max_attempts: int = DEFAULT_MAX_ATTEMPTS, timeout: float = 60.0):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=self.timeout)
+        try:
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def enqueue(self, job_id: str, payload: dict, priority: float = 0.0):
+        """Ставит задание в очередь (повторная постановка сбрасывает его, если оно не выполняется сейчас)."""
+        now = time.time()
+        with self._transaction() as db:
+            db.execute(
+                "INSERT INTO jobs (id, payload, priority, status, attempts, enqueued) VALUES (?, ?, ?, ?, 0, ?) "
+                "ON CONFLICT(id) DO UPDATE SET payload = excluded.payload, priority = excluded.priority, "
+                "status = excluded.status, owner = NULL, lease_until = NULL, attempts = 0, "
+                "enqueued = excluded.enqueued, started = NULL, finished = NULL, error = NULL "
+                "WHERE jobs.status != ?",
+                (job_id, json.dumps(payload, ensure_ascii=False), priority, PENDING, now, RUNNING)
+            )
+
+    def _requeue_expired(self, db, now: float):
+        db.execute(
+            "UPDATE jobs SET status = ?, owner = NULL, lease_until = NULL, error = 'lease expired' "
+            "WHERE status = ? AND lease_until < ? AND attempts < ?",
+            (PENDING, RUNNING, now, self.max_attempts)
+        )
+        db.execute(
+            "UPDATE jobs SET status = ?, owner = NULL, lease_until = NULL, finished = ?, "
+            "error = 'lease expired, attempts exhausted' WHERE status = ? AND lease_until < ?",
+            (FAILED, now, RUNNING, now)
+        )
+
+    def claim(self, owner: str, lease: float = DEFAULT_LEASE_SECONDS):
+        """Забирает следующее задание под аренду на lease секунд; None — свободных заданий нет."""
+        now = time.time()
+        with self._transaction() as db:
+            self._requeue_expired(db, now)
+            row = db.execute(
+                "SELECT id, payload, attempts FROM jobs WHERE status = ? ORDER BY priority DESC, id LIMIT 1",
+                (PENDING,)
+            ).fetchone()
+            if row is None:
+                return None
+            db.execute(
+                "UPDATE jobs SET status = ?, owner = ?, lease_until = ?, attempts = attempts + 1, started = ? WHERE id = ?",
+                (RUNNING, owner, now + lease, now, row[0])
+            )
+        return Job(row[0], json.loads(row[1]), row[2] + 1)
+
+    def heartbeat(self, job_id: str, owner: str, lease: float = DEFAULT_LEASE_SECONDS) -> bool:
+        """Продлевает аренду; False — аренда потеряна (задание отдано другому воркеру)."""
+        with self._transaction() as db:
+            cursor = db.execute(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND owner = ? AND status = ?",
+                (time.time() + lease, job_id, owner, RUNNING)
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id: str, owner: str) -> bool:
+        with self._transaction() as db:
+            cursor = db.execute(
+                "UPDATE jobs SET status = ?, owner = NULL, lease_until = NULL, finished = ?, error = NULL "
+                "WHERE id = ? AND owner = ? AND status = ?",
+                (DONE, time.time(), job_id, owner, RUNNING)
+            )
+        return cursor.rowcount == 1
+
+    def fail(self, job_id: str, owner: str, error: str = None, retry: bool = True) -> bool:
+        """Неудачная попытка: задание возвращается в очередь, пока не исчерпаны попытки (retry=False — сразу FAILED)."""
+        with self._transaction() as db:
+            cursor = db.execute(
+                "UPDATE jobs SET status = CASE WHEN ? AND attempts < ? THEN ? ELSE ? END, "
+                "owner = NULL, lease_until = NULL, finished = ?, error = ? WHERE id = ? AND owner = ? AND status = ?",
+                (retry, self.max_attempts, PENDING, FAILED, time.time(), error, job_id, owner, RUNNING)
+            )
+        return cursor.rowcount == 1
+
+    def counts(self) -> dict:
+        """Число заданий по состояниям (просроченные аренды предварительно возвращаются в очередь)."""
+        with self._transaction() as db:
+            self._requeue_expired(db, time.time())
+            rows = db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def jobs(self) -> list:
+        """Все задания: id, состояние, владелец, попытки, ошибка."""
+        with self._transaction() as db:
+            rows = db.execute(
+                "SELECT id, status, owner, attempts, lease_until, error, priority FROM jobs ORDER BY priority DESC, id"
+            ).fetchall()
+        keys = ("id", "status", "owner", "attempts", "lease_until", "error", "priority")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def pending_priorities(self) -> list:
+        with self._transaction() as db:
+            rows = db.execute("SELECT priority FROM jobs WHERE status = ?", (PENDING,)).fetchall()
+        return [row[0] for row in rows]
+
+    @contextmanager
+    def leased(self, job: Job, owner: str, lease: float = DEFAULT_LEASE_SECONDS):
+        """
+        Продлевает аренду задания в фоновом потоке (каждую треть срока), пока выполняется блок.
+        Отдает событие lost: установлено, если аренду перехватил другой воркер.
+        """
+        stop, lost = threading.Event(), threading.Event()
+
+        def renew():
+            while not stop.wait(lease / 3):
+                try:
+                    if not self.heartbeat(job.id, owner, lease):
+                        lost.set()
+                        return
+                except sqlite3.Error:
+                    continue # Временная блокировка файла — повторим на следующем такте
+
+        thread = threading.Thread(target=renew, name=f"lease-{job.id}", daemon=True)
+        thread.start()
+        try:
+            yield lost
+        finally:
+            stop.set()
+            thread.join()
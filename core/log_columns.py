@@ -0,0 +1,70 @@
+import numpy as np
+
+# Общая подготовка колонок для приемников логов (ClickHouseLogger, RunStore)
+
+INTERACTION_TYPE_MAP = {'refusal': 0, 'success': 1, 'fail': -1}
+
+
+def interaction_columns(engine, interactions_list=None, name_to_id=None):
+    """
+    Взаимодействия слота в виде колонок (from_id, to_id, type).
+    Если передан interactions_list (Python-модель), берется он, иначе engine.last_day_interactions.
+    """
+    if interactions_list and name_to_id:
+        # В списке могут быть системные сообщения, игнорируем их
+        rows = [
+            (name_to_id[from_name], name_to_id[to_name], INTERACTION_TYPE_MAP.get(status, 0))
+            for from_name, to_name, status in interactions_list
+            if from_name in name_to_id and to_name in name_to_id
+        ]
+        triples = np.array(rows, dtype=np.int32).reshape(-1, 3)
+        types = triples[:, 2].astype(np.int8)
+    else:
+        # Лог из C++ движка: перевод enum ядра в коды ClickHouse (1 -> 1, 2 -> -1, прочее -> 0)
+        triples = engine.interactions_array()
+        cpp_types = triples[:, 2]
+        types = np.zeros(len(cpp_types), dtype=np.int8)
+        types[cpp_types == 1] = 1
+        types[cpp_types == 2] = -1
+    return triples[:, 0].astype(np.uint32), triples[:, 1].astype(np.uint32), types
+
+
+def filter_interactions(from_ids, to_ids, types, agent_idx):
+    """Оставляет взаимодействия, инициированные агентами панели."""
+    if agent_idx is None:
+        return from_ids, to_ids, types
+    keep = np.isin(from_ids, agent_idx)
+    return from_ids[keep], to_ids[keep], types[keep]
+
+
+def interaction_counts(types):
+    """Агрегат слота: (типы, количества) по типам взаимодействий."""
+    kinds, counts = np.unique(types, return_counts=True)
+    return kinds.astype(np.int8), counts.astype(np.uint32)
+
+
+def state_rows(engine, agent_idx=None):
+    """Эмоции (agent_ids, values (K, 7) int8) для всех агентов или панели."""
+    emotions = engine.emotions_array()
+    if agent_idx is None:
+        return np.arange(emotions.shape[0], dtype=np.uint32), emotions
+    return agent_idx.astype(np.uint32), emotions[agent_idx]
+
+
+def state_means(engine, agent_idx=None):
+    """Агрегат слота: число агентов и средние по 7 осям (float32)."""
+    _, values = state_rows(engine, agent_idx)
+    if len(values) == 0:
+        return 0, np.zeros(7, dtype=np.float32)
+    return len(values), values.mean(axis=0, dtype=np.float64).astype(np.float32)
+
+
+def relation_mask(n, agent_idx=None):
+    """Маска пар (субъект, объект) без диагонали, ограниченная панелью агентов."""
+    if agent_idx is None:
+        return ~np.eye(n, dtype=bool)
+    in_panel = np.zeros(n, dtype=bool)
+    in_panel[agent_idx] = True
+    mask = np.outer(in_panel, in_panel)
+    np.fill_diagonal(mask, False)
+    return mask
@@ -0,0 +1,105 @@
+import json
+import numpy as np
+
+# Политика по умолчанию повторяет прежнюю зашитую частоту SimulationSession.run_day
+DEFAULT_POLICY = {
+    "states": {"every_days": 1, "slots": "last", "aggregate_only": False},
+    "interactions": {"every_days": 1, "slots": "all", "aggregate_only": False},
+    "relations": {"every_days": 3, "slots": "last"},
+    "agent_sample": None,       # {"fraction": 0.1, "seed": 42} — фиксированная случайная панель агентов
+    "emotion_history": True,
+}
+
+AGENT_SAMPLE_KEYS = ("fraction", "seed")
+
+LOGGED_TABLES = ("states", "interactions", "relations")
+
+
+class LoggingPolicy:
+    """
+    Декларативная политика логирования из сценария JSON (ключ "logging").
+    Для каждой таблицы: every_days — интервал в днях (по current_step), slots — "all", "last"
+    или список номеров слотов, aggregate_only — писать только агрегаты за слот вместо строк.
+    agent_sample задает панель агентов: состав фиксируется по именам и переживает ротацию
+    (новые агенты попадают в панель с той же вероятностью).
+    """
+
+    def __init__(self, config: dict = None):
+        config = config or {}
+        unknown = set(config) - set(DEFAULT_POLICY)
+        if unknown:
+            raise ValueError(f"Неизвестные ключи политики логирования: {sorted(unknown)}")
+
+        self.tables = {}
+        for table in LOGGED_TABLES:
+            rule = dict(DEFAULT_POLICY[table])
+            overrides = config.get(table) or {}
+            if not isinstance(overrides, dict):
+                raise ValueError(f"logging.{table}: ожидается словарь правил")
+            unknown = set(overrides) - set(rule)
+            if unknown:
+                raise ValueError(f"Неизвестные ключи logging.{table}: {sorted(unknown)} (допустимы {sorted(rule)})")
+            rule.update(overrides)
+            if int(rule["every_days"]) < 1:
+                raise ValueError(f"logging.{table}.every_days должен быть >= 1")
+            slots = rule["slots"]
+            if not (slots in ("all", "last") or isinstance(slots, list)):
+                raise ValueError(f"logging.{table}.slots: ожидается 'all', 'last' или список слотов")
+            self.tables[table] = rule
+
+        self.agent_sample = config.get("agent_sample", DEFAULT_POLICY["agent_sample"])
+        self.emotion_history = bool(config.get("emotion_history", DEFAULT_POLICY["emotion_history"]))
+
+        # Множитель интервалов в стационарном режиме (см. core/steady_state.py)
+        self.quiet_factor = 1
+
+        self._panel = set()
+        self._seen = set()
+        self._panel_rng = None
+        if self.agent_sample:
+            if not isinstance(self.agent_sample, dict):
+                raise ValueError("logging.agent_sample: ожидается словарь {fraction, seed} или null")
+            unknown = set(self.agent_sample) - set(AGENT_SAMPLE_KEYS)
+            if unknown:
+                raise ValueError(f"Неизвестные ключи logging.agent_sample: {sorted(unknown)} (допустимы {list(AGENT_SAMPLE_KEYS)})")
+            fraction = float(self.agent_sample.get("fraction", 1.0))
+            if not 0.0 < fraction <= 1.0:
+                raise ValueError("logging.agent_sample.fraction должен быть в (0, 1]")
+            self._panel_rng = np.random.default_rng(self.agent_sample.get("seed"))
+
+    def should_log(self, table: str, day_id: int, slot_id: int, is_last_slot: bool) -> bool:
+        rule = self.tables[table]
+        if day_id % (int(rule["every_days"]) * self.quiet_factor) != 0:
+            return False
+        slots = rule["slots"]
+        if slots == "all":
+            return True
+        if slots == "last":
+            return is_last_slot
+        return slot_id in slots
+
+    def aggregate_only(self, table: str) -> bool:
+        return bool(self.tables[table].get("aggregate_only", False))
+
+    def panel_indices(self, collective):
+        """Индексы ядра для агентов панели или None, если подвыборка не задана."""
+        if not self.agent_sample:
+            return None
+        fraction = float(self.agent_sample.get("fraction", 1.0))
+        names = [collective._reverse_id_map[i] for i in range(len(collective._reverse_id_map))]
+        new_names = [name for name in names if name not in self._seen]
+        if new_names:
+            picks = self._panel_rng.random(len(new_names)) < fraction
+            self._panel.update(name for name, picked in zip(new_names, picks) if picked)
+            self._seen.update(new_names)
+        return np.array([i for i, name in enumerate(names) if name in self._panel], dtype=np.int64)
+
+    def to_dict(self) -> dict:
+        return {
+            **{table: dict(rule) for table, rule in self.tables.items()},
+            "agent_sample": self.agent_sample,
+            "emotion_history": self.emotion_history,
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False, sort_keys=True)
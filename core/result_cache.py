@@ -0,0 +1,116 @@
+import os
+import glob
+import json
+import hashlib
+import datetime
+
+DEFAULT_CACHE_DIR = os.path.join("data", "output", "result_cache")
+CORE_DIR = os.path.dirname(os.path.abspath(__file__))
+BUILD_INFO_FILE = os.path.join(CORE_DIR, ".build_info")
+
+# Поля сценария, не влияющие на результат расчета (подписи запуска)
+COSMETIC_KEYS = ("run_name", "description")
+
+
+def _canonical(value) -> str:
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def normalized_scenario(config: dict) -> dict:
+    """Сценарий без косметических полей — одинаковые расчеты получают одинаковый ключ."""
+    return {k: v for k, v in config.items() if k not in COSMETIC_KEYS}
+
+
+def archetype_fingerprint() -> str:
+    """Хэш таблицы архетипов (все параметры ARCHETYPE_WEIGHTS)."""
+    from model.archetypes import ARCHETYPE_WEIGHTS
+    table = {arch_enum.name: vars(arch) for arch_enum, arch in ARCHETYPE_WEIGHTS.items()}
+    return hashlib.sha256(_canonical(table).encode("utf-8")).hexdigest()
+
+
+def engine_fingerprint() -> str:
+    """
+    Сборка ядра: core/.build_info (платформа, под которую собран модуль) и хэш исходников core/src —
+    сама .build_info не меняется при правке кода ядра на той же машине.
+    """
+    digest = hashlib.sha256()
+    if os.path.exists(BUILD_INFO_FILE):
+        with open(BUILD_INFO_FILE, "rb") as f:
+            digest.update(f.read().strip())
+    for path in sorted(glob.glob(os.path.join(CORE_DIR, "src", "*.[ch]pp"))):
+        digest.update(os.path.basename(path).encode("utf-8"))
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def run_key(config: dict, seed=None, **run_params) -> str:
+    """
+    Ключ расчета: нормализованный сценарий, сид, таблица архетипов, сборка ядра
+    и параметры запуска, переопределяющие сценарий (например, число семестров).
+    """
+    payload = {
+        "scenario": normalized_scenario(config),
+        "seed": config.get("seed") if seed is None else seed,
+        "archetypes": archetype_fingerprint(),
+        "engine": engine_fingerprint(),
+        "params": run_params,
+    }
+    return hashlib.sha256(_canonical(payload).encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Локальный индекс завершенных расчетов: одна запись <ключ>.json на расчет
+    (атомарная запись — параллельные воркеры пакета не мешают друг другу).
+    Запись указывает на run_id в ClickHouse или на каталог локального хранилища RunStore.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def lookup(self, key: str):
+        """Запись о завершенном расчете или None; запись на удаленное локальное хранилище не учитывается."""
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+        if entry.get("sink") == "run_store" and not os.path.isdir(entry.get("location") or ""):
+            return None
+        return entry
+
+    def record(self, key: str, scenario_name: str, session):
+        """Фиксирует завершенный расчет сессии (приемник и run_id)."""
+        if session.ch_logger:
+            sink, location = "clickhouse", None
+        elif session.run_store:
+            sink, location = "run_store", session.run_store.path
+        else:
+            sink, location = None, session.output_dir
+        entry = {
+            "key": key,
+            "scenario_name": scenario_name,
+            "run_id": session.run_id,
+            "sink": sink,
+            "location": location,
+            "finished": datetime.datetime.now().isoformat(timespec="seconds"),
+        }
+        tmp_path = self._path(key) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self._path(key))
+        return entry
+
+    def invalidate(self, key: str):
+        if os.path.exists(self._path(key)):
+            os.remove(self._path(key))
+
+
+def describe(entry: dict) -> str:
+    where = "ClickHouse" if entry["sink"] == "clickhouse" else entry.get("location")
+    return f"run_id {entry['run_id']} ({where}, {entry['finished']})"
@@ -0,0 +1,313 @@
+import os
+import json
+import atexit
+import uuid
+import datetime
+import numpy as np
+from core import log_columns
+
+# Колонки построчных таблиц хранилища (run_id задается каталогом запуска)
+STORE_TABLES = {
+    'states': ['day_id', 'slot_id', 'agent_id',
+               'sadness_joy', 'fear_calm', 'anger_humility', 'disgust_acceptance',
+               'habit_surprise', 'shame_confidence', 'alienation_openness'],
+    'interactions': ['day_id', 'slot_id', 'from_id', 'to_id', 'type'],
+    'registry': ['agent_id', 'string_id', 'name', 'group_id', 'archetype'],
+    'states_agg': ['day_id', 'slot_id', 'agents',
+                   'sadness_joy', 'fear_calm', 'anger_humility', 'disgust_acceptance',
+                   'habit_surprise', 'shame_confidence', 'alienation_openness'],
+    'interactions_agg': ['day_id', 'slot_id', 'type', 'count'],
+}
+
+MANIFEST_FILE = "manifest.json"
+
+
+class RunStore:
+    """
+    Локальное колоночное хранилище запуска (замена CSV-фоллбека без ClickHouse).
+    Каждая таблица — каталог сжатых чанков .npz; строки копятся в памяти и
+    сбрасываются чанком по достижении chunk_rows. Снимок отношений хранится
+    плотной матрицей (N, N, 3) int8 отдельным чанком.
+    manifest.json перечисляет чанки с диапазоном дней для выборочного чтения.
+
+    Числовые agent_id — индексы ядра, которые меняются при ротации состава.
+    Каждая раскладка индексов (layout) получает свою запись реестра, а каждый
+    чанк помечается раскладкой, под которой записаны его строки.
+    """
+
+    def __init__(self, output_dir: str = "data/output", chunk_rows: int = 1_000_000):
+        self.run_id = str(uuid.uuid4())
+        self.path = os.path.join(output_dir, "run_store", self.run_id)
+        self.chunk_rows = chunk_rows
+
+        for table in list(STORE_TABLES) + ['relations']:
+            os.makedirs(os.path.join(self.path, table), exist_ok=True)
+
+        self.layout = 0
+        self.manifest = {"run_id": self.run_id, "metadata": {}, "layout": self.layout, "chunks": []}
+        self._buffers = {table: [] for table in STORE_TABLES}
+        self._buffered_rows = {table: 0 for table in STORE_TABLES}
+        self._chunk_counter = 0
+        self._write_manifest()
+        atexit.register(self.close)
+
+    @classmethod
+    def reopen(cls, path: str, after_day: int = None, layout: int = None, chunk_rows: int = 1_000_000):
+        """
+        Продолжает запись в существующий запуск (возобновление с контрольной точки).
+        Строки и снимки с day_id > after_day, записанные после точки, отбрасываются;
+        реестры раскладок новее layout (ротации после точки) — тоже.
+        """
+        store = cls.__new__(cls)
+        store.path = path
+        store.chunk_rows = chunk_rows
+        with open(os.path.join(path, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            store.manifest = json.load(f)
+        store.run_id = store.manifest["run_id"]
+        store._buffers = {table: [] for table in STORE_TABLES}
+        store._buffered_rows = {table: 0 for table in STORE_TABLES}
+        store.layout = store.manifest.get("layout", 0) if layout is None else layout
+
+        if after_day is not None or layout is not None:
+            kept = []
+            for chunk in store.manifest["chunks"]:
+                if chunk.get("layout", 0) > store.layout:
+                    file_path = os.path.join(path, chunk["file"])
+                    if os.path.exists(file_path):
+                        os.remove(file_path)
+                    continue
+                if after_day is None or chunk["day_min"] is None or chunk["day_max"] <= after_day:
+                    kept.append(chunk)
+                    continue
+                file_path = os.path.join(path, chunk["file"])
+                if chunk["day_min"] <= after_day and chunk["table"] != 'relations':
+                    with np.load(file_path) as npz:
+                        data = {name: npz[name] for name in npz.files}
+                    mask = data['day_id'] <= after_day
+                    np.savez_compressed(file_path, **{name: col[mask] for name, col in data.items()})
+                    kept.append({**chunk, "rows": int(mask.sum()), "day_max": after_day})
+                elif os.path.exists(file_path):
+                    os.remove(file_path)
+            store.manifest["chunks"] = kept
+        store.manifest["layout"] = store.layout
+
+        numbers = [int(os.path.basename(c["file"])[len("chunk_"):-len(".npz")]) for c in store.manifest["chunks"]]
+        store._chunk_counter = max(numbers, default=-1) + 1
+        store._write_manifest()
+        atexit.register(store.close)
+        return store
+
+    def log_run_metadata(self, run_name: str, description: str, scenario_name: str = "default", logging_policy: str = ""):
+        self.manifest["metadata"] = {
+            "start_time": datetime.datetime.now().isoformat(timespec="seconds"),
+            "run_name": run_name,
+            "description": description,
+            "scenario_name": scenario_name,
+            "logging_policy": logging_policy,
+        }
+        self._write_manifest()
+
+    def log_agent_states(self, day_id: int, slot_id: int, engine, agent_idx=None):
+        agent_ids, emotions = log_columns.state_rows(engine, agent_idx)
+        n = len(agent_ids)
+        columns = [
+            np.full(n, day_id, dtype=np.uint32),
+            np.full(n, slot_id, dtype=np.uint8),
+            agent_ids,
+        ]
+        columns.extend(np.ascontiguousarray(emotions[:, axis]) for axis in range(7))
+        self._append('states', columns)
+
+    def log_state_aggregates(self, day_id: int, slot_id: int, engine, agent_idx=None):
+        count, means = log_columns.state_means(engine, agent_idx)
+        columns = [
+            np.array([day_id], dtype=np.uint32),
+            np.array([slot_id], dtype=np.uint8),
+            np.array([count], dtype=np.uint32),
+        ]
+        columns.extend(means[axis:axis + 1] for axis in range(7))
+        self._append('states_agg', columns)
+
+    def log_agent_relations(self, day_id: int, slot_id: int, engine, force_keyframe: bool = False, agent_idx=None):
+        """Сохраняет полный снимок матрицы отношений (или подматрицы панели) отдельным чанком."""
+        matrix = engine.relations_array()
+        data = {
+            'day_id': np.array([day_id], dtype=np.uint32),
+            'slot_id': np.array([slot_id], dtype=np.uint8),
+        }
+        if agent_idx is not None:
+            matrix = matrix[np.ix_(agent_idx, agent_idx)]
+            data['agent_ids'] = agent_idx.astype(np.uint32)
+        data['relations'] = matrix
+        self._write_chunk('relations', data, day_id, day_id)
+
+    def flush_day_relations(self):
+        # Снимки отношений пишутся сразу; метод сохранен для совместимости с ClickHouseLogger
+        pass
+
+    def log_interactions(self, day_id: int, slot_id: int, engine, interactions_list=None, name_to_id=None, agent_idx=None):
+        from_ids, to_ids, types = log_columns.filter_interactions(
+            *log_columns.interaction_columns(engine, interactions_list, name_to_id), agent_idx
+        )
+        n = len(types)
+        if n == 0:
+            return
+        self._append('interactions', [
+            np.full(n, day_id, dtype=np.uint32),
+            np.full(n, slot_id, dtype=np.uint8),
+            from_ids,
+            to_ids,
+            types,
+        ])
+
+    def log_interaction_aggregates(self, day_id: int, slot_id: int, engine, interactions_list=None, name_to_id=None, agent_idx=None):
+        _, _, types = log_columns.filter_interactions(
+            *log_columns.interaction_columns(engine, interactions_list, name_to_id), agent_idx
+        )
+        kinds, counts = log_columns.interaction_counts(types)
+        n = len(kinds)
+        if n == 0:
+            return
+        self._append('interactions_agg', [
+            np.full(n, day_id, dtype=np.uint32),
+            np.full(n, slot_id, dtype=np.uint8),
+            kinds,
+            counts,
+        ])
+
+    def log_agent_registry(self, collective, layout: int = 0):
+        """
+        Записывает реестр агентов для раскладки индексов layout.
+        При смене раскладки буферы сбрасываются, чтобы чанк не смешивал строки двух раскладок.
+        """
+        if layout != self.layout:
+            self.close()
+            self.layout = layout
+            self.manifest["layout"] = layout
+        rows = []
+        for i in range(len(collective._reverse_id_map)):
+            string_id = collective._reverse_id_map.get(i)
+            agent = collective.agents.get(string_id)
+            if not agent: continue
+
+            arch_enum = getattr(agent.automaton, 'archetype_enum', None)
+            archetype = arch_enum.localized if arch_enum else getattr(agent.archetype, 'name', 'Harmony')
+            rows.append((i, str(string_id), str(getattr(agent, 'name', string_id)),
+                         str(getattr(agent, 'group_id', 'Unknown')), str(archetype)))
+        if not rows:
+            return
+
+        agent_ids, string_ids, names, groups, archetypes = zip(*rows)
+        self._append('registry', [
+            np.array(agent_ids, dtype=np.uint32),
+            np.array(string_ids), np.array(names), np.array(groups), np.array(archetypes),
+        ])
+        self._flush_table('registry')
+
+    def close(self):
+        """Сбрасывает недописанные буферы на диск."""
+        for table in STORE_TABLES:
+            self._flush_table(table)
+
+    def _append(self, table, columns):
+        self._buffers[table].append(columns)
+        self._buffered_rows[table] += len(columns[0])
+        if self._buffered_rows[table] >= self.chunk_rows:
+            self._flush_table(table)
+
+    def _flush_table(self, table):
+        parts = self._buffers[table]
+        if not parts:
+            return
+        names = STORE_TABLES[table]
+        data = {name: np.concatenate([part[i] for part in parts]) for i, name in enumerate(names)}
+        if 'day_id' in data:
+            day_min, day_max = int(data['day_id'].min()), int(data['day_id'].max())
+        else:
+            day_min = day_max = None
+        self._write_chunk(table, data, day_min, day_max)
+        self._buffers[table] = []
+        self._buffered_rows[table] = 0
+
+    def _write_chunk(self, table, data, day_min, day_max):
+        file_name = f"chunk_{self._chunk_counter:06d}.npz"
+        self._chunk_counter += 1
+        np.savez_compressed(os.path.join(self.path, table, file_name), **data)
+        self.manifest["chunks"].append({
+            "table": table,
+            "file": f"{table}/{file_name}",
+            "rows": int(len(next(iter(data.values())))),
+            "day_min": day_min,
+            "day_max": day_max,
+            "layout": self.layout,
+        })
+        self._write_manifest()
+
+    def _write_manifest(self):
+        tmp_path = os.path.join(self.path, MANIFEST_FILE + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, os.path.join(self.path, MANIFEST_FILE))
+
+
+class RunStoreReader:
+    """Чтение запуска из RunStore: NumPy-колонки за произвольный диапазон дней."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self.run_id = self.manifest["run_id"]
+        self.metadata = self.manifest.get("metadata", {})
+        self.layout = self.manifest.get("layout", 0)
+
+    def _chunks(self, table, day_from=None, day_to=None):
+        for chunk in self.manifest["chunks"]:
+            if chunk["table"] != table:
+                continue
+            if chunk["day_min"] is not None:
+                if day_from is not None and chunk["day_max"] < day_from: continue
+                if day_to is not None and chunk["day_min"] > day_to: continue
+            with np.load(os.path.join(self.path, chunk["file"])) as npz:
+                data = {name: npz[name] for name in npz.files}
+            data['layout'] = chunk.get("layout", 0)
+            yield data
+
+    def read(self, table: str, day_from: int = None, day_to: int = None) -> dict:
+        """
+        Возвращает колонки таблицы (states, interactions, registry, states_agg, interactions_agg) словарем массивов,
+        отфильтрованные по day_from <= day_id <= day_to (границы включительно).
+        Колонка layout — раскладка индексов строки; agent_id сопоставляется реестру той же раскладки.
+        """
+        if table not in STORE_TABLES:
+            raise ValueError(f"Неизвестная таблица хранилища: {table}")
+        names = STORE_TABLES[table]
+        parts = list(self._chunks(table, day_from, day_to))
+        if not parts:
+            return {name: np.array([]) for name in names + ['layout']}
+
+        data = {name: np.concatenate([part[name] for part in parts]) for name in names}
+        data['layout'] = np.concatenate([np.full(len(part[names[0]]), part['layout'], dtype=np.uint32) for part in parts])
+        if 'day_id' in data and (day_from is not None or day_to is not None):
+            mask = np.ones(len(data['day_id']), dtype=bool)
+            if day_from is not None: mask &= data['day_id'] >= day_from
+            if day_to is not None: mask &= data['day_id'] <= day_to
+            data = {name: col[mask] for name, col in data.items()}
+        return data
+
+    def registry(self, layout: int = None) -> dict:
+        """Реестр агентов раскладки layout (по умолчанию последней): словарь agent_id -> string_id."""
+        layout = self.layout if layout is None else layout
+        data = self.read('registry')
+        mask = data['layout'] == layout
+        return dict(zip(data['agent_id'][mask].tolist(), data['string_id'][mask].tolist()))
+
+    def read_relations(self, day_from: int = None, day_to: int = None) -> list:
+        """
+        Снимки отношений за диапазон дней: список (day_id, slot_id, матрица (N, N, 3) int8, agent_ids, layout).
+        agent_ids — индексы агентов панели для подматрицы или None, если записана полная матрица.
+        """
+        return [
+            (int(part['day_id'][0]), int(part['slot_id'][0]), part['relations'], part.get('agent_ids'), part['layout'])
+            for part in self._chunks('relations', day_from, day_to)
+        ]
@@ -1,6 +1,10 @@
 #include "engine.hpp"
+#include "ensemble.hpp"
+#include <pybind11/numpy.h>
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
+#include <algorithm>
+#include <stdexcept>
 
 namespace py = pybind11;
 
@@ -53,6 +57,20 @@ PYBIND11_MODULE(emotion_engine, m) {
       .def("set_emission_weight", &core_engine::Engine::set_emission_weight)
       .def("set_archetype_config", &core_engine::Engine::set_archetype_config)
       .def("set_agent_archetype", &core_engine::Engine::set_agent_archetype)
+      // Индексы приходят из Python (GUI): проверяем границы до обращения к массивам ядра
+      .def("get_relation_row",
+           [](const core_engine::Engine &e, int agent_idx) {
+             if (agent_idx < 0 || agent_idx >= e.state.num_agents)
+               throw py::index_error("agent index out of range");
+             return e.get_relation_row(agent_idx);
+           })
+      .def("get_primary_emotions",
+           [](const core_engine::Engine &e, const std::vector<int> &indices) {
+             for (int idx : indices)
+               if (idx < 0 || idx >= e.state.num_agents)
+                 throw py::index_error("agent index out of range");
+             return e.get_primary_emotions(indices);
+           })
       .def("influence_emotions", &core_engine::Engine::influence_emotions)
       .def("apply_relation_decay", &core_engine::Engine::apply_relation_decay)
       .def("react_to_relations", &core_engine::Engine::react_to_relations)
@@ -74,7 +92,146 @@ PYBIND11_MODULE(emotion_engine, m) {
       .def_property_readonly(
           "emotions",
           [](const core_engine::Engine &e) { return e.state.emotions; })
-      .def_property_readonly("relations", [](const core_engine::Engine &e) {
-        return e.state.relations;
+      .def_property_readonly("relations",
+                             [](const core_engine::Engine &e) {
+                               return e.state.relations;
+                             })
+      // Колоночный доступ для логгеров: int8-копии буферов без Python-списков
+      .def("emotions_array",
+           [](const core_engine::Engine &e) {
+             const int n = e.state.num_agents;
+             py::array_t<int8_t> out({n, 7});
+             std::copy(e.state.emotions.begin(), e.state.emotions.end(),
+                       out.mutable_data());
+             return out;
+           })
+      .def("relations_array",
+           [](const core_engine::Engine &e) {
+             const int n = e.state.num_agents;
+             py::array_t<int8_t> out({n, n, 3});
+             std::copy(e.state.relations.begin(), e.state.relations.end(),
+                       out.mutable_data());
+             return out;
+           })
+      .def("set_emotions_array",
+           [](core_engine::Engine &e,
+              py::array_t<int8_t, py::array::c_style | py::array::forcecast>
+                  values) {
+             const size_t expected = e.state.emotions.size();
+             if (static_cast<size_t>(values.size()) != expected)
+               throw std::invalid_argument("emotions array size mismatch");
+             std::copy(values.data(), values.data() + expected,
+                       e.state.emotions.begin());
+           })
+      .def("set_relations_array",
+           [](core_engine::Engine &e,
+              py::array_t<int8_t, py::array::c_style | py::array::forcecast>
+                  values) {
+             const size_t expected = e.state.relations.size();
+             if (static_cast<size_t>(values.size()) != expected)
+               throw std::invalid_argument("relations array size mismatch");
+             std::copy(values.data(), values.data() + expected,
+                       e.state.relations.begin());
+           })
+      .def("interactions_array", [](const core_engine::Engine &e) {
+        const auto &log = e.last_day_interactions;
+        py::array_t<int32_t> out({static_cast<py::ssize_t>(log.size()),
+                                  static_cast<py::ssize_t>(3)});
+        auto buf = out.mutable_unchecked<2>();
+        for (py::ssize_t i = 0; i < static_cast<py::ssize_t>(log.size()); ++i) {
+          buf(i, 0) = log[i].from_idx;
+          buf(i, 1) = log[i].to_idx;
+          buf(i, 2) = static_cast<int32_t>(log[i].type);
+        }
+        return out;
+      });
+
+  // Ансамбль реплик: состояние отдается массивами (R, N, 7) и (R, N, N, 3)
+  py::class_<core_engine::EnsembleEngine>(m, "EnsembleEngine")
+      .def(py::init<int, int>(), py::arg("num_replicas"), py::arg("num_agents"))
+      .def_property_readonly("num_replicas",
+                             &core_engine::EnsembleEngine::num_replicas)
+      .def_property_readonly("num_agents",
+                             &core_engine::EnsembleEngine::num_agents)
+      .def("set_archetype_config",
+           &core_engine::EnsembleEngine::set_archetype_config)
+      .def("set_agent_archetype",
+           &core_engine::EnsembleEngine::set_agent_archetype)
+      .def("set_sensitivities", &core_engine::EnsembleEngine::set_sensitivities)
+      .def("set_emission_weights",
+           &core_engine::EnsembleEngine::set_emission_weights)
+      .def("seed", &core_engine::EnsembleEngine::seed)
+      .def("perform_daily_cycle",
+           &core_engine::EnsembleEngine::perform_daily_cycle,
+           py::call_guard<py::gil_scoped_release>())
+      // Реплика как обычный Engine (снимки, точечный доступ); живет, пока жив ансамбль
+      .def(
+          "replica",
+          [](core_engine::EnsembleEngine &ens, int r) -> core_engine::Engine & {
+            if (r < 0 || r >= ens.num_replicas())
+              throw py::index_error("replica index out of range");
+            return ens.replicas[r];
+          },
+          py::return_value_policy::reference_internal)
+      .def("emotions_array",
+           [](const core_engine::EnsembleEngine &ens) {
+             const int r_count = ens.num_replicas(), n = ens.num_agents();
+             py::array_t<int8_t> out({r_count, n, 7});
+             int8_t *dst = out.mutable_data();
+             for (const auto &e : ens.replicas)
+               dst = std::copy(e.state.emotions.begin(), e.state.emotions.end(), dst);
+             return out;
+           })
+      .def("relations_array",
+           [](const core_engine::EnsembleEngine &ens) {
+             const int r_count = ens.num_replicas(), n = ens.num_agents();
+             py::array_t<int8_t> out({r_count, n, n, 3});
+             int8_t *dst = out.mutable_data();
+             for (const auto &e : ens.replicas)
+               dst = std::copy(e.state.relations.begin(), e.state.relations.end(), dst);
+             return out;
+           })
+      // Принимают (R, ...) — по реплике, или состояние одной популяции — во все реплики
+      .def("set_emotions_array",
+           [](core_engine::EnsembleEngine &ens,
+              py::array_t<int8_t, py::array::c_style | py::array::forcecast>
+                  values) {
+             const size_t per = ens.replicas[0].state.emotions.size();
+             const size_t total = static_cast<size_t>(values.size());
+             if (total != per && total != per * ens.replicas.size())
+               throw std::invalid_argument("emotions array size mismatch");
+             for (size_t r = 0; r < ens.replicas.size(); ++r) {
+               const int8_t *src = values.data() + (total == per ? 0 : r * per);
+               std::copy(src, src + per, ens.replicas[r].state.emotions.begin());
+             }
+           })
+      .def("set_relations_array",
+           [](core_engine::EnsembleEngine &ens,
+              py::array_t<int8_t, py::array::c_style | py::array::forcecast>
+                  values) {
+             const size_t per = ens.replicas[0].state.relations.size();
+             const size_t total = static_cast<size_t>(values.size());
+             if (total != per && total != per * ens.replicas.size())
+               throw std::invalid_argument("relations array size mismatch");
+             for (size_t r = 0; r < ens.replicas.size(); ++r) {
+               const int8_t *src = values.data() + (total == per ? 0 : r * per);
+               std::copy(src, src + per, ens.replicas[r].state.relations.begin());
+             }
+           })
+      .def("summary", [](const core_engine::EnsembleEngine &ens) {
+        const auto s = ens.summary();
+        const py::ssize_t r_count = ens.num_replicas();
+        auto to_array = [r_count](const auto &values, py::ssize_t cols) {
+          using T = typename std::decay_t<decltype(values)>::value_type;
+          py::array_t<T> out({r_count, cols});
+          std::copy(values.begin(), values.end(), out.mutable_data());
+          return out;
+        };
+        py::dict out;
+        out["emotion_mean"] = to_array(s.emotion_mean, 7);
+        out["emotion_std"] = to_array(s.emotion_std, 7);
+        out["relation_mean"] = to_array(s.relation_mean, 3);
+        out["interactions"] = to_array(s.interactions, 3);
+        return out;
       });
 }
@@ -123,7 +123,7 @@ bool Engine::should_refuse(int agent_idx, int target_idx) {
     float base_factor = state.archetype_configs[arch_idx].refusal_chance;
     float final_prob = std::min(0.95f, base_factor);
     
-    return ((float)rand() / (float)RAND_MAX) < final_prob;
+    return ((float)next_rand() / (float)RAND_MAX) < final_prob;
 }
 
 int Engine::choose_target(int agent_idx) {
@@ -170,7 +170,7 @@ int Engine::choose_target(int agent_idx) {
         sum_exp += e;
     }
     
-    float r = ((float)rand() / (float)RAND_MAX) * sum_exp;
+    float r = ((float)next_rand() / (float)RAND_MAX) * sum_exp;
     float current_sum = 0.0f;
     for (size_t i = 0; i < exp_scores.size(); ++i) {
         current_sum += exp_scores[i];
@@ -396,7 +396,7 @@ void Engine::perform_daily_cycle(int interactions_per_day) {
                     process_refusal(i, target);
                     last_day_interactions.push_back({i, target, 0}); // 0: refusal
                 } else {
-                    int sigma = ((rand() % 100) < 50) ? 1 : -1;
+                    int sigma = ((next_rand() % 100) < 50) ? 1 : -1;
                     process_interaction(i, target, sigma);
                     last_day_interactions.push_back({i, target, sigma}); // 1: success, -1: fail
                 }
@@ -412,8 +412,30 @@ void Engine::perform_daily_cycle(int interactions_per_day) {
     }
 }
 
+std::vector<int> Engine::get_primary_emotions(const std::vector<int>& indices) const {
+    std::vector<int> result;
+    result.reserve(indices.size() * 2);
+
+    for (int idx : indices) {
+        int primary_axis = -1;
+        int max_abs = 0;
+        int offset = idx * SimulationState::NUM_AXES;
+        for (int a = 0; a < SimulationState::NUM_AXES; ++a) {
+            int v = std::abs(state.emotions[offset + a]);
+            if (v > max_abs) {
+                max_abs = v;
+                primary_axis = a;
+            }
+        }
+        result.push_back(primary_axis);
+        result.push_back(primary_axis >= 0 ? state.emotions[offset + primary_axis] : 0);
+    }
+    return result;
+}
+
 void Engine::seed(int s) {
-    srand(s);
+    if (private_rng) rng.seed(s);
+    else srand(s);
 }
 
 } // namespace core_engine
@@ -3,6 +3,8 @@
 
 #include <vector>
 #include <string>
+#include <random>
+#include <cstdlib>
 #include "logger.hpp"
 
 namespace core_engine {
@@ -92,6 +94,16 @@ public:
         state.agent_archetypes[agent_idx] = arch_idx;
     }
 
+    // Точечный доступ для GUI: строка отношений одного агента (N x 3) без копирования всей матрицы
+    std::vector<int> get_relation_row(int agent_idx) const {
+        auto first = state.relations.begin() + (size_t)agent_idx * num_agents * 3;
+        return std::vector<int>(first, first + (size_t)num_agents * 3);
+    }
+
+    // Доминирующие эмоции подмножества агентов: плоский список [axis, value, axis, value, ...]
+    // (axis = -1 для нейтрального состояния)
+    std::vector<int> get_primary_emotions(const std::vector<int>& indices) const;
+
     // Тот самый N^2 метод
     void influence_emotions();
 
@@ -110,6 +122,13 @@ public:
     void perform_daily_cycle(int interactions_per_day);
     void seed(int s);
 
+    // Собственный поток случайных чисел (реплики ансамбля считаются параллельно,
+    // глобальный rand() для них не годится). По умолчанию ядро использует rand()/srand().
+    void use_private_rng(unsigned int s) {
+        private_rng = true;
+        rng.seed(s);
+    }
+
     void set_agent_names(const std::vector<std::string>& names) {
         agent_names = names;
     }
@@ -129,8 +148,14 @@ public:
     SimulationState state;
     std::vector<Interaction> last_day_interactions;
 private:
+    int next_rand() {
+        return private_rng ? (int)(rng() % ((unsigned int)RAND_MAX + 1u)) : rand();
+    }
+
     int num_agents;
     std::vector<std::string> agent_names;
+    bool private_rng = false;
+    std::mt19937 rng;
 };
 
 } // namespace core_engine
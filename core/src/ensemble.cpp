@@ -0,0 +1,109 @@
+#include "ensemble.hpp"
+#include <algorithm>
+#include <cmath>
+#include <stdexcept>
+#ifdef _OPENMP
+#include <omp.h>
+#endif
+
+namespace core_engine {
+
+EnsembleEngine::EnsembleEngine(int num_replicas, int num_agents) : agents(num_agents) {
+    if (num_replicas < 1) throw std::invalid_argument("num_replicas must be >= 1");
+    replicas.reserve(num_replicas);
+    for (int r = 0; r < num_replicas; ++r) {
+        replicas.emplace_back(num_agents);
+        replicas.back().use_private_rng((unsigned int)r);
+    }
+}
+
+void EnsembleEngine::set_archetype_config(int arch_idx, float refusal, float decay, float temp,
+                                          float e_decay, int refusal_vuln, const std::vector<float>& e_coeffs,
+                                          const std::string& sa, const std::string& su, const std::string& st) {
+    for (auto& engine : replicas) {
+        engine.set_archetype_config(arch_idx, refusal, decay, temp, e_decay, refusal_vuln, e_coeffs, sa, su, st);
+    }
+}
+
+void EnsembleEngine::set_agent_archetype(int agent_idx, int arch_idx) {
+    for (auto& engine : replicas) engine.set_agent_archetype(agent_idx, arch_idx);
+}
+
+void EnsembleEngine::set_sensitivities(const std::vector<float>& values) {
+    if ((int)values.size() != agents) throw std::invalid_argument("sensitivities size mismatch");
+    for (auto& engine : replicas) engine.state.sensitivities = values;
+}
+
+void EnsembleEngine::set_emission_weights(const std::vector<float>& values) {
+    if (values.size() != replicas[0].state.emission_weights.size())
+        throw std::invalid_argument("emission weights size mismatch");
+    for (auto& engine : replicas) engine.state.emission_weights = values;
+}
+
+void EnsembleEngine::seed(int base_seed) {
+    for (int r = 0; r < num_replicas(); ++r) {
+        std::seed_seq seq{(unsigned int)base_seed, (unsigned int)r};
+        std::vector<unsigned int> key(1);
+        seq.generate(key.begin(), key.end());
+        replicas[r].seed((int)key[0]);
+    }
+}
+
+void EnsembleEngine::perform_daily_cycle(int interactions_per_day) {
+    const int r_count = num_replicas();
+    bool across_replicas = r_count > 1;
+#ifdef _OPENMP
+    across_replicas = r_count >= omp_get_max_threads();
+#endif
+    #pragma omp parallel for schedule(dynamic) if(across_replicas)
+    for (int r = 0; r < r_count; ++r) {
+        replicas[r].perform_daily_cycle(interactions_per_day);
+    }
+}
+
+EnsembleSummary EnsembleEngine::summary() const {
+    const int r_count = num_replicas();
+    const int axes = SimulationState::NUM_AXES;
+    EnsembleSummary out;
+    out.emotion_mean.assign(r_count * axes, 0.0f);
+    out.emotion_std.assign(r_count * axes, 0.0f);
+    out.relation_mean.assign(r_count * 3, 0.0f);
+    out.interactions.assign(r_count * 3, 0);
+
+    #pragma omp parallel for
+    for (int r = 0; r < r_count; ++r) {
+        const auto& st = replicas[r].state;
+        for (int a = 0; a < axes; ++a) {
+            double sum = 0.0, sq = 0.0;
+            for (int i = 0; i < agents; ++i) {
+                double v = st.emotions[i * axes + a];
+                sum += v;
+                sq += v * v;
+            }
+            double mean = agents > 0 ? sum / agents : 0.0;
+            double var = agents > 0 ? sq / agents - mean * mean : 0.0;
+            out.emotion_mean[r * axes + a] = (float)mean;
+            out.emotion_std[r * axes + a] = (float)std::sqrt(std::max(0.0, var));
+        }
+
+        double rel[3] = {0.0, 0.0, 0.0};
+        for (int i = 0; i < agents; ++i) {
+            for (int j = 0; j < agents; ++j) {
+                if (i == j) continue;
+                size_t base = ((size_t)i * agents + j) * 3;
+                for (int k = 0; k < 3; ++k) rel[k] += st.relations[base + k];
+            }
+        }
+        double pairs = (double)agents * (agents - 1);
+        for (int k = 0; k < 3; ++k) out.relation_mean[r * 3 + k] = pairs > 0 ? (float)(rel[k] / pairs) : 0.0f;
+
+        for (const auto& inter : replicas[r].last_day_interactions) {
+            if (inter.type == 1) out.interactions[r * 3 + 1]++;
+            else if (inter.type == 0) out.interactions[r * 3 + 0]++;
+            else out.interactions[r * 3 + 2]++;
+        }
+    }
+    return out;
+}
+
+} // namespace core_engine
@@ -0,0 +1,53 @@
+#ifndef ENSEMBLE_HPP
+#define ENSEMBLE_HPP
+
+#include <vector>
+#include <string>
+#include "engine.hpp"
+
+namespace core_engine {
+
+// Сводка по репликам после шага: средние/СКО эмоций, средние отношения, счетчики взаимодействий
+struct EnsembleSummary {
+    std::vector<float> emotion_mean;   // R x 7
+    std::vector<float> emotion_std;    // R x 7
+    std::vector<float> relation_mean;  // R x 3 (U, A, T), без диагонали
+    std::vector<int> interactions;     // R x 3 (отказ, успех, неудача)
+};
+
+// Ансамбль из R независимых реплик одной популяции (одинаковые N, архетипы, чувствительности),
+// которые продвигаются синхронно. Состояние реплики — эмоции (N x 7), отношения (N x N x 3)
+// и собственный поток случайных чисел; параметры популяции задаются один раз для всех реплик.
+class EnsembleEngine {
+public:
+    EnsembleEngine(int num_replicas, int num_agents);
+
+    int num_replicas() const { return (int)replicas.size(); }
+    int num_agents() const { return agents; }
+
+    // Параметры популяции (общие для всех реплик)
+    void set_archetype_config(int arch_idx, float refusal, float decay, float temp,
+                              float e_decay, int refusal_vuln, const std::vector<float>& e_coeffs,
+                              const std::string& sa, const std::string& su, const std::string& st);
+    void set_agent_archetype(int agent_idx, int arch_idx);
+    void set_sensitivities(const std::vector<float>& values);
+    void set_emission_weights(const std::vector<float>& values);
+
+    // Поток реплики r инициализируется из (base_seed, r) — реплики статистически независимы
+    void seed(int base_seed);
+
+    // Один день для всех реплик: параллельно по репликам, если их не меньше потоков OpenMP,
+    // иначе реплики идут по очереди, а параллелится N^2 цикл внутри реплики
+    void perform_daily_cycle(int interactions_per_day);
+
+    EnsembleSummary summary() const;
+
+    std::vector<Engine> replicas;
+
+private:
+    int agents;
+};
+
+} // namespace core_engine
+
+#endif
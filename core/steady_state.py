@@ -0,0 +1,84 @@
+from collections import deque
+import numpy as np
+
+# Параметры по умолчанию (ключ "steady_state" сценария; без ключа детектор выключен)
+DEFAULT_STEADY_STATE = {
+    "emotion_tolerance": 0.05,   # средний |ΔE| на агента и ось между сравниваемыми днями
+    "relation_tolerance": 0.05,  # средний |ΔR| на элемент матрицы отношений
+    "window": 21,                # столько дней подряд изменения должны быть в допуске
+    # Дней между сравниваемыми состояниями: университетская динамика периодична с недельным периодом
+    # (расписание, воскресенье); сравнение через три недели сглаживает различия отдельных недель
+    "lag": 21,
+    "action": "skip",            # "skip" — до следующего календарного события, "thin_logging" — реже логировать
+    "thin_factor": 10,           # во сколько раз реже логировать в стационарном режиме
+    "sample_pairs": 200_000,     # элементов матрицы отношений в выборке для оценки |ΔR|
+    "seed": 0,
+}
+
+ACTIONS = ("skip", "thin_logging")
+
+
+class SteadyStateDetector:
+    """
+    Онлайн-детектор стационарности: после каждого дня сравнивает эмоции (N, 7) и выборку
+    элементов матрицы отношений с состоянием lag дней назад (на периодической траектории
+    с периодом, кратным lag, изменение нулевое). Режим стационарен, если window дней подряд
+    средние изменения не превышают допусков. При смене состава (ротация) история сбрасывается.
+    """
+
+    def __init__(self, config: dict = None):
+        config = config or {}
+        unknown = set(config) - set(DEFAULT_STEADY_STATE)
+        if unknown:
+            raise ValueError(f"Неизвестные ключи steady_state: {sorted(unknown)}")
+        params = dict(DEFAULT_STEADY_STATE)
+        params.update(config)
+        if params["action"] not in ACTIONS:
+            raise ValueError(f"steady_state.action: ожидается одно из {ACTIONS}")
+        if int(params["window"]) < 1 or int(params["lag"]) < 1:
+            raise ValueError("steady_state.window и steady_state.lag должны быть >= 1")
+
+        self.emotion_tolerance = float(params["emotion_tolerance"])
+        self.relation_tolerance = float(params["relation_tolerance"])
+        self.window = int(params["window"])
+        self.lag = int(params["lag"])
+        self.action = params["action"]
+        self.thin_factor = max(1, int(params["thin_factor"]))
+        self.sample_pairs = int(params["sample_pairs"])
+        self._rng = np.random.default_rng(params["seed"])
+        self.reset()
+
+    def reset(self):
+        self._layout = None
+        self._sample = None
+        self._states = deque(maxlen=self.lag + 1)
+        self._norms = deque(maxlen=self.window)
+        self.stationary = False
+        self.last_norms = None
+
+    def update(self, emotions: np.ndarray, relations: np.ndarray, layout: dict) -> bool:
+        """Учитывает состояние на конец дня; возвращает признак стационарности."""
+        if layout != self._layout:
+            self.reset()
+            self._layout = dict(layout)
+            size = relations.size
+            # Выборка фиксируется на весь состав: оценка среднего |ΔR| без хранения lag копий матрицы
+            self._sample = None if size <= self.sample_pairs else self._rng.choice(size, self.sample_pairs, replace=False)
+
+        flat = relations.reshape(-1)
+        sampled = flat if self._sample is None else flat[self._sample]
+        self._states.append((emotions.astype(np.int16), sampled.astype(np.int16)))
+
+        if len(self._states) > self.lag:
+            old_emotions, old_relations = self._states[0]
+            new_emotions, new_relations = self._states[-1]
+            self.last_norms = (
+                float(np.abs(new_emotions - old_emotions).mean()) if new_emotions.size else 0.0,
+                float(np.abs(new_relations - old_relations).mean()) if new_relations.size else 0.0,
+            )
+            self._norms.append(self.last_norms)
+
+        self.stationary = len(self._norms) == self.window and all(
+            e <= self.emotion_tolerance and r <= self.relation_tolerance for e, r in self._norms
+        )
+        return self.stationary
@@ -0,0 +1,215 @@
+import os
+import json
+import glob
+import time
+import socket
+
+# Поток телеметрии расчетов: один JSON-lines файл на сценарий, одна строка на событие
+DEFAULT_TELEMETRY_DIR = os.path.join("data", "output", "telemetry")
+
+# События: started / day / semester / checkpoint / finished / failed
+RUNNING, FINISHED, FAILED, STALLED = "running", "finished", "failed", "stalled"
+
+# Окно (в днях) для оценки текущей скорости расчета
+RATE_WINDOW_DAYS = 20
+
+# Расчет другой машины (воркер общей очереди) считается зависшим, если событий нет дольше этого срока:
+# его процесс нельзя проверить локально
+STALL_AFTER_SECONDS = 600
+
+
+def telemetry_path_for(scenario_name: str, telemetry_dir: str = DEFAULT_TELEMETRY_DIR) -> str:
+    return os.path.join(telemetry_dir, f"{scenario_name}.jsonl")
+
+
+def rss_bytes() -> int:
+    """Текущий RSS процесса в байтах (/proc/self/statm, иначе пиковый ru_maxrss)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        return int(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss) * 1024
+    except ImportError:
+        return 0
+
+
+def sink_backlog(sink) -> dict:
+    """Очередь приемника логов: пакеты ClickHouse в очереди записи или строки в буферах RunStore."""
+    writer = getattr(sink, "writer", None)
+    if writer is not None:
+        return {
+            "queue": writer.pending(),
+            "written": writer.written_batches,
+            "dropped": writer.dropped_batches,
+            "spilled": writer.spilled_batches,
+            "failed": writer.failed_batches,
+        }
+    buffered = getattr(sink, "_buffered_rows", None)
+    if buffered is not None:
+        return {"buffered_rows": sum(buffered.values())}
+    return {}
+
+
+class TelemetryWriter:
+    """
+    Пишет события расчета в JSON-lines файл. Каждая строка дописывается целиком и сразу
+    сбрасывается на диск — читатели (агрегатор, бот) видят только завершенные события.
+    append=True — продолжение расчета с контрольной точки дописывает прежний файл.
+    """
+
+    def __init__(self, path: str, scenario_name: str, append: bool = False):
+        self.path = path
+        self.scenario_name = scenario_name
+        self.host = socket.gethostname()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "a" if append else "w", encoding="utf-8")
+
+    def emit(self, event: str, **fields):
+        record = {"time": time.time(), "event": event, "scenario": self.scenario_name,
+                  "host": self.host, "pid": os.getpid(), **fields}
+        self._file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+def read_events(path: str) -> list:
+    """Все события файла телеметрии; недописанная последняя строка пропускается."""
+    events = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.endswith("\n"):
+                break
+            try:
+                events.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return events
+
+
+class TelemetryFollower:
+    """Следит за каталогом телеметрии и отдает новые события всех расчетов (для ленты уведомлений)."""
+
+    def __init__(self, telemetry_dir: str = DEFAULT_TELEMETRY_DIR, from_start: bool = False):
+        self.telemetry_dir = telemetry_dir
+        self._offsets = {}
+        if not from_start:
+            for path in glob.glob(os.path.join(telemetry_dir, "*.jsonl")):
+                self._offsets[path] = os.path.getsize(path)
+
+    def poll(self) -> list:
+        events = []
+        for path in sorted(glob.glob(os.path.join(self.telemetry_dir, "*.jsonl"))):
+            offset = self._offsets.get(path, 0)
+            if os.path.getsize(path) < offset:
+                offset = 0 # Файл начат заново (расчет с нуля)
+            with open(path, "r", encoding="utf-8") as f:
+                f.seek(offset)
+                while True:
+                    line = f.readline()
+                    if not line.endswith("\n"):
+                        break
+                    offset = f.tell()
+                    try:
+                        events.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue
+            self._offsets[path] = offset
+        return events
+
+
+def _pid_alive(pid) -> bool:
+    try:
+        os.kill(int(pid), 0)
+        return True
+    except (ProcessLookupError, ValueError, TypeError):
+        return False
+    except PermissionError:
+        return True
+
+
+def run_summary(events: list, now: float = None) -> dict:
+    """
+    Текущее состояние одного расчета по его событиям: прогресс, скорость, память, очередь логов.
+    Пропавший процесс (STALLED) на этой машине определяется по PID, на другой — по возрасту последнего события.
+    """
+    summary = {"scenario": events[0]["scenario"] if events else None, "state": RUNNING, "day": 0,
+               "semesters": None, "target": None, "days_per_sec": None, "slots_per_sec": None,
+               "rss": None, "backlog": {}, "phases": {}, "elapsed": None, "error": None, "updated": None,
+               "host": events[-1].get("host") if events else None}
+    days = []
+    started = None
+    for event in events:
+        kind = event.get("event")
+        summary["updated"] = event.get("time")
+        if kind == "started":
+            summary["state"], started, days = RUNNING, event["time"], []
+        elif kind == "day":
+            days.append(event)
+        elif kind == "finished":
+            summary["state"] = FINISHED
+            summary["elapsed"] = event.get("elapsed")
+        elif kind == "failed":
+            summary["state"] = FAILED
+            summary["error"] = event.get("error")
+    if days:
+        last = days[-1]
+        for key in ("day", "semesters", "target", "rss"):
+            summary[key] = last.get(key)
+        summary["backlog"] = last.get("backlog") or {}
+        summary["phases"] = last.get("phases") or {}
+        window = days[-RATE_WINDOW_DAYS:]
+        span = window[-1]["time"] - window[0]["time"]
+        if len(window) > 1 and span > 0:
+            days_per_sec = (len(window) - 1) / span
+            summary["days_per_sec"] = days_per_sec
+            summary["slots_per_sec"] = days_per_sec * last.get("slots_per_day", 1)
+    if summary["state"] == RUNNING:
+        if started is not None:
+            summary["elapsed"] = (summary["updated"] or started) - started
+        latest = events[-1] if events else {}
+        host, pid = latest.get("host"), latest.get("pid")
+        if host in (None, socket.gethostname()):
+            if pid is not None and not _pid_alive(pid):
+                summary["state"] = STALLED # Процесс исчез без события finished/failed
+        elif (time.time() if now is None else now) - (summary["updated"] or 0) > STALL_AFTER_SECONDS:
+            summary["state"] = STALLED
+    return summary
+
+
+def summarize(telemetry_dir: str = DEFAULT_TELEMETRY_DIR) -> list:
+    """Сводка по всем расчетам каталога телеметрии, упорядоченная по сценарию."""
+    runs = []
+    for path in sorted(glob.glob(os.path.join(telemetry_dir, "*.jsonl"))):
+        events = read_events(path)
+        if events:
+            runs.append(run_summary(events))
+    return runs
+
+
+def format_summary(runs: list) -> str:
+    """Текстовая таблица сводки: по строке на расчет и итог по активным."""
+    if not runs:
+        return "Нет данных телеметрии."
+    lines = [f"{'Сценарий':<36} {'Состояние':<9} {'День':>5} {'Сем.':>5} {'Дн/с':>6} {'Слот/с':>7} {'RSS МБ':>7} {'Очередь':>8}"]
+    active = [r for r in runs if r["state"] == RUNNING]
+    for r in runs:
+        sem = f"{r['semesters']}/{r['target']}" if r["target"] is not None else "-"
+        dps = f"{r['days_per_sec']:.2f}" if r["days_per_sec"] else "-"
+        sps = f"{r['slots_per_sec']:.1f}" if r["slots_per_sec"] else "-"
+        rss = f"{r['rss'] / 2**20:.0f}" if r["rss"] else "-"
+        backlog = r["backlog"]
+        queue = backlog.get("queue", backlog.get("buffered_rows", "-"))
+        lines.append(f"{r['scenario']:<36} {r['state']:<9} {r['day']:>5} {sem:>5} {dps:>6} {sps:>7} {rss:>7} {queue:>8}")
+    total_rss = sum(r["rss"] or 0 for r in active)
+    total_sps = sum(r["slots_per_sec"] or 0 for r in active)
+    counts = {}
+    for r in runs:
+        counts[r["state"]] = counts.get(r["state"], 0) + 1
+    lines.append(f"Итого: {counts}; активные — {total_sps:.1f} слот/с, {total_rss / 2**20:.0f} МБ RSS")
+    return "\n".join(lines)
@@ -1,10 +1,33 @@
 import random
 import math
 from typing import List, Dict
+import numpy as np
 from core.agent_factory import AgentFactory
 from model.constants import SportType, AgentStatus
 from model.agent import Agent
 
+class SeatGrid:
+    """
+    Геометрия сетки мест capacity x cols: 4-соседи каждого места (слева, справа, сверху, снизу;
+    -1 — соседа нет) и номер кластера спортзала по колонке (три секции по ширине).
+    """
+
+    def __init__(self, capacity: int, cols: int):
+        self.capacity = capacity
+        self.cols = cols
+        idx = np.arange(capacity)
+        col = idx % cols
+        self.neighbors = np.stack([
+            np.where(col > 0, idx - 1, -1),
+            np.where((col < cols - 1) & (idx + 1 < capacity), idx + 1, -1),
+            np.where(idx >= cols, idx - cols, -1),
+            np.where(idx + cols < capacity, idx + cols, -1),
+        ], axis=1).astype(np.int32)
+        self.gym_clusters = (col / (cols / 3.0)).astype(np.int8)
+        # Списки соседей без заполнителей — для поштучных проходов по местам
+        self.neighbor_lists = [[n for n in row if n >= 0] for row in self.neighbors.tolist()]
+
+
 class UniversityManager:
     """Управляющий структурой и логикой университета."""
     
@@ -53,9 +76,69 @@ class UniversityManager:
         if rtype in ["CORRIDOR", "GYM"]: return 42
         return 6
 
+    def seat_grid(self, capacity: int, cols: int) -> "SeatGrid":
+        """Сетка мест (соседи, кластеры спортзала); одна на пару (вместимость, число колонок)."""
+        grids = getattr(self, '_seat_grids', None)
+        if grids is None:
+            grids = self._seat_grids = {}
+        key = (capacity, cols)
+        if key not in grids:
+            grids[key] = SeatGrid(capacity, cols)
+        return grids[key]
+
+    def room_grid(self, room_id: str) -> "SeatGrid":
+        return self.seat_grid(self.rooms_info[room_id]["capacity"], self.get_room_cols(room_id))
+
+    def room_zones(self, room_id: str) -> list:
+        """
+        Независимые зоны большого зала: список (индексы мест зоны в сетке зала, число колонок зоны).
+        Холл делится на крылья факультетов (полосы рядов), спортзал — на три секции по спортивности
+        (полосы колонок, как у фильтра рассадки). Места зоны перечислены построчно в пределах зоны;
+        зоны покрывают все места зала (неполный последний ряд входит в последнюю полосу / свои секции).
+        """
+        zones = getattr(self, '_room_zones', None)
+        if zones is None:
+            zones = self._room_zones = {}
+        if room_id not in zones:
+            cols = self.get_room_cols(room_id)
+            rows = self.rooms_info[room_id]["capacity"] // cols
+            if room_id == "CORRIDOR":
+                band = rows // len(self.FACULTY_NAMES)
+                capacity = self.rooms_info[room_id]["capacity"]
+                last = len(self.FACULTY_NAMES) - 1
+                zones[room_id] = [
+                    (np.arange(k * band * cols, capacity if k == last else (k + 1) * band * cols), cols)
+                    for k in range(last + 1)
+                ]
+            else:
+                clusters = self.room_grid(room_id).gym_clusters
+                zones[room_id] = [
+                    (np.flatnonzero(clusters == k), int(np.count_nonzero(clusters[:cols] == k))) for k in range(3)
+                ]
+        return zones[room_id]
+
+    def seat_coordinates(self, room_id: str) -> np.ndarray:
+        """Координаты всех мест аудитории [capacity, 2] для GUI (вычисляются один раз на аудиторию)."""
+        coords = getattr(self, '_seat_coords', None)
+        if coords is None:
+            coords = self._seat_coords = {}
+        if room_id not in coords:
+            info = self.rooms_info[room_id]
+            coords[room_id] = np.array(
+                [self._compute_seat_coordinates(room_id, s_idx) for s_idx in range(info["capacity"])], dtype=np.float64
+            ).reshape(-1, 2)
+        return coords[room_id]
+
     def get_seat_coordinates(self, room_id, s_idx):
         info = self.rooms_info.get(room_id)
         if not info: return 0, 0
+        if 0 <= s_idx < info["capacity"]:
+            rx, ry = self.seat_coordinates(room_id)[s_idx]
+            return float(rx), float(ry)
+        return self._compute_seat_coordinates(room_id, s_idx)
+
+    def _compute_seat_coordinates(self, room_id, s_idx):
+        info = self.rooms_info[room_id]
         cols = self.get_room_cols(room_id)
         mx, my = 35, 45 
         step_x = (info["width"] - 2*mx) / (cols - 1) if cols > 1 else 0
@@ -119,6 +202,45 @@ class UniversityManager:
                     group_schedule[day] = pairs
                 self.schedules[group_id] = group_schedule
 
+        self.compile_schedules()
+
+    def compile_schedules(self):
+        """
+        Компилирует расписание в целочисленный тензор [группа, день недели, пара] -> индекс аудитории
+        (-1 — окно или выходной) и маску «после этой пары есть еще занятия».
+        Последняя строка тензора — группа без расписания (все пары пустые).
+        """
+        self.room_ids = list(self.rooms_info)
+        self.room_index = {room_id: i for i, room_id in enumerate(self.room_ids)}
+        self.group_index = {group_id: g for g, group_id in enumerate(self.schedules)}
+
+        n_groups = len(self.schedules)
+        tensor = np.full((n_groups + 1, 7, 4), -1, dtype=np.int16)
+        for group_id, g in self.group_index.items():
+            for day, pairs in self.schedules[group_id].items():
+                for p, room_id in enumerate(pairs):
+                    if room_id != "EMPTY":
+                        tensor[g, day, p] = self.room_index[room_id]
+        self.schedule_tensor = tensor
+
+        # Есть ли занятие строго позже пары p: обратная накопленная дизъюнкция со сдвигом на одну пару
+        busy = tensor >= 0
+        later = np.zeros_like(busy)
+        later[:, :, :-1] = np.logical_or.accumulate(busy[:, :, :0:-1], axis=2)[:, :, ::-1]
+        self.has_later_class = later
+
+    def compiled_schedule(self):
+        """Тензор расписания и маска последующих занятий (компилируются при первом обращении)."""
+        if getattr(self, 'schedule_tensor', None) is None:
+            self.compile_schedules() # Менеджер из старой контрольной точки
+        return self.schedule_tensor, self.has_later_class
+
+    def group_indices(self, group_ids) -> np.ndarray:
+        """Строки тензора расписания для групп; группы без расписания — последняя (пустая) строка."""
+        self.compiled_schedule()
+        missing = len(self.group_index)
+        return np.fromiter((self.group_index.get(g, missing) for g in group_ids), dtype=np.intp, count=len(group_ids))
+
     def get_group_schedule(self, group_id, day_idx):
         return getattr(self, 'schedules', {}).get(group_id, {}).get(day_idx, [])
 
@@ -126,13 +248,14 @@ class UniversityManager:
         return list(getattr(self, 'schedules', {}).keys())
 
     def create_new_cohort(self, academic_year, master_filled_counts=None, bachelor_weights=None, master_weights=None) -> List[Agent]:
-        from model.archetypes import ArchetypeEnum
-        agents = []
+        """
+        Генерирует новый набор (1 курс бакалавриата + добор магистратуры) пакетно:
+        архетипы, имена, чувствительность и поведенческие параметры сэмплируются массивами NumPy.
+        """
         master_filled = master_filled_counts or {}
-        b_weights = bachelor_weights or {}
-        m_weights = master_weights or {}
         
-        # 1. Новые бакалавры (1 курс)
+        # 1. Слоты нового набора: (agent_id, факультет, поток, группа, тип обучения)
+        slots = []
         year_suffix = str(academic_year)[2:]
         for f in range(self.faculties_count):
             f_name = self.FACULTY_NAMES[f]
@@ -140,32 +263,63 @@ class UniversityManager:
             for g in range(self.groups_per_stream):
                 group_id = f"{f_name}-{year_suffix}-{g+1}"
                 for i in range(25):
-                    agent_id = f"S-{group_id}-{i+1:02d}"
-                    arch = self._pick_archetype(b_weights)
-                    agent = AgentFactory.create_agent(self._generate_human_name(), archetype_enum=arch, agent_id=agent_id)
-                    agent.set_university_info(f_name, f"{f_name}-{year_suffix}", group_id)
-                    agent.course_year = 1
-                    agent.enrollment_year = academic_year
-                    agents.append(agent)
+                    slots.append((f"S-{group_id}-{i+1:02d}", f_name, f"{f_name}-{year_suffix}", group_id, "BACHELOR"))
+        n_bac = len(slots)
                     
         # 2. Новые магистры (1 курс)
         for m_idx, m_name in enumerate(self.MASTER_FACULTIES):
             group_id = f"{m_name}-M1-1"
             already_filled = master_filled.get(group_id, 0)
             to_add = max(0, 15 - already_filled)
+            parent_faculty = self.FACULTY_NAMES[m_idx % len(self.FACULTY_NAMES)]
             for i in range(to_add):
-                agent_id = f"M-{group_id}-{already_filled + i + 1:02d}"
-                arch = self._pick_archetype(m_weights)
-                agent = AgentFactory.create_agent(self._generate_human_name(), archetype_enum=arch, agent_id=agent_id)
-                agent.degree_type = "MASTER"
-                agent.course_year = 1
-                agent.enrollment_year = academic_year
-                parent_faculty = self.FACULTY_NAMES[m_idx % len(self.FACULTY_NAMES)]
-                agent.set_university_info(parent_faculty, f"{m_name}-M1", group_id)
-                agents.append(agent)
+                slots.append((f"M-{group_id}-{already_filled + i + 1:02d}", parent_faculty, f"{m_name}-M1", group_id, "MASTER"))
+        
+        n = len(slots)
+        if n == 0:
+            return []
+            
+        archetypes = self._sample_archetypes(bachelor_weights, n_bac) + self._sample_archetypes(master_weights, n - n_bac)
+        
+        agents = AgentFactory.create_cohort(
+            names=self._generate_human_names(n),
+            archetypes=archetypes,
+            agent_ids=[slot[0] for slot in slots],
+            sensitivities=np.random.uniform(0.1, 3.0, n),
+            sportiness=np.random.uniform(0, 1, n),
+            skip_tendency=np.random.uniform(0, 0.3, n)
+        )
+        for agent, (_, faculty, stream, group_id, degree_type) in zip(agents, slots):
+            agent.set_university_info(faculty, stream, group_id)
+            agent.degree_type = degree_type
+            agent.course_year = 1
+            agent.enrollment_year = academic_year
                 
         return agents
 
+    def _sample_archetypes(self, weights, k):
+        """Векторизованный аналог _pick_archetype: k архетипов одним вызовом np.random.choice."""
+        from model.archetypes import ArchetypeEnum
+        arch_list = list(ArchetypeEnum)
+        if k <= 0:
+            return []
+            
+        probs = None
+        if isinstance(weights, list):
+            probs = np.asarray(weights, dtype=float)
+        elif weights:
+            probs = np.zeros(len(arch_list))
+            for arch_name, w in weights.items():
+                idx = next((i for i, a in enumerate(arch_list) if a.name == arch_name), None)
+                if idx is not None:
+                    probs[idx] += w
+                    
+        if probs is None or probs.sum() <= 0:
+            indices = np.random.randint(0, len(arch_list), size=k)
+        else:
+            indices = np.random.choice(len(arch_list), size=k, p=probs / probs.sum())
+        return [arch_list[i] for i in indices]
+
     def _pick_archetype(self, weights):
         from model.archetypes import ArchetypeEnum
         arch_list = list(ArchetypeEnum)
@@ -187,6 +341,19 @@ class UniversityManager:
             arch_name = random.choices(choices, weights=probs, k=1)[0]
             return next(a for a in arch_list if a.name == arch_name)
 
+    def _generate_human_names(self, k: int) -> List[str]:
+        """Пакетная генерация k имен (пол, имя и фамилия сэмплируются массивами)."""
+        is_male = np.random.random(k) < 0.5
+        first_m = np.random.randint(0, len(self.NAMES_M), size=k)
+        last_m = np.random.randint(0, len(self.SURNAMES_M), size=k)
+        first_f = np.random.randint(0, len(self.NAMES_F), size=k)
+        last_f = np.random.randint(0, len(self.SURNAMES_F), size=k)
+        return [
+            f"{self.NAMES_M[first_m[i]]} {self.SURNAMES_M[last_m[i]]}" if is_male[i]
+            else f"{self.NAMES_F[first_f[i]]} {self.SURNAMES_F[last_f[i]]}"
+            for i in range(k)
+        ]
+
     def _generate_human_name(self) -> str:
         if random.random() < 0.5:
             return f"{random.choice(self.NAMES_M)} {random.choice(self.SURNAMES_M)}"
@@ -0,0 +1,111 @@
+import os
+import json
+import pickle
+import random
+import hashlib
+import shutil
+import datetime
+import numpy as np
+
+# Версия формата снимка мира (меняется при несовместимых изменениях состава)
+SNAPSHOT_VERSION = 1
+DEFAULT_SNAPSHOT_DIR = os.path.join("data", "output", "world_snapshots")
+
+# Поля сценария, от которых зависит начальный университет (расписания, агенты, отношения)
+WORLD_KEYS = ("bachelor_counts", "master_counts", "initial_relations_mode",
+              "total_bac", "total_mag", "start_year", "master_chance")
+
+WORLD_FILE = "world.pkl"
+RELATIONS_FILE = "relations.npy"
+
+
+def world_key(config: dict, seed=None) -> str:
+    """Ключ начального мира: поля WORLD_KEYS сценария и сид (семестры, логирование и подписи не влияют)."""
+    payload = {
+        "world": {k: config.get(k) for k in WORLD_KEYS},
+        "seed": config.get("seed") if seed is None else seed,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def snapshot_path_for(config: dict, seed=None, snapshot_dir: str = DEFAULT_SNAPSHOT_DIR) -> str:
+    return os.path.join(snapshot_dir, world_key(config, seed))
+
+
+def save_world(collective, path: str):
+    """
+    Сохраняет только что построенный университет: коллектив (агенты, расписания UniversityManager,
+    группы) в world.pkl и матрицу отношений (N, N, 3) в relations.npy — ее читают через memory map.
+    Состояние генераторов random/NumPy сохраняется, чтобы расчет со снимка совпадал с расчетом с нуля.
+    Каталог снимка появляется атомарно: параллельные воркеры не видят недописанных файлов.
+    """
+    # Словари отношений агентов сворачиваются в матрицу один раз — здесь, а не в каждом расчете
+    collective._update_id_maps()
+    engine, relations = collective.cpp_engine, collective.relations_matrix
+
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    os.makedirs(tmp_path, exist_ok=True)
+    np.save(os.path.join(tmp_path, RELATIONS_FILE), relations)
+
+    # Ядро (pybind11) не сериализуется, матрица лежит отдельно
+    collective.cpp_engine = None
+    del collective.relations_matrix
+    try:
+        state = {
+            "version": SNAPSHOT_VERSION,
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+            "random_state": random.getstate(),
+            "numpy_random_state": np.random.get_state(),
+            "collective": collective,
+        }
+        with open(os.path.join(tmp_path, WORLD_FILE), "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    finally:
+        collective.cpp_engine = engine
+        collective.relations_matrix = relations
+
+    try:
+        os.rename(tmp_path, path)
+    except OSError:
+        # Снимок уже построен другим процессом
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+
+def load_world(path: str, config: dict):
+    """
+    Открывает снимок мира. Матрица отношений отображается в память с копированием при записи:
+    воркеры делят страницы файла, пока не изменят их. config заменяет сценарий снимка
+    (семестры, логирование и подписи запуска могут отличаться).
+    """
+    with open(os.path.join(path, WORLD_FILE), "rb") as f:
+        state = pickle.load(f)
+    if state.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"{path}: неподдерживаемая версия снимка мира {state.get('version')}")
+
+    collective = state["collective"]
+    collective.relations_matrix = np.asarray(np.load(os.path.join(path, RELATIONS_FILE), mmap_mode="c"))
+    collective.config = config
+
+    random.setstate(state["random_state"])
+    np.random.set_state(state["numpy_random_state"])
+    return collective
+
+
+def warm_start_university(config: dict, seed=None, snapshot_dir: str = DEFAULT_SNAPSHOT_DIR):
+    """
+    Начальный университет сценария: из снимка, если мир с теми же параметрами уже строился,
+    иначе строится с нуля и сохраняется для следующих расчетов.
+    """
+    from model.university_collective import UniversityCollective
+
+    seed = config.get("seed") if seed is None else seed
+    path = snapshot_path_for(config, seed, snapshot_dir)
+    if os.path.exists(os.path.join(path, WORLD_FILE)):
+        collective = load_world(path, config)
+        print(f"[System] Мир загружен из снимка {path}", flush=True)
+        return collective
+
+    collective = UniversityCollective(seed=seed, config=config)
+    save_world(collective, path)
+    print(f"[System] Снимок мира сохранен: {path}", flush=True)
+    return collective
@@ -11,7 +11,8 @@ CREATE TABLE IF NOT EXISTS agent_states (
     disgust_acceptance Int8 Codec(ZSTD(1)), -- Отвращение (-30), Принятие (+30)
     habit_surprise Int8 Codec(ZSTD(1)),   -- Привычка (-30), Удивление (+30)
     shame_confidence Int8 Codec(ZSTD(1)), -- Стыд (-30), Уверенность (+30)
-    alienation_openness Int8 Codec(ZSTD(1)) -- Отчужденность (-30), Открытость (+30)
+    alienation_openness Int8 Codec(ZSTD(1)), -- Отчужденность (-30), Открытость (+30)
+    layout UInt32 DEFAULT 0 Codec(DoubleDelta) -- Раскладка индексов агентов (см. agent_registry)
 ) ENGINE = MergeTree()
 ORDER BY (run_id, day_id, slot_id, agent_id);
 
@@ -25,11 +26,56 @@ CREATE TABLE IF NOT EXISTS agent_relations (
     
     utility Int8 Codec(ZSTD(1)),
     affinity Int8 Codec(ZSTD(1)),
-    trust Int8 Codec(ZSTD(1))
+    trust Int8 Codec(ZSTD(1)),
+    layout UInt32 DEFAULT 0 Codec(DoubleDelta)
 ) ENGINE = MergeTree()
 ORDER BY (run_id, day_id, slot_id, subject_id, object_id)
 SETTINGS index_granularity = 8192;
 
+-- Таблица 2б: Дельты отношений между ключевыми кадрами (только изменившиеся ячейки)
+-- Полные снимки (ключевые кадры) по-прежнему пишутся в agent_relations
+CREATE TABLE IF NOT EXISTS agent_relations_delta (
+    run_id UUID Codec(ZSTD(3)),
+    day_id UInt32 Codec(DoubleDelta),
+    slot_id UInt8 Codec(DoubleDelta),
+    subject_id UInt32,
+    object_id UInt32,
+    
+    utility Int8 Codec(ZSTD(1)),
+    affinity Int8 Codec(ZSTD(1)),
+    trust Int8 Codec(ZSTD(1)),
+    layout UInt32 DEFAULT 0 Codec(DoubleDelta)
+) ENGINE = MergeTree()
+ORDER BY (run_id, subject_id, object_id, day_id, slot_id);
+
+-- Восстановление матрицы отношений на момент (run, day, slot):
+-- последний ключевой кадр не позже момента + все дельты после него, побеждает самая поздняя запись.
+-- SELECT * FROM agent_relations_at(run_id = '...', day_id = 30, slot_id = 9)
+CREATE VIEW IF NOT EXISTS agent_relations_at AS
+WITH (
+    SELECT max((day_id, slot_id))
+    FROM agent_relations
+    WHERE run_id = {run_id:UUID} AND (day_id, slot_id) <= ({day_id:UInt32}, {slot_id:UInt8})
+) AS keyframe
+SELECT
+    subject_id,
+    object_id,
+    argMax(utility, version) AS utility,
+    argMax(affinity, version) AS affinity,
+    argMax(trust, version) AS trust
+FROM (
+    SELECT subject_id, object_id, utility, affinity, trust, (day_id, slot_id) AS version
+    FROM agent_relations
+    WHERE run_id = {run_id:UUID} AND (day_id, slot_id) = keyframe
+    UNION ALL
+    SELECT subject_id, object_id, utility, affinity, trust, (day_id, slot_id) AS version
+    FROM agent_relations_delta
+    WHERE run_id = {run_id:UUID}
+      AND (day_id, slot_id) > keyframe
+      AND (day_id, slot_id) <= ({day_id:UInt32}, {slot_id:UInt8})
+)
+GROUP BY subject_id, object_id;
+
 -- Таблица 3: Лог событий
 CREATE TABLE IF NOT EXISTS interactions (
     run_id UUID Codec(ZSTD(3)),
@@ -38,20 +84,73 @@ CREATE TABLE IF NOT EXISTS interactions (
     from_id UInt32,
     to_id UInt32,
     
-    type Int8 Codec(ZSTD(1))               -- -1 (Fail), 0 (Refusal), 1 (Success)
+    type Int8 Codec(ZSTD(1)),              -- -1 (Fail), 0 (Refusal), 1 (Success)
+    layout UInt32 DEFAULT 0 Codec(DoubleDelta)
 ) ENGINE = MergeTree()
 ORDER BY (run_id, day_id, slot_id, from_id);
 
+-- Таблицы 3б: Агрегаты за слот (режим aggregate_only политики логирования)
+CREATE TABLE IF NOT EXISTS agent_states_agg (
+    run_id UUID Codec(ZSTD(3)),
+    day_id UInt32 Codec(DoubleDelta),
+    slot_id UInt8 Codec(DoubleDelta),
+    agents UInt32,                       -- Число агентов в агрегате (вся популяция или панель)
+    
+    sadness_joy Float32,                 -- Средние значения осей
+    fear_calm Float32,
+    anger_humility Float32,
+    disgust_acceptance Float32,
+    habit_surprise Float32,
+    shame_confidence Float32,
+    alienation_openness Float32
+) ENGINE = MergeTree()
+ORDER BY (run_id, day_id, slot_id);
+
+CREATE TABLE IF NOT EXISTS interactions_agg (
+    run_id UUID Codec(ZSTD(3)),
+    day_id UInt32 Codec(DoubleDelta),
+    slot_id UInt8 Codec(DoubleDelta),
+    type Int8,                           -- -1 (Fail), 0 (Refusal), 1 (Success)
+    count UInt32
+) ENGINE = MergeTree()
+ORDER BY (run_id, day_id, slot_id, type);
+
 -- Таблица 4: Реестр агентов (Справочник)
+-- Числовые ID — индексы ядра, которые перестраиваются при смене состава (выпуск, набор):
+-- реестр пишется заново под следующим номером раскладки layout, строки остальных таблиц
+-- сопоставляются реестру по (run_id, layout, agent_id)
 CREATE TABLE IF NOT EXISTS agent_registry (
     run_id UUID Codec(ZSTD(3)),          -- ID сценария
+    layout UInt32 DEFAULT 0,             -- Номер раскладки индексов
     agent_id UInt32,                     -- Числовой ID агента (используется в симуляции)
     string_id String,                    -- Уникальный строковой ID (например S-П-22-1-03)
     name String,                         -- Имя агента
     group_id String,                     -- ID группы
     archetype String                     -- Архетип
 ) ENGINE = MergeTree()
-ORDER BY (run_id, agent_id);
+ORDER BY (run_id, layout, agent_id);
+
+-- Миграция для баз, созданных до раскладок индексов
+ALTER TABLE agent_states ADD COLUMN IF NOT EXISTS layout UInt32 DEFAULT 0 Codec(DoubleDelta);
+ALTER TABLE agent_relations ADD COLUMN IF NOT EXISTS layout UInt32 DEFAULT 0 Codec(DoubleDelta);
+ALTER TABLE agent_relations_delta ADD COLUMN IF NOT EXISTS layout UInt32 DEFAULT 0 Codec(DoubleDelta);
+ALTER TABLE interactions ADD COLUMN IF NOT EXISTS layout UInt32 DEFAULT 0 Codec(DoubleDelta);
+ALTER TABLE agent_registry ADD COLUMN IF NOT EXISTS layout UInt32 DEFAULT 0 AFTER run_id;
+
+-- Таблица 4б: Ключевой поиск по реестру для материализованных представлений (в памяти, joinGet).
+-- Наполняется при вставке в agent_registry; повторная запись раскладки заменяет прежние строки.
+CREATE TABLE IF NOT EXISTS agent_registry_lookup (
+    run_id UUID,
+    layout UInt32,
+    agent_id UInt32,
+    group_id String,
+    archetype String
+) ENGINE = Join(ANY, LEFT, run_id, layout, agent_id)
+SETTINGS join_any_take_last_row = 1;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS agent_registry_lookup_mv TO agent_registry_lookup AS
+SELECT run_id, layout, agent_id, group_id, archetype
+FROM agent_registry;
 
 -- Таблица 5: Метаданные симуляций
 CREATE TABLE IF NOT EXISTS simulation_runs (
@@ -59,6 +158,159 @@ CREATE TABLE IF NOT EXISTS simulation_runs (
     start_time DateTime,
     run_name String,
     description String,
-    scenario_name String
+    scenario_name String,
+    logging_policy String DEFAULT ''    -- JSON политики логирования запуска
 ) ENGINE = MergeTree()
 ORDER BY (start_time, run_id);
+
+-- Миграция для баз, созданных до появления политики логирования
+ALTER TABLE simulation_runs ADD COLUMN IF NOT EXISTS logging_policy String DEFAULT '';
+
+-- =====================================================================
+-- Предагрегированные сводки (rollups) для мониторинга и анализа.
+-- Материализованные представления наполняются при вставке в сырые таблицы,
+-- поэтому запросы прогресса и трендов читают килобайты вместо полного сканирования.
+-- Для данных, записанных до создания представлений, см. блок BACKFILL в конце файла.
+-- =====================================================================
+
+-- Сводка 1: Прогресс запусков (последний записанный день и объем записей)
+CREATE TABLE IF NOT EXISTS run_progress (
+    run_id UUID,
+    max_day AggregateFunction(max, UInt32),
+    state_rows AggregateFunction(count)
+) ENGINE = AggregatingMergeTree()
+ORDER BY run_id;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS run_progress_from_states_mv TO run_progress AS
+SELECT run_id, maxState(day_id) AS max_day, countState() AS state_rows
+FROM agent_states
+GROUP BY run_id;
+
+-- Запуски с политикой aggregate_only пишут только агрегаты состояний
+CREATE MATERIALIZED VIEW IF NOT EXISTS run_progress_from_states_agg_mv TO run_progress AS
+SELECT run_id, maxState(day_id) AS max_day, countState() AS state_rows
+FROM agent_states_agg
+GROUP BY run_id;
+
+-- Сводка 2: Дневные среднее и стандартное отклонение эмоций по архетипам и группам
+-- (архетип и группа — точечный поиск joinGet в agent_registry_lookup по раскладке строки;
+-- реестр раскладки пишется до первых состояний под ней)
+CREATE TABLE IF NOT EXISTS daily_emotions_by_archetype (
+    run_id UUID,
+    day_id UInt32,
+    archetype String,                      -- Архетип (локализованное имя из реестра)
+    sadness_joy_avg AggregateFunction(avg, Int8),
+    sadness_joy_std AggregateFunction(stddevPop, Int8),
+    fear_calm_avg AggregateFunction(avg, Int8),
+    fear_calm_std AggregateFunction(stddevPop, Int8),
+    anger_humility_avg AggregateFunction(avg, Int8),
+    anger_humility_std AggregateFunction(stddevPop, Int8),
+    disgust_acceptance_avg AggregateFunction(avg, Int8),
+    disgust_acceptance_std AggregateFunction(stddevPop, Int8),
+    habit_surprise_avg AggregateFunction(avg, Int8),
+    habit_surprise_std AggregateFunction(stddevPop, Int8),
+    shame_confidence_avg AggregateFunction(avg, Int8),
+    shame_confidence_std AggregateFunction(stddevPop, Int8),
+    alienation_openness_avg AggregateFunction(avg, Int8),
+    alienation_openness_std AggregateFunction(stddevPop, Int8)
+) ENGINE = AggregatingMergeTree()
+ORDER BY (run_id, day_id, archetype);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS daily_emotions_by_archetype_mv TO daily_emotions_by_archetype AS
+SELECT
+    s.run_id AS run_id,
+    s.day_id AS day_id,
+    joinGet('agent_registry_lookup', 'archetype', s.run_id, s.layout, s.agent_id) AS archetype,
+    avgState(s.sadness_joy) AS sadness_joy_avg,
+    stddevPopState(s.sadness_joy) AS sadness_joy_std,
+    avgState(s.fear_calm) AS fear_calm_avg,
+    stddevPopState(s.fear_calm) AS fear_calm_std,
+    avgState(s.anger_humility) AS anger_humility_avg,
+    stddevPopState(s.anger_humility) AS anger_humility_std,
+    avgState(s.disgust_acceptance) AS disgust_acceptance_avg,
+    stddevPopState(s.disgust_acceptance) AS disgust_acceptance_std,
+    avgState(s.habit_surprise) AS habit_surprise_avg,
+    stddevPopState(s.habit_surprise) AS habit_surprise_std,
+    avgState(s.shame_confidence) AS shame_confidence_avg,
+    stddevPopState(s.shame_confidence) AS shame_confidence_std,
+    avgState(s.alienation_openness) AS alienation_openness_avg,
+    stddevPopState(s.alienation_openness) AS alienation_openness_std
+FROM agent_states AS s
+GROUP BY run_id, day_id, archetype;
+
+CREATE TABLE IF NOT EXISTS daily_emotions_by_group (
+    run_id UUID,
+    day_id UInt32,
+    group_id String,                      -- ID группы из реестра
+    sadness_joy_avg AggregateFunction(avg, Int8),
+    sadness_joy_std AggregateFunction(stddevPop, Int8),
+    fear_calm_avg AggregateFunction(avg, Int8),
+    fear_calm_std AggregateFunction(stddevPop, Int8),
+    anger_humility_avg AggregateFunction(avg, Int8),
+    anger_humility_std AggregateFunction(stddevPop, Int8),
+    disgust_acceptance_avg AggregateFunction(avg, Int8),
+    disgust_acceptance_std AggregateFunction(stddevPop, Int8),
+    habit_surprise_avg AggregateFunction(avg, Int8),
+    habit_surprise_std AggregateFunction(stddevPop, Int8),
+    shame_confidence_avg AggregateFunction(avg, Int8),
+    shame_confidence_std AggregateFunction(stddevPop, Int8),
+    alienation_openness_avg AggregateFunction(avg, Int8),
+    alienation_openness_std AggregateFunction(stddevPop, Int8)
+) ENGINE = AggregatingMergeTree()
+ORDER BY (run_id, day_id, group_id);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS daily_emotions_by_group_mv TO daily_emotions_by_group AS
+SELECT
+    s.run_id AS run_id,
+    s.day_id AS day_id,
+    joinGet('agent_registry_lookup', 'group_id', s.run_id, s.layout, s.agent_id) AS group_id,
+    avgState(s.sadness_joy) AS sadness_joy_avg,
+    stddevPopState(s.sadness_joy) AS sadness_joy_std,
+    avgState(s.fear_calm) AS fear_calm_avg,
+    stddevPopState(s.fear_calm) AS fear_calm_std,
+    avgState(s.anger_humility) AS anger_humility_avg,
+    stddevPopState(s.anger_humility) AS anger_humility_std,
+    avgState(s.disgust_acceptance) AS disgust_acceptance_avg,
+    stddevPopState(s.disgust_acceptance) AS disgust_acceptance_std,
+    avgState(s.habit_surprise) AS habit_surprise_avg,
+    stddevPopState(s.habit_surprise) AS habit_surprise_std,
+    avgState(s.shame_confidence) AS shame_confidence_avg,
+    stddevPopState(s.shame_confidence) AS shame_confidence_std,
+    avgState(s.alienation_openness) AS alienation_openness_avg,
+    stddevPopState(s.alienation_openness) AS alienation_openness_std
+FROM agent_states AS s
+GROUP BY run_id, day_id, group_id;
+
+-- Сводка 3: Дневное число взаимодействий по типам
+CREATE TABLE IF NOT EXISTS daily_interactions (
+    run_id UUID,
+    day_id UInt32,
+    type Int8,                           -- -1 (Fail), 0 (Refusal), 1 (Success)
+    count UInt64
+) ENGINE = SummingMergeTree(count)
+ORDER BY (run_id, day_id, type);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS daily_interactions_mv TO daily_interactions AS
+SELECT run_id, day_id, type, count() AS count
+FROM interactions
+GROUP BY run_id, day_id, type;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS daily_interactions_from_agg_mv TO daily_interactions AS
+SELECT run_id, day_id, type, sum(count) AS count
+FROM interactions_agg
+GROUP BY run_id, day_id, type;
+
+-- Примеры чтения сводок (агрегатные состояния сворачиваются функциями -Merge):
+-- SELECT run_id, maxMerge(max_day) AS day FROM run_progress GROUP BY run_id;
+-- SELECT day_id, archetype, avgMerge(sadness_joy_avg) AS mean, stddevPopMerge(sadness_joy_std) AS std
+--   FROM daily_emotions_by_archetype WHERE run_id = '...' GROUP BY day_id, archetype ORDER BY day_id;
+-- SELECT day_id, type, sum(count) FROM daily_interactions WHERE run_id = '...' GROUP BY day_id, type;
+
+-- МИГРАЦИЯ представлений сводки 2 (созданных с LEFT JOIN по всему agent_registry), затем повторно применить скрипт:
+-- DROP VIEW IF EXISTS daily_emotions_by_archetype_mv;
+-- DROP VIEW IF EXISTS daily_emotions_by_group_mv;
+-- INSERT INTO agent_registry_lookup SELECT run_id, layout, agent_id, group_id, archetype FROM agent_registry;
+
+-- BACKFILL (однократно, для данных до появления сводок):
+-- INSERT INTO run_progress SELECT run_id, maxState(day_id), countState() FROM agent_states GROUP BY run_id;
+-- INSERT INTO daily_interactions SELECT run_id, day_id, type, count() FROM interactions GROUP BY run_id, day_id, type;
@@ -6,6 +6,8 @@ class AgentStateDialog:
     def __init__(self, parent, agent, collective):
         self.agent = agent
         self.collective = collective
+        # Строка отношений агента запрашивается из ядра один раз при открытии диалога
+        self.relation_row = collective.get_relation_row(agent.id) if hasattr(collective, 'get_relation_row') else None
         self.top = tk.Toplevel(parent)
         self.top.title(f"Агент: {agent.name}")
         self.top.geometry("600x650")
@@ -135,7 +137,12 @@ class AgentStateDialog:
         other = self.other_agent_var.get()
         if not other:
             return
-        rel = self.agent.relations.get(other, {})
+        other_idx = self.collective._id_map.get(other) if self.relation_row is not None else None
+        if other_idx is not None and other_idx < len(self.relation_row):
+            utility, affinity, trust = (int(v) for v in self.relation_row[other_idx])
+            rel = {'utility': utility, 'affinity': affinity, 'trust': trust}
+        else:
+            rel = self.agent.relations.get(other, {})
         self.trust_scale.set(rel.get('trust', 0))
         self.affinity_scale.set(rel.get('affinity', 0))
         self.utility_scale.set(rel.get('utility', 0))
@@ -149,16 +156,32 @@ class AgentStateDialog:
         for key, scale in self.emotion_vars.items():
             self.agent.automaton.set_emotion(key, scale.get())
 
+        # Новые эмоции сразу передаем в ядро, чтобы GUI, читающий из него, отобразил правку
+        engine = getattr(self.collective, 'cpp_engine', None)
+        agent_idx = self.collective._id_map.get(self.agent.id) if engine else None
+        if agent_idx is not None and agent_idx < engine.state.num_agents:
+            for axis_idx, value in enumerate(self.agent.get_emotions().values()):
+                engine.set_emotion(agent_idx, axis_idx, int(value))
+
         self.agent.sensitivity = self.sensitivity_scale.get() / 10.0
         self.agent.sportiness = self.sport_scale.get() / 100.0
         self.agent.skip_tendency = self.skip_scale.get() / 100.0
+        # Коллектив университета кэширует параметры посещаемости до изменения состава
+        invalidate_roster = getattr(self.collective, 'invalidate_roster', None)
+        if invalidate_roster:
+            invalidate_roster()
 
         other = self.other_agent_var.get()
         if other:
-            if other not in self.agent.relations:
-                self.agent.relations[other] = {}
-            self.agent.relations[other]['trust'] = self.trust_scale.get()
-            self.agent.relations[other]['affinity'] = self.affinity_scale.get()
-            self.agent.relations[other]['utility'] = self.utility_scale.get()
+            utility, affinity, trust = self.utility_scale.get(), self.affinity_scale.get(), self.trust_scale.get()
+            # Отношения, как и эмоции, сразу передаем в ядро: диалог читает их оттуда (get_relation_row)
+            other_idx = self.collective._id_map.get(other)
+            if agent_idx is not None and other_idx is not None and max(agent_idx, other_idx) < engine.state.num_agents:
+                engine.set_relation(agent_idx, other_idx, utility, affinity, trust)
+            # Python-копия: словарь агента, еще не попавшего в раскладку, или строка матрицы коллектива
+            if isinstance(self.agent.relations, dict):
+                self.agent.relations[other] = {'utility': utility, 'affinity': affinity, 'trust': trust}
+            elif other_idx is not None:
+                self.collective.relations_matrix[self.collective._id_map[self.agent.id], other_idx] = (utility, affinity, trust)
 
         self.top.destroy()
\ No newline at end of file
@@ -264,12 +264,11 @@ class SimulationGUI(tk.Tk):
                 edge = InteractionEdge(self.canvas, self.agent_nodes[agent_from], self.agent_nodes[agent_to], result)
                 self.edges.append(edge)
 
-        # Обновление цветов
-        for name, agent in self.session.collective.agents.items():
-            if name in self.agent_nodes:
-                emotion_name, _, value = agent.get_primary_emotion()
-                color = get_emotion_color(emotion_name, value)
-                self.agent_nodes[name].set_color(color)
+        # Обновление цветов (эмоции только для отображаемых узлов, одним запросом к ядру)
+        primary_emotions = self.session.collective.get_primary_emotions(self.agent_nodes.keys())
+        for name, (emotion_name, _, value) in primary_emotions.items():
+            color = get_emotion_color(emotion_name, value)
+            self.agent_nodes[name].set_color(color)
 
         self.date_label.config(text=f"Дата: {self.session.current_date.strftime('%d %b %Y')}")
         self.day_label.config(text=f"День симуляции: {self.session.current_step}")
@@ -67,7 +67,9 @@ class UniversityGUI(tk.Toplevel):
         self.h_scroll = tk.Scrollbar(self.canvas_frame, orient="horizontal", command=self.canvas.xview)
         self.v_scroll = tk.Scrollbar(self.canvas_frame, orient="vertical", command=self.canvas.yview)
         
-        self.canvas.configure(xscrollcommand=self.h_scroll.set, yscrollcommand=self.v_scroll.set)
+        # Отрисовываются только агенты во вьюпорте, поэтому любое смещение вида запускает перерисовку
+        self._viewport_job = None
+        self.canvas.configure(xscrollcommand=self._on_xview_changed, yscrollcommand=self._on_yview_changed)
         self.canvas.grid(row=0, column=0, sticky='nsew')
         self.v_scroll.grid(row=0, column=1, sticky='ns')
         self.h_scroll.grid(row=1, column=0, sticky='ew')
@@ -479,7 +481,17 @@ class UniversityGUI(tk.Toplevel):
         current_rooms = self.collective.current_rooms
         positions = {} # name -> (x, y) для отрисовки линий
         
-        # Обновляем точки агентов 
+        # Комната каждого агента за один проход (вместо поиска по всем комнатам для каждого)
+        room_of = {}
+        for r_id, students in current_rooms.items():
+            for student in students:
+                if student:
+                    room_of[student] = r_id
+        
+        r = NODE_RADIUS * self.zoom_level
+        x0, y0, x1, y1 = self._visible_region(margin=r)
+        
+        # Координаты агентов на кампусе; рисуем только попавших во вьюпорт
         for name, agent in self.collective.agents.items():
             if getattr(agent, 'status', None) == AgentStatus.HOME: continue
             
@@ -487,23 +499,21 @@ class UniversityGUI(tk.Toplevel):
             seat_idx = self.collective.agent_current_seat.get(name)
             if seat_idx is None: continue
             
-            # Определяем, в какой комнате должен быть агент
-            room_id = None
-            for r_id, students in current_rooms.items():
-                if name in students:
-                    room_id = r_id
-                    break
+            room_id = room_of.get(name)
             if not room_id: continue
                 
             campus_count += 1
             rx, ry = self.collective.uni_manager.get_seat_coordinates(room_id, seat_idx)
             x, y = rx * self.zoom_level, ry * self.zoom_level
-            positions[name] = (x, y)
-            
-            # Отрисовка
-            emotion_name, _, value = agent.get_primary_emotion()
+            if x0 <= x <= x1 and y0 <= y <= y1:
+                positions[name] = (x, y)
+        
+        # Эмоции запрашиваются из ядра только для видимых агентов
+        primary_emotions = self.collective.get_primary_emotions(positions.keys())
+        
+        for name, (x, y) in positions.items():
+            emotion_name, _, value = primary_emotions.get(name, (None, None, 0))
             color = get_emotion_color(emotion_name, value)
-            r = NODE_RADIUS * self.zoom_level
             
             dot_id = self.canvas.create_oval(
                 x - r, y - r, x + r, y + r,
@@ -534,6 +544,32 @@ class UniversityGUI(tk.Toplevel):
         # Обновление дешборда
         self.update_side_panel(campus_count, interactions_to_show)
 
+    def _visible_region(self, margin=0):
+        """Границы видимой области канваса (в координатах канваса)."""
+        x0 = self.canvas.canvasx(0) - margin
+        y0 = self.canvas.canvasy(0) - margin
+        x1 = self.canvas.canvasx(self.canvas.winfo_width()) + margin
+        y1 = self.canvas.canvasy(self.canvas.winfo_height()) + margin
+        return x0, y0, x1, y1
+
+    def _on_xview_changed(self, first, last):
+        self.h_scroll.set(first, last)
+        self._schedule_viewport_redraw()
+
+    def _on_yview_changed(self, first, last):
+        self.v_scroll.set(first, last)
+        self._schedule_viewport_redraw()
+
+    def _schedule_viewport_redraw(self):
+        """Перерисовка агентов после скролла/ресайза (с задержкой, чтобы не рисовать на каждый тик)."""
+        if self._viewport_job is not None:
+            self.after_cancel(self._viewport_job)
+        self._viewport_job = self.after(80, self._redraw_viewport)
+
+    def _redraw_viewport(self):
+        self._viewport_job = None
+        self.update_agent_positions()
+
     def update_side_panel(self, campus_count, interactions):
         """Обновляет все информационные панели справа ."""
 # Дата and Академический Календарь
@@ -672,7 +708,7 @@ class UniversityGUI(tk.Toplevel):
                         except ValueError:
                             arch_name = agent.archetype.name
                     
-                    primary_emotion = agent.get_primary_emotion()[1]
+                    primary_emotion = self.collective.get_primary_emotions([agent_id])[agent_id][1]
                     
                     info = (f"Имя: {agent.name} ({agent_id})\n"
                             f"Группа: {agent.group_id}\n"
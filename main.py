@@ -2,6 +2,7 @@ import argparse
 import sys
 import os
 import json
+import time
 
 def main():
     parser = argparse.ArgumentParser(description="Движок моделирования коллективного поведения автоматов")
@@ -12,6 +13,11 @@ def main():
     parser.add_argument("--gui", action="store_true", help="Force GUI mode")
     parser.add_argument("--university", "--uni", action="store_true", help="Launch directly into University map")
     parser.add_argument("--seed", type=int, help="Seed for reproducibility")
+    parser.add_argument("--resume", type=str, metavar="CHECKPOINT", help="Resume a headless University run from a checkpoint file")
+    parser.add_argument("--checkpoint", type=str, metavar="PATH", help="Checkpoint file for headless University runs (default: data/output/checkpoints/<scenario>.ckpt)")
+    parser.add_argument("--checkpoint-every", type=int, default=30, metavar="DAYS", help="Checkpoint interval in simulated days (0 disables)")
+    parser.add_argument("--telemetry", type=str, metavar="PATH", help="JSON-lines telemetry file for headless University runs (progress, throughput, memory, log queue)")
+    parser.add_argument("--force", action="store_true", help="Recompute even if an identical finished run is in the result cache")
     parser.add_argument("--create-scenario", type=str, metavar="PATH", help="Generate a template scenario JSON and exit")
     parser.add_argument("--version", action="version", version="Движок моделирования коллективного поведения автоматов")
     
@@ -29,30 +35,62 @@ def main():
         print("[System] Loading University Mode...", flush=True)
         is_headless = args.silent or (not args.gui and not sys.stdin.isatty())
         
-        if is_headless and args.scenario:
+        if is_headless and (args.scenario or args.resume):
             print("[System] Bypassing GUI (Headless mode active)...", flush=True)
-            with open(args.scenario, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-            
-            from model.university_collective import UniversityCollective
             from model.simulation_session import SimulationSession
+            from core.checkpoint import checkpoint_path_for
+            from core.result_cache import ResultCache, run_key, describe
+            from core.world_snapshot import warm_start_university
             
-            effective_seed = config.get("seed", args.seed)
-            univ = UniversityCollective(seed=effective_seed, config=config)
-            run_name = config.get("run_name", "Headless University Run")
-            description = config.get("description", "")
-            scenario_name = config.get("scenario_name", os.path.basename(args.scenario))
-            session = SimulationSession(collective=univ, run_name=run_name, description=description, scenario_name=scenario_name)
+            if args.resume:
+                session = SimulationSession.from_checkpoint(args.resume)
+                config = session.collective.config
+                scenario_name = session.collective.scenario_name
+            else:
+                with open(args.scenario, 'r', encoding='utf-8') as f:
+                    config = json.load(f)
+                
+                effective_seed = config.get("seed", args.seed)
+                semesters = args.semesters if args.semesters is not None else config.get("semesters", 8)
+                cache = ResultCache()
+                cached = cache.lookup(run_key(config, seed=effective_seed, semesters=semesters))
+                if cached and not args.force:
+                    print(f"[System] Identical run already finished: {describe(cached)}. Use --force to recompute.", flush=True)
+                    sys.exit(0)
+                
+                univ = warm_start_university(config, seed=effective_seed)
+                run_name = config.get("run_name", "Headless University Run")
+                description = config.get("description", "")
+                scenario_name = config.get("scenario_name", os.path.basename(args.scenario))
+                session = SimulationSession(collective=univ, run_name=run_name, description=description, scenario_name=scenario_name, logging_policy=config.get("logging"), steady_state=config.get("steady_state"))
             
             semesters = args.semesters if args.semesters is not None else config.get("semesters", 8)
-            print(f"[System] Headless University Mode: Running {semesters} semesters...", flush=True)
+            # При возобновлении досчитываются только оставшиеся семестры
+            remaining = max(0, semesters - session.collective.semesters_passed)
+            checkpoint_path = None
+            if args.checkpoint_every > 0:
+                checkpoint_path = args.checkpoint or args.resume or checkpoint_path_for(scenario_name)
+            print(f"[System] Headless University Mode: Running {remaining} of {semesters} semesters...", flush=True)
+            if args.telemetry:
+                from core.telemetry import TelemetryWriter
+                session.telemetry = TelemetryWriter(args.telemetry, scenario_name, append=bool(args.resume))
+                session.telemetry.emit("started", resumed=bool(args.resume))
+            started = time.time()
             
             if hasattr(session, 'run_semesters'):
-                session.run_semesters(semesters)
+                session.run_semesters(remaining, checkpoint_path=checkpoint_path, checkpoint_every=args.checkpoint_every)
             else:
                 steps = args.steps if args.steps else config.get("steps", 100)
                 for _ in range(steps): session.run_day()
-                
+            
+            # Расчет завершен — контрольная точка больше не нужна, результат попадает в кэш
+            if checkpoint_path and os.path.exists(checkpoint_path):
+                os.remove(checkpoint_path)
+            session.close()
+            ResultCache().record(run_key(config, seed=config.get("seed", args.seed), semesters=semesters), scenario_name, session)
+            if session.telemetry:
+                session.telemetry.emit("finished", elapsed=time.time() - started)
+                session.telemetry.close()
             print("Done.", flush=True)
             sys.exit(0)
             
@@ -89,7 +127,7 @@ def main():
             run_name = config.get("run_name", "Unnamed University Run")
             description = config.get("description", "")
             scenario_name = config.get("scenario_name", "default")
-            session = SimulationSession(collective=univ, run_name=run_name, description=description, scenario_name=scenario_name)
+            session = SimulationSession(collective=univ, run_name=run_name, description=description, scenario_name=scenario_name, logging_policy=config.get("logging"), steady_state=config.get("steady_state"))
             
             if args.steps:
                 session.total_steps = args.steps
@@ -127,6 +165,7 @@ def main():
         steps = args.steps if args.steps is not None else session.total_steps
         for step in range(steps):
             session.run_day()
+        session.close()
         print("Done.", flush=True)
     else:
         from gui.simulation_gui import SimulationGUI
@@ -48,6 +48,8 @@ class Agent:
         self.sportiness = sportiness if sportiness is not None else random.uniform(0, 1)
         self.skip_tendency = skip_tendency if skip_tendency is not None else random.uniform(0, 0.3)
         self.status = AgentStatus.HOME
+        self.arrived_today = False      # Был на кампусе сегодня
+        self.left_campus_today = False  # Ушел с кампуса до конца дня
         
         # Жизненный цикл
         self.course_year = course_year
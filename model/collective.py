@@ -212,12 +212,18 @@ class Collective:
         if not hasattr(self, 'relations_matrix') or len(self._id_map) != len(names) or set(self._id_map.keys()) != set(names):
             old_id_map = self._id_map.copy()
             old_matrix = self.relations_matrix if hasattr(self, 'relations_matrix') else None
+
+            # Python-матрица обновляется лениво: при смене состава забираем актуальные отношения из ядра
+            if old_matrix is not None and self._engine_in_sync():
+                n_old = len(old_id_map)
+                old_matrix = np.array(self.cpp_engine.state.relations, dtype=np.int8).reshape((n_old, n_old, 3))
             
             self._id_map = {name: i for i, name in enumerate(names)}
             self._reverse_id_map = {i: name for name, i in self._id_map.items()}
             
             n = len(names)
             new_matrix = np.zeros((n, n, 3), dtype=np.int8)
+            carried_old, carried_new = [], []  # строки, переносимые из старой матрицы
             
             for i, name in enumerate(names):
                 agent = self.agents.get(name)
@@ -239,14 +245,16 @@ class Collective:
                             new_matrix[i, j, 1] = rel.get('affinity', 0)
                             new_matrix[i, j, 2] = rel.get('trust', 0)
                 elif isinstance(old_relations, RelationsProxy):
-                    if old_matrix is not None:
-                        for target_name, target_idx in old_id_map.items():
-                            if target_name in self._id_map:
-                                old_i = old_id_map[old_relations.agent_name]
-                                old_j = target_idx
-                                new_i = i
-                                new_j = self._id_map[target_name]
-                                new_matrix[new_i, new_j] = old_matrix[old_i, old_j]
+                    if old_matrix is not None and old_relations.agent_name in old_id_map:
+                        carried_old.append(old_id_map[old_relations.agent_name])
+                        carried_new.append(i)
+            
+            # Перенос сохранившихся отношений одним индексированием (вместо цикла N x N)
+            if carried_old:
+                common = [(old_id_map[name], j) for j, name in enumerate(names) if name in old_id_map]
+                cols_old = np.array([o for o, _ in common], dtype=np.intp)
+                cols_new = np.array([j for _, j in common], dtype=np.intp)
+                new_matrix[np.ix_(carried_new, cols_new)] = old_matrix[np.ix_(carried_old, cols_old)]
                             
             self.relations_matrix = new_matrix
         else:
@@ -292,6 +300,7 @@ class Collective:
         if not self.cpp_engine or self.cpp_engine.state.num_agents != n:
             import emotion_engine
             self.cpp_engine = emotion_engine.Engine(n)
+            sync_relations = True # В новом ядре отношений еще нет
             
         # Синхронизируем конфиги архетипов один раз (или при изменении состава)
         self._sync_archetypes()
@@ -366,6 +375,56 @@ class Collective:
         if sync_relations:
             self.relations_matrix = np.array(self.cpp_engine.state.relations, dtype=np.int8).reshape((n, n, 3))
 
+    def _engine_in_sync(self) -> bool:
+        """Проверяет, что C++ ядро соответствует текущему маппингу индексов."""
+        return self.cpp_engine is not None and self.cpp_engine.state.num_agents == len(self._id_map)
+
+    def get_primary_emotions(self, names) -> dict:
+        """
+        Доминирующие эмоции для подмножества агентов (например, видимых во вьюпорте GUI).
+        Читает значения напрямую из C++ ядра, без синхронизации всех агентов в Python.
+        Возвращает {имя: (ось, описание, значение)} в формате Agent.get_primary_emotion.
+        """
+        axes = list(EmotionAxis)
+        result = {}
+        engine_ready = self._engine_in_sync()
+        indexed = []
+
+        for name in names:
+            idx = self._id_map.get(name) if engine_ready else None
+            if idx is None:
+                # Агент еще не попал в ядро (добавлен из GUI) — берем из Python-объекта
+                agent = self.agents.get(name)
+                if agent is not None:
+                    result[name] = agent.get_primary_emotion()
+            else:
+                indexed.append((idx, name))
+
+        if indexed:
+            flat = self.cpp_engine.get_primary_emotions([idx for idx, _ in indexed])
+            for k, (_, name) in enumerate(indexed):
+                axis_idx, value = flat[2 * k], flat[2 * k + 1]
+                if axis_idx < 0:
+                    result[name] = ("neutral", "Нейтрально", 0)
+                else:
+                    axis = axes[axis_idx]
+                    result[name] = (axis.value, axis.get_localized_label(value), value)
+        return result
+
+    def get_relation_row(self, agent_name):
+        """
+        Отношения одного агента ко всем остальным: массив N x 3 (utility, affinity, trust),
+        индексируемый через _id_map. Нужен для AgentStateDialog вместо полной синхронизации матрицы.
+        """
+        idx = self._id_map.get(agent_name)
+        if idx is None:
+            return None
+        if self._engine_in_sync():
+            return np.array(self.cpp_engine.get_relation_row(idx), dtype=np.int8).reshape((-1, 3))
+        if hasattr(self, 'relations_matrix'):
+            return self.relations_matrix[idx].copy()
+        return None
+
     def _run_cpp_influence(self):
         """
         Запуск C++ движка и синхронизация результатов обратно в Python.
@@ -573,6 +632,36 @@ class Collective:
         """
         self.perform_full_day_cycle(interactions_per_day, interactive=True)
 
+    def remove_agents(self, agent_names):
+        """
+        Массовое удаление агентов: маска сохраняемых индексов и сжатие матрицы отношений
+        одним индексированием вместо поэлементной очистки связей через RelationsProxy.
+        """
+        drop = {name for name in agent_names if name in self.agents}
+        if not drop:
+            return
+        for name in drop:
+            del self.agents[name]
+            
+        if not hasattr(self, 'relations_matrix') or not self._id_map:
+            return
+            
+        # Python-матрица обновляется лениво: перед сжатием забираем актуальные отношения из ядра
+        if self._engine_in_sync():
+            n_old = len(self._id_map)
+            self.relations_matrix = np.array(self.cpp_engine.state.relations, dtype=np.int8).reshape((n_old, n_old, 3))
+            
+        keep = np.ones(len(self._reverse_id_map), dtype=bool)
+        keep[[self._id_map[name] for name in drop if name in self._id_map]] = False
+        keep_idx = np.flatnonzero(keep)
+        
+        self.relations_matrix = self.relations_matrix[np.ix_(keep_idx, keep_idx)]
+        kept_names = [self._reverse_id_map[i] for i in keep_idx]
+        self._id_map = {name: i for i, name in enumerate(kept_names)}
+        self._reverse_id_map = {i: name for name, i in self._id_map.items()}
+        # Индексы сдвинулись — ядро будет пересоздано при следующей синхронизации
+        self.cpp_engine = None
+
     def remove_agent(self, agent_name):
         """Удалить агента из коллектива и очистить его упоминания из отношений других агентов."""
         if agent_name in self.agents:
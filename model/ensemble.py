@@ -0,0 +1,74 @@
+"""
+Ансамбль реплик: R независимых прогонов одной популяции (разные потоки случайных чисел)
+в одном C++ ядре EnsembleEngine вместо R отдельных процессов.
+"""
+
+import numpy as np
+
+# model.collective добавляет каталог core в sys.path для скомпилированного модуля
+from model.collective import CPP_ENGINE_AVAILABLE
+
+if CPP_ENGINE_AVAILABLE:
+    import emotion_engine
+else:
+    emotion_engine = None
+
+
+def build_ensemble(collective, num_replicas: int, seed: int = 0, sync: bool = True):
+    """
+    Создает EnsembleEngine по коллективу: архетипы, чувствительности и веса эмиссии
+    берутся из синхронизированного ядра коллектива один раз и общие для всех реплик,
+    начальные эмоции и отношения копируются в каждую реплику.
+    sync=False — ядро коллектива уже синхронизировано (несколько ансамблей из одного состояния).
+    """
+    if emotion_engine is None:
+        raise RuntimeError("C++ ядро emotion_engine не собрано: ансамбль недоступен")
+
+    if sync:
+        collective._sync_to_cpp(sync_relations=True)
+    base = collective.cpp_engine
+    n = base.state.num_agents
+
+    ensemble = emotion_engine.EnsembleEngine(num_replicas, n)
+    for idx, conf in enumerate(base.state.archetype_configs):
+        ensemble.set_archetype_config(
+            idx, conf.refusal_chance, conf.decay_rate, conf.temperature, conf.emotion_decay,
+            int(conf.refusal_vulnerability), list(conf.emotion_coefficients),
+            conf.scoring_affinity, conf.scoring_utility, conf.scoring_trust
+        )
+    for i, arch_idx in enumerate(base.state.agent_archetypes):
+        ensemble.set_agent_archetype(i, arch_idx)
+    ensemble.set_sensitivities(list(base.state.sensitivities))
+    ensemble.set_emission_weights(list(base.state.emission_weights))
+
+    ensemble.set_emotions_array(base.emotions_array())
+    ensemble.set_relations_array(base.relations_array())
+    ensemble.seed(seed)
+    return ensemble
+
+
+def run_ensemble(ensemble, days: int, interactions_per_day: int = 1, on_day=None) -> dict:
+    """
+    Продвигает все реплики на days дней. Возвращает ряды сводок по дням:
+    emotion_mean / emotion_std (дни, R, 7), relation_mean (дни, R, 3), interactions (дни, R, 3).
+    on_day(день, сводка) вызывается после каждого дня.
+    """
+    series = {}
+    for day in range(days):
+        ensemble.perform_daily_cycle(interactions_per_day)
+        summary = ensemble.summary()
+        for key, values in summary.items():
+            series.setdefault(key, []).append(values)
+        if on_day:
+            on_day(day + 1, summary)
+    return {key: np.stack(values) for key, values in series.items()}
+
+
+def across_replicas(series: dict) -> dict:
+    """Межрепликовые статистики ряда: среднее и СКО по оси реплик (для доверительных интервалов)."""
+    out = {}
+    for key, values in series.items():
+        values = values.astype(np.float64)
+        out[f"{key}_mean"] = values.mean(axis=1)
+        out[f"{key}_std"] = values.std(axis=1, ddof=1) if values.shape[1] > 1 else np.zeros_like(values[:, 0])
+    return out
@@ -1,7 +1,14 @@
 import os
+import time
 import datetime
 from model.collective import Collective
 from core.data_logger import DataLogger
+from core.run_store import RunStore
+from core.emotion_history import EmotionHistoryWriter
+from core.logging_policy import LoggingPolicy
+from core import checkpoint
+from core.telemetry import rss_bytes, sink_backlog
+from core.steady_state import SteadyStateDetector
 try:
     from core.clickhouse_logger import ClickHouseLogger
 except ImportError:
@@ -12,7 +19,7 @@ class SimulationSession:
     Класс, инкапсулирующий логику сессии симуляции.
     Отвечает за управление коллективом, шаги времени и сохранение данных.
     """
-    def __init__(self, collective=None, seed=None, output_dir="data/output", run_name="University Default", description="", scenario_name="default"):
+    def __init__(self, collective=None, seed=None, output_dir="data/output", run_name="University Default", description="", scenario_name="default", logging_policy=None, ch_logger=None, run_store=None, steady_state=None):
         if collective:
             self.collective = collective
         else:
@@ -20,29 +27,72 @@ class SimulationSession:
         
         self.collective.scenario_name = scenario_name
             
+        self.set_logging_policy(logging_policy)
+        self.set_steady_state(steady_state)
+        
         self.logger = DataLogger()
         self.ch_logger = None
-        if ClickHouseLogger:
+        # Переданный снаружи логгер (пакетный воркер) переиспользует соединение и не закрывается сессией
+        self._owns_ch_logger = ch_logger is None
+        if run_store is not None:
+            pass # Продолжение локального запуска (возобновление с контрольной точки)
+        elif ch_logger is not None:
+            ch_logger.start_new_run()
+            self.ch_logger = ch_logger
+        elif ClickHouseLogger:
             try:
                 self.ch_logger = ClickHouseLogger()
             except Exception as e:
                 print(f"Предупреждение: ClickHouse не доступен ({e}). Логирование в БД отключено.", flush=True)
+            # СУБД недоступна при старте — пишем запуск локально, а не теряем его
+            if self.ch_logger and not self.ch_logger.client:
+                self.ch_logger = None
         
-        self.run_id = self.ch_logger.run_id if self.ch_logger else None
-        
-        if self.ch_logger:
-            self.ch_logger.log_run_metadata(run_name, description, scenario_name)
-            
         self.output_dir = output_dir
         
+        # Без ClickHouse запуск пишется в локальное колоночное хранилище (вместо CSV)
+        if run_store is not None:
+            self.run_store = run_store
+        else:
+            self.run_store = None if self.ch_logger else RunStore(self.output_dir)
+        
+        self.run_id = self.sink.run_id if self.sink else None
+        
+        # Метаданные пишутся при старте симуляции, когда политика логирования окончательно известна
+        self.run_metadata = (run_name, description, scenario_name)
+        
         self.first_log_states = True
         self.first_log_interactions = True
         self.simulation_started = False
         self.gui_active = False # Флаг для динамического управления синхронизацией
+        self._relations_layout = None # Маппинг имен в индексы на момент последнего снимка отношений
+        self.layout = 0 # Номер раскладки индексов агентов в логах (растет при каждой смене состава)
+        self._registry_map = None # Маппинг имен в индексы, под которым записан текущий реестр
+        self.last_logged_day = None # Последний day_id, переданный в логи (курсор для контрольных точек)
+        
+        # Memory-mapped история эмоций (день, слот, агент, ось) — создается при первой записи
+        self.emotion_history = None
+        
+        # Поток телеметрии (core.telemetry.TelemetryWriter) и накопленное время фаз дня, сек
+        self.telemetry = None
+        self.phase_times = {"simulate": 0.0, "log": 0.0}
         
         # Убеждаемся, что директория для вывода существует
         os.makedirs(self.output_dir, exist_ok=True)
 
+    def set_logging_policy(self, config=None):
+        """Задает политику логирования (ключ "logging" сценария); None — политика по умолчанию."""
+        self.logging_policy = LoggingPolicy(config)
+
+    def set_steady_state(self, config=None):
+        """Детектор стационарности (ключ "steady_state" сценария); None — выключен."""
+        self.steady_state = SteadyStateDetector(config) if config is not None else None
+
+    @property
+    def sink(self):
+        """Активный приемник логов: ClickHouse или локальное хранилище запуска."""
+        return self.ch_logger or self.run_store
+
     @property
     def current_step(self):
         return self.collective.current_step
@@ -87,6 +137,8 @@ class SimulationSession:
             self.collective.add_agent(agent)
             
         self.total_steps = scenario.get("steps", 100)
+        self.set_logging_policy(scenario.get("logging"))
+        self.set_steady_state(scenario.get("steady_state"))
         self.ensure_relationships()
 
     def create_template_scenario(self, path):
@@ -127,21 +179,108 @@ class SimulationSession:
             
         print("--- РАСЧЕТ ЗАВЕРШЕН ---", flush=True)
 
-    def run_semesters(self, num_semesters: int):
-        """Запускает симуляцию до достижения указанного количества семестров."""
+    def run_semesters(self, num_semesters: int, on_progress=None, checkpoint_path=None, checkpoint_every=30):
+        """
+        Запускает симуляцию до достижения указанного количества семестров.
+        on_progress(день, пройдено_семестров, цель) вызывается после каждого дня.
+        Если задан checkpoint_path, каждые checkpoint_every дней туда пишется контрольная точка.
+        При подключенной телеметрии после каждого дня пишется событие day (скорость, память, очередь логов).
+        """
         print(f"Запуск симуляции на {num_semesters} семестров...", flush=True)
         initial_semesters = getattr(self.collective, 'semesters_passed', 0)
         target_semesters = initial_semesters + num_semesters
         
         step = 0
         while getattr(self.collective, 'semesters_passed', 0) < target_semesters:
+            semesters_before = getattr(self.collective, 'semesters_passed', 0)
+            day_started = time.perf_counter()
             self.run_day()
             step += 1
+            if (self.steady_state and self.steady_state.stationary and self.steady_state.action == "skip"
+                    and hasattr(self.collective, 'fast_forward_to_next_event')):
+                self._fast_forward()
+            if self.telemetry:
+                self._emit_day(time.perf_counter() - day_started, target_semesters)
+                if getattr(self.collective, 'semesters_passed', 0) != semesters_before:
+                    self.telemetry.emit("semester", day=self.current_step, semesters=self.collective.semesters_passed,
+                                        target=target_semesters, agents=len(self.collective.agents))
+            if on_progress:
+                on_progress(step, self.collective.semesters_passed, target_semesters)
+            if checkpoint_path and step % checkpoint_every == 0:
+                self.save_checkpoint(checkpoint_path)
             if step % 50 == 0:
                 print(f"Прошло {step} дней. Пройдено семестров: {self.collective.semesters_passed}/{target_semesters}", flush=True)
                 
         print(f"--- РАСЧЕТ {num_semesters} СЕМЕСТРОВ ЗАВЕРШЕН (Всего дней: {step}) ---", flush=True)
 
+    def _emit_day(self, day_seconds, target_semesters):
+        slots = len(self.collective.day_schedule_slots) if hasattr(self.collective, 'day_schedule_slots') else 1
+        self.telemetry.emit(
+            "day", day=self.current_step, semesters=getattr(self.collective, 'semesters_passed', 0), target=target_semesters,
+            agents=len(self.collective.agents), slots_per_day=slots, day_seconds=round(day_seconds, 4),
+            phases={phase: round(seconds, 3) for phase, seconds in self.phase_times.items()},
+            rss=rss_bytes(), backlog=sink_backlog(self.sink) if self.sink else {}
+        )
+
+    def save_checkpoint(self, path):
+        """Контрольная точка сессии на границе дня (см. core/checkpoint.py)."""
+        started = time.perf_counter()
+        checkpoint.save_checkpoint(self, path)
+        if self.telemetry:
+            self.telemetry.emit("checkpoint", day=self.current_step, path=path, seconds=round(time.perf_counter() - started, 3))
+        print(f"Контрольная точка: день {self.current_step} -> {path}", flush=True)
+
+    @classmethod
+    def from_checkpoint(cls, path, ch_logger=None):
+        """
+        Восстанавливает сессию из контрольной точки и продолжает тот же запуск:
+        ClickHouse — с прежним run_id (строки после точки удаляются), RunStore — в прежнем каталоге.
+        """
+        state = checkpoint.load_checkpoint(path)
+        saved, sink = state["session"], state["sink"]
+        day_id = state["day_id"]
+        # Строки логов после этого дня записаны уже после точки и отбрасываются
+        logged_day = state["session"]["last_logged_day"]
+        run_name, description, scenario_name = saved["run_metadata"]
+
+        run_store = None
+        if sink["kind"] == "run_store" and os.path.isdir(sink["run_store_path"]):
+            run_store = RunStore.reopen(sink["run_store_path"], after_day=logged_day, layout=saved.get("layout", 0))
+
+        session = cls(
+            collective=state["collective"], output_dir=saved["output_dir"],
+            run_name=run_name, description=description, scenario_name=scenario_name,
+            ch_logger=ch_logger, run_store=run_store
+        )
+        session.logging_policy = saved["logging_policy"]
+        session.steady_state = saved.get("steady_state")
+        session.first_log_states = saved["first_log_states"]
+        session.first_log_interactions = saved["first_log_interactions"]
+        session.simulation_started = saved["simulation_started"]
+        session._relations_layout = saved["relations_layout"]
+        session.layout = saved.get("layout", 0)
+        session._registry_map = saved.get("registry_map")
+        session.last_logged_day = logged_day
+
+        resumed = (sink["kind"] == "clickhouse" and session.ch_logger) or run_store is not None
+        if sink["kind"] == "clickhouse" and session.ch_logger:
+            session.ch_logger.resume_run(sink["run_id"], logged_day, layout=session.layout)
+        session.run_id = session.sink.run_id if session.sink else None
+        if not resumed and session.sink and session.simulation_started:
+            # Прежний приемник недоступен — продолжение пишется новым запуском с момента точки
+            print(f"Предупреждение: приемник логов запуска {sink['run_id']} недоступен, продолжение пишется как {session.run_id}", flush=True)
+            session.sink.log_run_metadata(run_name, description, scenario_name, session.logging_policy.to_json())
+            session.layout, session._registry_map = 0, None
+            session._log_registry()
+            session._relations_layout = None
+
+        history = saved["emotion_history"]
+        if resumed and history and os.path.exists(history["path"]):
+            session.emotion_history = EmotionHistoryWriter.reopen(history["path"], history["frames_written"])
+
+        print(f"Сессия восстановлена из {path} (день {day_id}, запуск {session.run_id}).", flush=True)
+        return session
+
     def load_state_from_clickhouse(self, run_id, day_id, slot_id=0):
         """
         Загружает состояние симуляции из ClickHouse (Time-Travel).
@@ -158,17 +297,23 @@ class SimulationSession:
             self.collective.cpp_engine = emotion_engine.Engine(len(self.collective.agents))
             
         engine = self.collective.cpp_engine
+        n = engine.state.num_agents
+        
+        # Инъекция эмоций: одно индексированное присваивание вместо set_emotion по ячейкам
+        emotion_matrix = engine.emotions_array()
+        valid = emotions['agent_id'] < n
+        emotion_matrix[emotions['agent_id'][valid]] = emotions['values'][valid]
         
-        # Инъекция эмоций
-        for row in emotions:
-            agent_id = row[0]
-            for axis in range(7):
-                engine.set_emotion(agent_id, axis, row[axis + 1])
-                
         # Инъекция отношений
-        for row in relations:
-            u_id, o_id, util, aff, trust = row
-            engine.set_relation(u_id, o_id, util, aff, trust)
+        relations_matrix = engine.relations_array()
+        valid_rel = (relations['subject_id'] < n) & (relations['object_id'] < n)
+        relations_matrix[relations['subject_id'][valid_rel], relations['object_id'][valid_rel]] = relations['values'][valid_rel]
+        
+        if not valid.all() or not valid_rel.all():
+            print(f"Предупреждение: снимок содержит агентов вне текущего коллектива ({n}), они пропущены.", flush=True)
+        
+        engine.set_emotions_array(emotion_matrix)
+        engine.set_relations_array(relations_matrix)
             
         # Синхронизация Python-объектов
         self.collective._sync_from_cpp(sync_relations=True)
@@ -180,17 +325,24 @@ class SimulationSession:
         # Начальный лог состояний перед первым шагом
         if not self.simulation_started:
             self.collective._sync_to_cpp()
-            if self.ch_logger:
-                self.ch_logger.log_agent_registry(self.collective)
+            if self.sink:
+                run_name, description, scenario_name = self.run_metadata
+                self.sink.log_run_metadata(run_name, description, scenario_name, self.logging_policy.to_json())
+            self._log_registry()
             self.log_states(slot_id=0)
+            self._record_emotions(slot_id=0)
+            self.last_logged_day = self.collective.current_step
             self.simulation_started = True
 
         all_interactions = []
-        is_headless = not hasattr(self, 'gui_active') or not self.gui_active 
+        policy = self.logging_policy
 
         if hasattr(self.collective, 'day_schedule_slots'):
             while True:
+                started = time.perf_counter()
                 interactions = self.collective.perform_next_step()
+                simulated = time.perf_counter()
+                self.phase_times["simulate"] += simulated - started
                 
                 # Проверяем, не является ли этот шаг просто техническим переходом дня
                 is_day_ready = any(res == "New_Day_Ready" for _, _, res in interactions if isinstance(res, str))
@@ -201,56 +353,137 @@ class SimulationSession:
                     # slot_id отражает состояние ПОСЛЕ совершения шага (1..9)
                     slot_id = self.collective.current_slot_idx
                     is_last_slot = (slot_id >= len(self.collective.day_schedule_slots))
+                    day_id = self.collective.current_step
+                    self.last_logged_day = day_id
+                    self._log_registry()
                     
-                    # Логируем взаимодействия КАЖДЫЙ СЛОТ (нужно для чеклиста)
-                    self.log_interactions(interactions, slot_id=slot_id)
+                    # Частота записи задается политикой (по умолчанию: взаимодействия — каждый слот,
+                    # состояния — последний слот дня, отношения — раз в 3 дня)
+                    if policy.should_log("interactions", day_id, slot_id, is_last_slot):
+                        self.log_interactions(interactions, slot_id=slot_id)
+                    self._record_emotions(slot_id)
                     
-                    # Логируем состояния РАЗ В ДЕНЬ (последний слот) — 9x экономия
-                    if is_last_slot:
+                    if policy.should_log("states", day_id, slot_id, is_last_slot):
                         self.log_states(slot_id=slot_id)
                     
-                    # Синхронизация C++ и логирование отношений — РАЗ В 3 ДНЯ
-                    should_sync_rel = (is_last_slot and self.collective.current_step % 3 == 0)
-                    
+                    should_log_rel = policy.should_log("relations", day_id, slot_id, is_last_slot)
+                    # Отношения в ядро не передаются: пока ядро соответствует раскладке, оно — источник истины,
+                    # а Python-матрица обновляется из него лениво (смена состава) и перезаписала бы его устаревшими
+                    # значениями. Новое ядро получает матрицу при создании (Collective._sync_to_cpp)
                     if self.collective.cpp_engine and is_last_slot:
-                        self.collective._sync_to_cpp(sync_relations=should_sync_rel)
+                        self.collective._sync_to_cpp(sync_relations=False)
                     
-                    if should_sync_rel and self.ch_logger:
-                        self.ch_logger.log_agent_relations(self.collective.current_step, slot_id, self.collective.cpp_engine)
-                        self.ch_logger.flush_day_relations()
+                    if should_log_rel:
+                        self.log_relations(slot_id=slot_id)
+                    self.phase_times["log"] += time.perf_counter() - simulated
                 else:
                     break
         else:
             # Обычный режим (один большой шаг)
+            started = time.perf_counter()
             all_interactions = self.collective.perform_full_day_cycle(interactive=False)
-            self.log_interactions(all_interactions, slot_id=1)
-            self.log_states(slot_id=1)
+            simulated = time.perf_counter()
+            self.phase_times["simulate"] += simulated - started
+            day_id = self.collective.current_step
+            self.last_logged_day = day_id
+            self._log_registry()
+            if policy.should_log("interactions", day_id, 1, True):
+                self.log_interactions(all_interactions, slot_id=1)
+            if policy.should_log("states", day_id, 1, True):
+                self.log_states(slot_id=1)
+            if policy.should_log("relations", day_id, 1, True):
+                self.log_relations(slot_id=1)
+            self._record_emotions(slot_id=1)
+            self.phase_times["log"] += time.perf_counter() - simulated
 
-        # Синхронизация для GUI (если нужно)
-        if not is_headless:
-            self.collective._sync_from_cpp(sync_relations=True)
-        elif self.collective.cpp_engine:
+        # Эмоции возвращаются в Python-объекты; отношения GUI запрашивает точечно
+        # (Collective.get_relation_row / get_primary_emotions), полная синхронизация матрицы не нужна
+        if self.collective.cpp_engine:
             self.collective._sync_from_cpp(sync_relations=False)
 
+        if self.steady_state:
+            self._update_steady_state()
+
         return all_interactions
 
+    def _log_registry(self):
+        """
+        Пишет реестр агентов, если раскладка индексов изменилась с прошлой записи (старт, ротация состава).
+        Каждая новая раскладка получает следующий номер layout; строки логов сопоставляются реестру своей раскладки.
+        """
+        id_map = self.collective._id_map
+        if id_map is self._registry_map:
+            return
+        if self._registry_map is not None and self._registry_map == id_map:
+            # Коллектив пересобрал маппинг без смены состава — реестр актуален
+            self._registry_map = id_map
+            return
+        if self._registry_map is not None:
+            self.layout += 1
+        self._registry_map = id_map
+        if self.sink:
+            self.sink.log_agent_registry(self.collective, layout=self.layout)
+
+    def _update_steady_state(self):
+        """
+        Обновляет детектор стационарности по состоянию ядра на конец дня.
+        В стационарном режиме логирование прореживается (thin_logging) до выхода из него.
+        """
+        engine = self.collective.cpp_engine
+        if not engine or not self.collective._engine_in_sync():
+            return
+        detector = self.steady_state
+        was_stationary = detector.stationary
+        detector.update(engine.emotions_array(), engine.relations_array(), self.collective._id_map)
+        if detector.stationary != was_stationary:
+            if detector.action == "thin_logging" or not hasattr(self.collective, 'fast_forward_to_next_event'):
+                self.logging_policy.quiet_factor = detector.thin_factor if detector.stationary else 1
+            state = "стационарный режим" if detector.stationary else "выход из стационарного режима"
+            print(f"[System] День {self.current_step}: {state} (|ΔE|={detector.last_norms[0]:.3f}, |ΔR|={detector.last_norms[1]:.3f})", flush=True)
+            if self.telemetry:
+                self.telemetry.emit("steady_state", day=self.current_step, stationary=detector.stationary,
+                                    emotion_change=detector.last_norms[0], relation_change=detector.last_norms[1])
+
+    def _fast_forward(self):
+        """Стационарный режим с action="skip": календарь переводится к следующему академическому событию."""
+        day_from = self.current_step
+        skipped = self.collective.fast_forward_to_next_event()
+        self.steady_state.reset()
+        print(f"[System] Стационарный режим: пропущено {skipped} дн. (день {day_from} -> {self.current_step}, {self.current_date})", flush=True)
+        if self.telemetry:
+            self.telemetry.emit("fast_forward", day_from=day_from, day=self.current_step, skipped=skipped,
+                                semesters=self.collective.semesters_passed)
+
+    def _record_emotions(self, slot_id):
+        """Дописывает кадр эмоций из ядра в файл истории (output_dir/emotion_history/<run_id>.emo)."""
+        engine = self.collective.cpp_engine
+        if not self.logging_policy.emotion_history or not engine:
+            return
+        if self.emotion_history is None:
+            slots = len(self.collective.day_schedule_slots) + 1 if hasattr(self.collective, 'day_schedule_slots') else 2
+            n = engine.state.num_agents
+            base = os.path.join(self.output_dir, "emotion_history", f"{self.run_id or 'local'}")
+            path, k = f"{base}.emo", 1
+            while os.path.exists(path): # После reset() новый коллектив пишется в отдельный файл
+                path, k = f"{base}_{k}.emo", k + 1
+            # Запас емкости на рост коллектива; при переполнении файл расширяется
+            self.emotion_history = EmotionHistoryWriter(path, max_agents=n + n // 4, slots_per_day=slots)
+        day_id = self.collective.current_step
+        if self.emotion_history.layout != self.layout:
+            reverse = self.collective._reverse_id_map
+            self.emotion_history.set_layout(self.layout, [reverse[i] for i in range(len(reverse))], day_id, slot_id)
+        self.emotion_history.record(day_id, slot_id, engine.emotions_array())
+
     def log_states(self, slot_id=0):
-        """Записывает текущие состояния агентов в файл."""
+        """Записывает текущие состояния агентов (ClickHouse или локальное хранилище)."""
         states_file = os.path.join(self.output_dir, "agent_states.csv")
-        date_str = self.collective.current_date.strftime("%Y-%m-%d %H:%M:%S")
         
-        if self.collective.cpp_engine:
-            if self.ch_logger:
-                # В ClickHouse логируем каждое изменение состояния
-                self.ch_logger.log_agent_states(self.collective.current_step, slot_id, self.collective.cpp_engine)
+        if self.collective.cpp_engine and self.sink:
+            panel = self.logging_policy.panel_indices(self.collective)
+            if self.logging_policy.aggregate_only("states"):
+                self.sink.log_state_aggregates(self.collective.current_step, slot_id, self.collective.cpp_engine, agent_idx=panel)
             else:
-                # Фоллбек: пишем в CSV каждый шаг, раз ClickHouse не доступен
-                self.collective.cpp_engine.save_states_csv(
-                    states_file, 
-                    date_str, 
-                    self.first_log_states
-                )
-                self.first_log_states = False
+                self.sink.log_agent_states(self.collective.current_step, slot_id, self.collective.cpp_engine, agent_idx=panel)
         else:
             self.logger.log_agent_states(
                 states_file, 
@@ -261,28 +494,20 @@ class SimulationSession:
             self.first_log_states = False
 
     def log_interactions(self, interactions, slot_id=0):
-        """Записывает взаимодействия за день в файл."""
+        """Записывает взаимодействия за день (ClickHouse или локальное хранилище)."""
         interactions_file = os.path.join(self.output_dir, "interaction_log.csv")
-        date_str = self.collective.current_date.strftime("%Y-%m-%d %H:%M:%S")
         
-        if self.collective.cpp_engine:
-            if self.ch_logger:
-                # В ClickHouse логируем каждое изменение
-                self.ch_logger.log_interactions(
-                    self.collective.current_step, 
-                    slot_id, 
-                    self.collective.cpp_engine,
-                    interactions_list=interactions,
-                    name_to_id=getattr(self.collective, '_id_map', None)
-                )
-            else:
-                # Фоллбек: пишем в CSV каждый шаг
-                self.collective.cpp_engine.save_interactions_csv(
-                    interactions_file, 
-                    date_str, 
-                    self.first_log_interactions
-                )
-                self.first_log_interactions = False
+        if self.collective.cpp_engine and self.sink:
+            log = (self.sink.log_interaction_aggregates if self.logging_policy.aggregate_only("interactions")
+                   else self.sink.log_interactions)
+            log(
+                self.collective.current_step, 
+                slot_id, 
+                self.collective.cpp_engine,
+                interactions_list=interactions,
+                name_to_id=getattr(self.collective, '_id_map', None),
+                agent_idx=self.logging_policy.panel_indices(self.collective)
+            )
         else:
             self.logger.log_interactions(
                 interactions_file, 
@@ -292,6 +517,30 @@ class SimulationSession:
             )
             self.first_log_interactions = False
 
+    def log_relations(self, slot_id):
+        """Записывает снимок матрицы отношений из ядра (ClickHouse или локальное хранилище)."""
+        if not self.sink or not self.collective.cpp_engine:
+            return
+        # После смены состава (выпуск/набор) индексы агентов другие — дельта к старой матрице невалидна
+        layout_changed = self._relations_layout != self.collective._id_map
+        self._relations_layout = dict(self.collective._id_map)
+        self.sink.log_agent_relations(
+            self.collective.current_step, slot_id, self.collective.cpp_engine,
+            force_keyframe=layout_changed,
+            agent_idx=self.logging_policy.panel_indices(self.collective)
+        )
+        self.sink.flush_day_relations()
+
+    def close(self):
+        """Дописывает буферы логирования (очередь ClickHouse / чанки хранилища) по завершении расчета."""
+        if self.ch_logger and not self._owns_ch_logger:
+            self.ch_logger.flush()
+        elif self.sink:
+            self.sink.close()
+        if self.emotion_history:
+            self.emotion_history.close()
+            self.emotion_history = None
+
     def reset(self, new_collective=None, seed=None):
         """Сбрасывает сессию симуляции."""
         if new_collective:
@@ -301,4 +550,14 @@ class SimulationSession:
         self.first_log_states = True
         self.first_log_interactions = True
         self.simulation_started = False
+        self._relations_layout = None
+        self.layout = 0
+        self._registry_map = None
+        self.last_logged_day = None
+        self.logging_policy.quiet_factor = 1
+        if self.steady_state:
+            self.steady_state.reset()
+        if self.emotion_history:
+            self.emotion_history.close()
+            self.emotion_history = None
         os.makedirs(self.output_dir, exist_ok=True)
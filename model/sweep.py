@@ -0,0 +1,216 @@
+"""
+Перебор параметров архетипов (refusal_chance, temperature, decay_rate, emotion_decay) на коротких
+горизонтах с ранней остановкой. Каждая точка плана — ансамбль реплик (model.ensemble) с измененной
+таблицей архетипов; точки продвигаются этапами, и после каждого этапа отсекаются те, чья метрика
+вышла из целевого коридора или уже сошлась. До полной длины досчитываются только перспективные точки.
+"""
+
+import itertools
+import numpy as np
+
+from model.archetypes import ArchetypeEnum
+from model.ensemble import build_ensemble
+
+SWEEP_PARAMETERS = ("refusal_chance", "temperature", "decay_rate", "emotion_decay")
+
+# Метрики сводки ансамбля: (ключ summary(), индекс столбца)
+METRICS = {
+    "utility": ("relation_mean", 0),
+    "affinity": ("relation_mean", 1),
+    "trust": ("relation_mean", 2),
+    "sadness_joy": ("emotion_mean", 0),
+    "fear_calm": ("emotion_mean", 1),
+    "anger_humility": ("emotion_mean", 2),
+    "disgust_acceptance": ("emotion_mean", 3),
+    "habit_surprise": ("emotion_mean", 4),
+    "shame_confidence": ("emotion_mean", 5),
+    "alienation_openness": ("emotion_mean", 6),
+    "success_rate": ("interactions", None),
+}
+
+# Состояния точки плана
+ACTIVE = "active"
+COMPLETED = "completed"        # досчитана до полной длины
+CONVERGED = "converged"        # метрика перестала меняться — итог известен раньше
+OUT_OF_BAND = "out_of_band"    # метрика вышла из целевого коридора
+NOT_PROMISING = "not_promising"  # отсечена по рангу среди выживших
+
+
+def _parse_key(key: str):
+    """'HARMONY.temperature' -> ([HARMONY], 'temperature'); '*.temperature' — все архетипы."""
+    arch_name, _, param = key.partition(".")
+    if param not in SWEEP_PARAMETERS:
+        raise ValueError(f"Параметр перебора {key!r}: ожидается <АРХЕТИП|*>.<{'|'.join(SWEEP_PARAMETERS)}>")
+    if arch_name == "*":
+        return list(ArchetypeEnum), param
+    try:
+        return [ArchetypeEnum[arch_name.upper()]], param
+    except KeyError:
+        raise ValueError(f"Неизвестный архетип в ключе {key!r}") from None
+
+
+def grid_design(space: dict) -> list:
+    """Полный перебор: space = {'HARMONY.temperature': [0.5, 1.0], '*.decay_rate': [...]}."""
+    for key in space:
+        _parse_key(key)
+    keys = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+
+
+def latin_hypercube(space: dict, samples: int, seed: int = None) -> list:
+    """Латинский гиперкуб: space = {'HARMONY.temperature': [min, max], ...}, samples точек."""
+    for key in space:
+        _parse_key(key)
+    rng = np.random.default_rng(seed)
+    keys = list(space)
+    # В каждом измерении по одной точке на каждый из samples равных интервалов, порядок перемешан
+    strata = (np.arange(samples)[:, None] + rng.random((samples, len(keys)))) / samples
+    for column in range(len(keys)):
+        strata[:, column] = rng.permutation(strata[:, column])
+    points = []
+    for row in strata:
+        point = {}
+        for key, u in zip(keys, row):
+            low, high = space[key]
+            point[key] = float(low + u * (high - low))
+        points.append(point)
+    return points
+
+
+def apply_point(ensemble, base_configs, arch_index: dict, point: dict):
+    """Записывает в ансамбль таблицу архетипов с переопределениями точки плана."""
+    overrides = {}
+    for key, value in point.items():
+        archetypes, param = _parse_key(key)
+        for arch in archetypes:
+            overrides.setdefault(arch_index[arch.value], {})[param] = value
+    for idx, conf in enumerate(base_configs):
+        params = {
+            "refusal_chance": conf.refusal_chance, "decay_rate": conf.decay_rate,
+            "temperature": conf.temperature, "emotion_decay": conf.emotion_decay,
+        }
+        params.update(overrides.get(idx, {}))
+        ensemble.set_archetype_config(
+            idx, float(params["refusal_chance"]), float(params["decay_rate"]), float(params["temperature"]),
+            float(params["emotion_decay"]), int(conf.refusal_vulnerability), list(conf.emotion_coefficients),
+            conf.scoring_affinity, conf.scoring_utility, conf.scoring_trust
+        )
+
+
+def metric_value(summary: dict, metric: str) -> float:
+    """Значение метрики за день, усредненное по репликам."""
+    key, column = METRICS[metric]
+    if metric == "success_rate":
+        counts = summary[key].sum(axis=0).astype(np.float64)
+        total = counts.sum()
+        return float(counts[1] / total) if total else 0.0
+    return float(summary[key][:, column].mean())
+
+
+class ParameterSweep:
+    """
+    Этапный перебор с отсечением (successive halving):
+    stages — длины горизонтов в днях по нарастающей (последний — полная длина);
+    band — целевой коридор метрики [min, max] (вне его точка отсекается после этапа);
+    tolerance/window — метрика сошлась, если за последние window дней размах меньше tolerance;
+    keep_fraction — доля выживших, продолжающих на следующий этап (ранг по близости к центру
+    коридора, либо по goal = "max"/"min" без коридора);
+    seed — базовый сид реплик, общий для всех точек (общие случайные числа).
+    """
+
+    def __init__(self, collective, points: list, metric: str = "trust", stages=(30, 90, 300),
+                 replicas: int = 4, band=None, tolerance: float = None, window: int = 20,
+                 keep_fraction: float = 0.5, goal: str = None, seed: int = 0, interactions_per_day: int = 1):
+        if metric not in METRICS:
+            raise ValueError(f"Неизвестная метрика {metric!r}: {sorted(METRICS)}")
+        if list(stages) != sorted(stages) or not stages:
+            raise ValueError("stages должны идти по возрастанию")
+        if goal not in (None, "max", "min"):
+            raise ValueError("goal: 'max', 'min' или не задан")
+        self.collective = collective
+        self.points = points
+        self.metric = metric
+        self.stages = list(stages)
+        self.replicas = replicas
+        self.band = band
+        self.tolerance = tolerance
+        self.window = window
+        self.keep_fraction = keep_fraction
+        self.goal = goal
+        self.seed = seed
+        self.interactions_per_day = interactions_per_day
+
+    def _score(self, value: float) -> float:
+        """Меньше — лучше."""
+        if self.band:
+            return abs(value - (self.band[0] + self.band[1]) / 2)
+        if self.goal == "min":
+            return value
+        return -value
+
+    def _converged(self, history: list) -> bool:
+        if self.tolerance is None or len(history) < self.window:
+            return False
+        recent = history[-self.window:]
+        return max(recent) - min(recent) < self.tolerance
+
+    def run(self, on_stage=None) -> list:
+        """
+        Выполняет перебор. Возвращает по точке: параметры, статус, число дней, последнее значение
+        метрики и ее ряд по дням. on_stage(номер_этапа, горизонт, результаты) — после каждого этапа.
+        """
+        # Ядро коллектива синхронизируется один раз — все точки стартуют из одного состояния
+        self.collective._sync_to_cpp(sync_relations=True)
+        base_configs = list(self.collective.cpp_engine.state.archetype_configs)
+        arch_index = dict(self.collective._arch_map)
+
+        results = [{"point": point, "status": ACTIVE, "days": 0, "value": None, "history": []} for point in self.points]
+        runs = {}
+
+        for stage_idx, horizon in enumerate(self.stages):
+            active = [i for i, r in enumerate(results) if r["status"] == ACTIVE]
+            if not active:
+                break
+            for i in active:
+                if i not in runs:
+                    # Ансамбль точки создается при первом запуске: в памяти только активные точки.
+                    # Общие случайные числа: реплика r каждой точки получает один и тот же поток,
+                    # и различия точек отражают параметры, а не шум реплик
+                    runs[i] = build_ensemble(self.collective, self.replicas, seed=self.seed, sync=False)
+                    apply_point(runs[i], base_configs, arch_index, results[i]["point"])
+                result, ensemble = results[i], runs[i]
+                while result["days"] < horizon:
+                    ensemble.perform_daily_cycle(self.interactions_per_day)
+                    result["days"] += 1
+                    result["history"].append(metric_value(ensemble.summary(), self.metric))
+                result["value"] = result["history"][-1]
+
+                if self.band and not (self.band[0] <= result["value"] <= self.band[1]):
+                    result["status"] = OUT_OF_BAND
+                elif self._converged(result["history"]):
+                    result["status"] = CONVERGED
+                if result["status"] != ACTIVE:
+                    del runs[i] # Память ансамбля освобождается сразу
+
+            survivors = [i for i in active if results[i]["status"] == ACTIVE]
+            if stage_idx == len(self.stages) - 1:
+                for i in survivors:
+                    results[i]["status"] = COMPLETED
+            elif survivors:
+                keep = max(1, int(np.ceil(len(survivors) * self.keep_fraction)))
+                ranked = sorted(survivors, key=lambda i: self._score(results[i]["value"]))
+                for i in ranked[keep:]:
+                    results[i]["status"] = NOT_PROMISING
+                    del runs[i]
+
+            if on_stage:
+                on_stage(stage_idx + 1, horizon, results)
+        return results
+
+    def run_cost(self, results: list) -> int:
+        """Фактически посчитанных реплико-дней."""
+        return sum(r["days"] for r in results) * self.replicas
+
+    def full_cost(self) -> int:
+        """Реплико-дней при исчерпывающем переборе (все точки на полную длину)."""
+        return len(self.points) * self.stages[-1] * self.replicas
@@ -17,6 +17,13 @@ from model.constants import AgentStatus, LocationType, SportType, TimeSlotType
 from core.university_manager import UniversityManager
 from core.interaction_strategy import InteractionStrategy
 
+# Коды статусов в массиве посещаемости (HOME = 0)
+STATUS_ORDER = (AgentStatus.HOME, AgentStatus.IN_CLASS, AgentStatus.BREAK, AgentStatus.GYM)
+HOME, IN_CLASS, BREAK = 0, 1, 2
+
+# Большие залы, которые рассаживаются и обрабатываются по независимым зонам
+ZONED_ROOMS = ("CORRIDOR", "GYM")
+
 
 class UniversityCollective(Collective):
     """
@@ -88,12 +95,14 @@ class UniversityCollective(Collective):
         self.current_rooms = {}  # room_id -> [agent_names]
         self.agent_current_seat = {}  # name -> seat_index
         self.last_interactions = []  # [(name1, name2, status)]
+        self.attendance_rng = np.random.default_rng(seed)  # Прогулы, уходы домой, отбор в спортзал, потоки зон
 
     def add_agent(self, agent: Agent):
         """
         Добавить агента в коллектив и обновить иерархию групп.
         """
         super().add_agent(agent)
+        self.invalidate_roster()
         gid = getattr(agent, 'group_id', None)
         if gid:
             if gid not in self.groups_map:
@@ -147,6 +156,19 @@ class UniversityCollective(Collective):
                 self.groups_map[gid].remove(agent_name)
         
         super().remove_agent(agent_name)
+        self.invalidate_roster()
+
+    def remove_agents(self, agent_names):
+        """
+        Массовое удаление агентов (ротация) с очисткой групп.
+        """
+        drop = set(agent_names)
+        for gid, members in self.groups_map.items():
+            if any(name in drop for name in members):
+                self.groups_map[gid] = [name for name in members if name not in drop]
+        
+        super().remove_agents(agent_names)
+        self.invalidate_roster()
 
     def perform_next_step(self) -> List[Tuple[str, str, str]]:
         """
@@ -199,10 +221,10 @@ class UniversityCollective(Collective):
         
         # Сброс ежедневных статусов в начале дня
         if self.current_slot_idx == 0:
-            for agent in self.agents.values():
-                agent.status = AgentStatus.HOME
-                agent.arrived_today = False
-                agent.left_campus_today = False
+            self._roster()
+            self._status[:] = HOME
+            self._arrived[:] = False
+            self._left[:] = False
 
         interactions = []
 
@@ -215,10 +237,12 @@ class UniversityCollective(Collective):
             interactions = self._handle_gym_slot()
         elif slot_type == TimeSlotType.CLEANUP:
             # Агенты расходятся по домам
-            for agent in self.agents.values():
-                agent.status = AgentStatus.HOME
+            self._roster()
+            self._status[:] = HOME
             interactions = [("System", "All", "Campus_Closed")]
 
+        self._publish_statuses()
+
         self.current_slot_idx += 1
         self.last_interactions = interactions  # Сохраняем для GUI
         
@@ -253,51 +277,40 @@ class UniversityCollective(Collective):
         
         return all_interactions
 
-    def _seat_students(self, room_id: str, student_names: List[str], cols: int) -> List[Optional[str]]:
+    def _seat_students(self, room_id: str, student_names: List[str], cols: int,
+                       capacity: Optional[int] = None, rng=random) -> List[Optional[str]]:
         """
         Алгоритм Умной Рассадки (Софтмакс) — NumPy-оптимизированная версия.
+        capacity задается для зоны зала; rng — поток случайных чисел (по умолчанию общий модуль random).
         """
-        room_info = self.uni_manager.rooms_info.get(room_id, {})
-        capacity = room_info.get("capacity", max(100, len(student_names)))
+        if capacity is None:
+            room_info = self.uni_manager.rooms_info.get(room_id, {})
+            capacity = room_info.get("capacity", max(100, len(student_names)))
+        
+        neighbor_lists = self.uni_manager.seat_grid(capacity, cols).neighbor_lists
         
         seated = [None] * capacity
-        random.shuffle(student_names)
+        free = np.ones(capacity, dtype=bool)
+        rng.shuffle(student_names)
         
         MAX_CANDIDATES = 15
         
         for student_name in student_names:
             agent = self.agents[student_name]
-            empty_indices = [i for i, seat in enumerate(seated) if seat is None]
-            if not empty_indices:
+            empty = np.flatnonzero(free)
+            if empty.size == 0:
                 break
-            
-            # GYM: Фильтр мест по уровню спортивности агента
-            if room_id == "GYM":
-                cluster_id = int(agent.sportiness * 2.99)
-                slice_w = cols / 3.0
-                valid_empty = [i for i in empty_indices if int((i % cols) / slice_w) == cluster_id]
-                if valid_empty:
-                    empty_indices = valid_empty
+            empty_indices = empty.tolist()
             
             # Ограничение выборки кандидатов для производительности
             if len(empty_indices) > MAX_CANDIDATES:
-                empty_indices = random.sample(empty_indices, MAX_CANDIDATES)
+                empty_indices = rng.sample(empty_indices, MAX_CANDIDATES)
             
             # Вычисление приоритетности мест
             seat_weights = []
             for i in empty_indices:
-                neighbors = []
-                if i % cols > 0:
-                    neighbors.append(i - 1)
-                if i % cols < cols - 1 and i + 1 < len(seated):
-                    neighbors.append(i + 1)
-                if i >= cols:
-                    neighbors.append(i - cols)
-                if i + cols < len(seated):
-                    neighbors.append(i + cols)
-                
-                occupied_neighbors = [seated[n] for n in neighbors if 0 <= n < len(seated) and seated[n] is not None]
-                base_weight = 0.5 + random.random() * 0.5
+                occupied_neighbors = [seated[n] for n in neighbor_lists[i] if seated[n] is not None]
+                base_weight = 0.5 + rng.random() * 0.5
                 
                 if not occupied_neighbors:
                     seat_weights.append(base_weight)
@@ -311,50 +324,42 @@ class UniversityCollective(Collective):
             
             # Выбор наиболее желаемого места по взвешенному алгоритму
             choices = list(zip(empty_indices, seat_weights))
-            choices.sort(key=lambda x: random.random() * x[1], reverse=True)
+            choices.sort(key=lambda x: rng.random() * x[1], reverse=True)
             
             seated_successfully = False
             for seat_idx, _ in choices:
-                neighbors = []
-                if seat_idx % cols > 0:
-                    neighbors.append(seat_idx - 1)
-                if seat_idx % cols < cols - 1 and seat_idx + 1 < len(seated):
-                    neighbors.append(seat_idx + 1)
-                if seat_idx >= cols:
-                    neighbors.append(seat_idx - cols)
-                if seat_idx + cols < len(seated):
-                    neighbors.append(seat_idx + cols)
-                
                 refused = False
-                for n_idx in neighbors:
-                    if 0 <= n_idx < len(seated):
-                        n_name = seated[n_idx]
-                        if n_name:
-                            n_agent = self.agents[n_name]
-                            metrics = n_agent.relations.get(student_name, {})
-                            score = InteractionStrategy.priority_score(n_agent, student_name, metrics)
-                            p_accept = math.exp(score) / (math.exp(score) + 1.0)
-                            if random.random() > p_accept:
-                                refused = True
-                                break
-                            ref_chance = InteractionStrategy.calculate_refusal_chance(n_agent, agent)
-                            if random.random() < ref_chance:
-                                refused = True
-                                break
+                for n_idx in neighbor_lists[seat_idx]:
+                    n_name = seated[n_idx]
+                    if n_name:
+                        n_agent = self.agents[n_name]
+                        metrics = n_agent.relations.get(student_name, {})
+                        score = InteractionStrategy.priority_score(n_agent, student_name, metrics)
+                        p_accept = math.exp(score) / (math.exp(score) + 1.0)
+                        if rng.random() > p_accept:
+                            refused = True
+                            break
+                        ref_chance = InteractionStrategy.calculate_refusal_chance(n_agent, agent)
+                        if rng.random() < ref_chance:
+                            refused = True
+                            break
                             
                 if not refused:
                     seated[seat_idx] = student_name
+                    free[seat_idx] = False
                     seated_successfully = True
                     break
                     
             if not seated_successfully:
-                all_empty = [i for i, seat in enumerate(seated) if seat is None]
+                all_empty = np.flatnonzero(free).tolist()
                 if all_empty:
-                    seated[random.choice(all_empty)] = student_name
+                    seat_idx = rng.choice(all_empty)
+                    seated[seat_idx] = student_name
+                    free[seat_idx] = False
                 
         return seated
 
-    def _interact_group(self, group_list: List[str], context: str) -> List[Tuple[str, str, str]]:
+    def _interact_group(self, group_list: List[str], context: str, rng=random) -> List[Tuple[str, str, str]]:
         """
         Топология группового взаимодействия (Клика для участников).
         """
@@ -365,19 +370,20 @@ class UniversityCollective(Collective):
         # Полный граф общения (клика)
         for i in range(len(group_list)):
             for j in range(i + 1, len(group_list)):
-                res = self._interact_pair(group_list[i], group_list[j], context)
+                res = self._interact_pair(group_list[i], group_list[j], context, rng)
                 if res:
                     interactions.append(res)
                 
         return interactions
 
-    def _interact_in_room(self, seated: List[Optional[str]], cols: int, context: str) -> List[Tuple[str, str, str]]:
+    def _interact_in_room(self, seated: List[Optional[str]], cols: int, context: str, rng=random) -> List[Tuple[str, str, str]]:
         """
         Вероятностный выбор собеседника (Neighborhood 4-Way) и динамическое создание групп.
         """
         interactions = []
+        neighbor_lists = self.uni_manager.seat_grid(len(seated), cols).neighbor_lists
         active_indices = [i for i, name in enumerate(seated) if name is not None]
-        random.shuffle(active_indices)
+        rng.shuffle(active_indices)
         interacted = set()
         
         for i in active_indices:
@@ -385,17 +391,7 @@ class UniversityCollective(Collective):
                 continue
             agent1 = self.agents[seated[i]]
             
-            neighbors = []
-            if i % cols > 0:
-                neighbors.append(i - 1)
-            if i % cols < cols - 1 and i + 1 < len(seated):
-                neighbors.append(i + 1)
-            if i >= cols:
-                neighbors.append(i - cols)
-            if i + cols < len(seated):
-                neighbors.append(i + cols)
-            
-            valid_n = [n for n in neighbors if 0 <= n < len(seated) and seated[n] is not None and n not in interacted]
+            valid_n = [n for n in neighbor_lists[i] if seated[n] is not None and n not in interacted]
             if not valid_n:
                 continue
                 
@@ -413,13 +409,13 @@ class UniversityCollective(Collective):
             
             group_indices = [i]
             while True:
-                chosen_n = random.choices(valid_n, weights=weights, k=1)[0]
+                chosen_n = rng.choices(valid_n, weights=weights, k=1)[0]
                 if chosen_n is None or chosen_n in group_indices:
                     break
                 group_indices.append(chosen_n)
                 
             group_names = [seated[idx] for idx in group_indices]
-            res_interactions = self._interact_group(group_names, context)
+            res_interactions = self._interact_group(group_names, context, rng)
             interactions.extend(res_interactions)
             
             for idx in group_indices:
@@ -427,6 +423,131 @@ class UniversityCollective(Collective):
             
         return interactions
 
+    def invalidate_roster(self):
+        """
+        Сбрасывает кэш состава и параметров посещаемости. Вызывается при изменении состава,
+        групп или параметров агента (sportiness, skip_tendency — например, из диалога GUI).
+        """
+        self._roster_cache = None
+
+    def _roster(self):
+        """
+        Имена, агенты, строки тензора расписания их групп и параметры посещаемости
+        (кэш до invalidate_roster). При пересборке массивы статусов,
+        прихода и ухода за день восстанавливаются по агентам.
+        """
+        roster = getattr(self, '_roster_cache', None)
+        if roster is None:
+            names = list(self.agents)
+            agents = [self.agents[name] for name in names]
+            group_rows = self.uni_manager.group_indices([getattr(agent, 'group_id', None) for agent in agents])
+            skip_tendency = np.array([agent.skip_tendency for agent in agents], dtype=np.float64)
+            sportiness = np.array([agent.sportiness for agent in agents], dtype=np.float64)
+            roster = self._roster_cache = (names, agents, group_rows, skip_tendency, sportiness)
+
+            self._status = np.array([STATUS_ORDER.index(agent.status) for agent in agents], dtype=np.int8)
+            self._arrived = np.array([getattr(agent, 'arrived_today', agent.status != AgentStatus.HOME) for agent in agents], dtype=bool)
+            self._left = np.array([getattr(agent, 'left_campus_today', False) for agent in agents], dtype=bool)
+            self._published_status = self._status.copy()
+            self._published_arrived = self._arrived.copy()
+            self._published_left = self._left.copy()
+            wings = {faculty: k for k, faculty in enumerate(self.uni_manager.FACULTY_NAMES)}
+            self._zone_of = {
+                "CORRIDOR": np.array([wings.get(getattr(agent, 'faculty', None), 0) for agent in agents], dtype=np.intp),
+                "GYM": (sportiness * 2.99).astype(np.intp),
+            }
+            if getattr(self, 'attendance_rng', None) is None:
+                self.attendance_rng = np.random.default_rng(self.seed) # Коллектив из старой контрольной точки
+        return roster
+
+    def _publish_statuses(self):
+        """Переносит изменившиеся статусы и отметки прихода/ухода за день в объекты агентов (для GUI)."""
+        agents = self._roster()[1]
+        changed = np.flatnonzero(
+            (self._status != self._published_status)
+            | (self._arrived != self._published_arrived)
+            | (self._left != self._published_left)
+        )
+        for i in changed:
+            agent = agents[i]
+            agent.status = STATUS_ORDER[self._status[i]]
+            agent.arrived_today = bool(self._arrived[i])
+            agent.left_campus_today = bool(self._left[i])
+        self._published_status[changed] = self._status[changed]
+        self._published_arrived[changed] = self._arrived[changed]
+        self._published_left[changed] = self._left[changed]
+
+    def _group_by_room(self, names: List[str], assigned: np.ndarray) -> Dict[str, List[str]]:
+        """
+        Группирует агентов по индексам аудиторий (-1 — вне аудиторий). Аудитории идут в порядке
+        первого появления, агенты внутри — в исходном порядке (от этого зависит рассадка).
+        """
+        present = np.flatnonzero(assigned >= 0)
+        if present.size == 0:
+            return {}
+        room_of = assigned[present]
+        order = np.argsort(room_of, kind="stable")
+        unique, first, counts = np.unique(room_of, return_index=True, return_counts=True)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        room_ids = self.uni_manager.room_ids
+        return {
+            room_ids[unique[k]]: [names[j] for j in present[order[starts[k]:starts[k] + counts[k]]]]
+            for k in np.argsort(first)
+        }
+
+    def _spill_zone_overflow(self, zone_of: np.ndarray, capacities: List[int]) -> np.ndarray:
+        """
+        Переносит избыток переполненных зон в ближайшие зоны со свободными местами
+        (сначала соседние, при равном удалении — с меньшим номером). Переносимые агенты
+        выбираются случайно; без переполнения поток случайных чисел не расходуется.
+        Агенты сверх вместимости всего зала остаются в своей зоне и не рассаживаются.
+        """
+        counts = np.bincount(zone_of, minlength=len(capacities))
+        free = np.asarray(capacities) - counts
+        if (free >= 0).all() or (free <= 0).all():
+            return zone_of
+        zone_of = zone_of.copy()
+        for k in np.flatnonzero(free < 0):
+            overflow = self.attendance_rng.permutation(np.flatnonzero(zone_of == k))[:-free[k]]
+            for target in sorted(range(len(capacities)), key=lambda z: (abs(z - k), z)):
+                if overflow.size == 0:
+                    break
+                if target == k or free[target] <= 0:
+                    continue
+                moved, overflow = overflow[:free[target]], overflow[free[target]:]
+                zone_of[moved] = target
+                free[target] -= moved.size
+                free[k] += moved.size
+        return zone_of
+
+    def _seat_in_zones(self, room_id: str, members: np.ndarray, context: str):
+        """
+        Рассадка и общение в большом зале по независимым зонам (крылья холла, секции спортзала).
+        Зона получает своих агентов (индексы состава members), ограниченную вместимость и
+        собственный поток случайных чисел: результат зоны не зависит от остальных зон и порядка их обработки.
+        Избыток переполненной зоны уходит в соседние (_spill_zone_overflow). Зоны обрабатываются
+        последовательно: общение — Python-код над общими объектами агентов.
+        Возвращает рассадку в сетке всего зала и взаимодействия.
+        """
+        names = self._roster()[0]
+        zones = self.uni_manager.room_zones(room_id)
+        seeds = self.attendance_rng.integers(0, 2**63 - 1, size=len(zones))
+        zone_of = self._spill_zone_overflow(self._zone_of[room_id][members], [len(seat_ids) for seat_ids, _ in zones])
+        
+        seated = [None] * self.uni_manager.rooms_info[room_id]["capacity"]
+        interactions = []
+        for k, (seat_ids, cols) in enumerate(zones):
+            zone_members = [names[i] for i in members[zone_of == k]]
+            if not zone_members:
+                continue
+            rng = random.Random(int(seeds[k]))
+            zone_seated = self._seat_students(f"{room_id}#{k}", zone_members, cols, capacity=len(seat_ids), rng=rng)
+            interactions.extend(self._interact_in_room(zone_seated, cols, context, rng))
+            for local_idx, name in enumerate(zone_seated):
+                if name:
+                    seated[seat_ids[local_idx]] = name
+        return seated, interactions
+
     def _handle_study_slot(self, slot_idx: int, day_idx: int) -> List[Tuple[str, str, str]]:
         """
         Учебный слот: рассадка по аудиториям согласно расписанию.
@@ -434,51 +555,51 @@ class UniversityCollective(Collective):
         interactions = []
         self.current_rooms = {}
         
-        room_assignments = {}
-        for name, agent in self.agents.items():
-            if getattr(agent, 'left_campus_today', False):
-                continue
-            
-            if random.random() < agent.skip_tendency:
-                if getattr(agent, 'arrived_today', False):
-                    agent.left_campus_today = True
-                agent.status = AgentStatus.HOME
-                continue
-                
-            schedule = self.uni_manager.get_group_schedule(agent.group_id, day_idx)
-            room_id = "EMPTY"
-            if slot_idx < len(schedule):
-                room_id = schedule[slot_idx]
-                
-            if room_id == "EMPTY":
-                if not getattr(agent, 'arrived_today', False):
-                    agent.status = AgentStatus.HOME
-                else:
-                    has_more_classes = any(r != "EMPTY" for r in schedule[slot_idx + 1:]) if slot_idx < len(schedule) else False
-                    
-                    if has_more_classes or random.random() < agent.sportiness:
-                        room_id = "CORRIDOR"
-                        agent.status = AgentStatus.BREAK
-                        if room_id not in room_assignments:
-                            room_assignments[room_id] = []
-                        room_assignments[room_id].append(name)
-                    else:
-                        agent.status = AgentStatus.HOME
-                        agent.left_campus_today = True
-            else:
-                agent.arrived_today = True
-                agent.status = AgentStatus.IN_CLASS
-                if room_id not in room_assignments:
-                    room_assignments[room_id] = []
-                room_assignments[room_id].append(name)
+        names, _, group_rows, skip_tendency, sportiness = self._roster()
+        schedule, has_later_class = self.uni_manager.compiled_schedule()
+        rooms = schedule[group_rows, day_idx, slot_idx]
+        has_more_classes = has_later_class[group_rows, day_idx, slot_idx]
+        corridor = self.uni_manager.room_index["CORRIDOR"]
+        status, arrived, left = self._status, self._arrived, self._left
+        skip_draw, stay_draw = self.attendance_rng.random((2, len(names)))
+
+        # Прогул пары: пришедший на кампус уходит до конца дня
+        on_campus = ~left
+        skipped = on_campus & (skip_draw < skip_tendency)
+        left |= skipped & arrived
+        status[skipped] = HOME
+
+        # Окно в расписании: остаются в коридоре, если впереди занятия или по спортивности
+        attends = on_campus & ~skipped
+        free = attends & (rooms < 0)
+        to_corridor = free & arrived & (has_more_classes | (stay_draw < sportiness))
+        to_home = free & ~to_corridor
+        left |= to_home & arrived
+        status[to_home] = HOME
+        status[to_corridor] = BREAK
+
+        in_class = attends & (rooms >= 0)
+        arrived |= in_class
+        status[in_class] = IN_CLASS
+
+        assigned = np.full(len(names), -1, dtype=np.int32)
+        assigned[in_class] = rooms[in_class]
+        assigned[to_corridor] = corridor
+        room_assignments = self._group_by_room(names, assigned)
                 
         # Рассадка и общение внутри аудиторий
         for room_id, students in room_assignments.items():
-            cols = self.uni_manager.get_room_cols(room_id)
+            if room_id in ZONED_ROOMS:
+                members = np.flatnonzero(assigned == self.uni_manager.room_index[room_id])
+                seated, room_interactions = self._seat_in_zones(room_id, members, context='STUDY')
+                for idx, name in enumerate(seated):
+                    if name:
+                        self.agent_current_seat[name] = idx
+                self.current_rooms[room_id] = seated
+                interactions.extend(room_interactions)
+                continue
             
-            if room_id == "CORRIDOR":
-                random.shuffle(students)
-                
+            cols = self.uni_manager.get_room_cols(room_id)
             seated = self._seat_students(room_id, students, cols)
             
             # Сохранение мест рассадки для визуализации GUI
@@ -496,40 +617,30 @@ class UniversityCollective(Collective):
         """
         Перемена: перемещение студентов в коридор и рассадка по интересам.
         """
-        corridor_students = [n for n, a in self.agents.items() if a.status != AgentStatus.HOME]
-        cols = self.uni_manager.get_room_cols("CORRIDOR")
-        
-        random.shuffle(corridor_students)
-        seated = self._seat_students("CORRIDOR", corridor_students, cols)
+        self._roster()
+        seated, interactions = self._seat_in_zones("CORRIDOR", np.flatnonzero(self._status != HOME), context='BREAK')
         for idx, name in enumerate(seated):
             if name:
                 self.agent_current_seat[name] = idx
             
         self.current_rooms = {"CORRIDOR": seated}
-        interactions = self._interact_in_room(seated, cols, context='BREAK')
         return interactions
 
     def _handle_gym_slot(self) -> List[Tuple[str, str, str]]:
         """
         Спортивный слот: тренировка спортивных студентов в залах по секциям.
         """
-        gym_students = []
-        for name, agent in self.agents.items():
-            if agent.status == AgentStatus.HOME:
-                continue
-            if random.random() < agent.sportiness:
-                gym_students.append(name)
-            else:
-                agent.status = AgentStatus.HOME
+        names, _, _, _, sportiness = self._roster()
+        on_campus = self._status != HOME
+        trains = on_campus & (self.attendance_rng.random(len(names)) < sportiness)
+        self._status[on_campus & ~trains] = HOME
 
-        cols = self.uni_manager.get_room_cols("GYM")
-        seated_gym = self._seat_students("GYM", gym_students, cols)
+        seated_gym, interactions = self._seat_in_zones("GYM", np.flatnonzero(trains), context='GYM')
         for idx, name in enumerate(seated_gym):
             if name:
                 self.agent_current_seat[name] = idx
             
         self.current_rooms = {"GYM": seated_gym}
-        interactions = self._interact_in_room(seated_gym, cols, context='GYM')
         return interactions
 
     def _handle_sunday(self) -> List[Tuple[str, str, str]]:
@@ -574,6 +685,23 @@ class UniversityCollective(Collective):
             print(f">>> Начало весеннего семестра {self.current_academic_year} года. Семестров пройдено: {self.semesters_passed}", flush=True)
             return
 
+    def fast_forward_to_next_event(self) -> int:
+        """
+        Пропускает дни без расчета до ближайшего календарного события (начало семестра,
+        ротация): состояние коллектива считается стационарным и не меняется. Вызывается
+        на границе дня. Возвращает число пропущенных дней.
+        """
+        semesters = self.semesters_passed
+        skipped = 0
+        while self.semesters_passed == semesters:
+            self.current_step += 1
+            self.current_date += datetime.timedelta(days=1)
+            skipped += 1
+            self._check_academic_cycle()
+        self.current_slot_idx = 0
+        self.current_rooms = {}
+        return skipped
+
     def _handle_graduation_and_enrollment(self):
         """
         Интеллектуальная ротация: Бакалавры -> Магистры.
@@ -620,19 +748,17 @@ class UniversityCollective(Collective):
         
         self.current_academic_year += 1
         
-        # Удаление выпускников и чистка памяти
-        for g_name in graduates_to_remove:
-            self.remove_agent(g_name)
+        # Удаление выпускников: сжатие матрицы отношений по маске сохраняемых индексов
+        self.remove_agents(graduates_to_remove)
             
+        continuant_ids = {c.id for c in continuants}
         for agent in self.agents.values():
-            if agent not in continuants:
-                for g_name in graduates_to_remove:
-                    if g_name in agent.relations:
-                        del agent.relations[g_name]
+            if agent.id not in continuant_ids:
                 agent.course_year = min(4 if agent.degree_type == "BACHELOR" else 2, agent.course_year + 1)
         
         # Сброс C++ ядра для пересоздания с новыми индексами
         self.cpp_engine = None
+        self.invalidate_roster() # У продолживших в магистратуре сменились группы
         self._update_id_maps()
             
         print("----------------------------------------", flush=True)
@@ -644,7 +770,7 @@ class UniversityCollective(Collective):
         for agent in self.agents.values():
             agent.emotion_vector = [random.randint(-30, 30) for _ in range(7)]
 
-    def _interact_pair(self, name1: str, name2: str, context: Optional[str] = None) -> Tuple[str, str, str]:
+    def _interact_pair(self, name1: str, name2: str, context: Optional[str] = None, rng=random) -> Tuple[str, str, str]:
         """
         Моделирует парный дискретный акт общения.
         """
@@ -652,7 +778,7 @@ class UniversityCollective(Collective):
         
         # Проверка на отказ собеседника (Sigma = 0)
         refusal_chance = InteractionStrategy.calculate_refusal_chance(a2, a1)
-        if random.random() < refusal_chance:
+        if rng.random() < refusal_chance:
             InteractionStrategy.process_refusal(a1, a2)
             return (name1, name2, "refusal")
             
@@ -661,7 +787,7 @@ class UniversityCollective(Collective):
         success_chance = math.exp(score) / (math.exp(score) + 1.0)
         success_chance = max(0.1, min(0.9, success_chance))
         
-        success = random.random() < success_chance
+        success = rng.random() < success_chance
         InteractionStrategy.process_interaction_result(a1, a2, "success" if success else "failure", context)
         
         return (name1, name2, "success" if success else "fail")
@@ -0,0 +1,54 @@
+import argparse
+import sys
+import os
+
+# Добавляем корневую директорию проекта в path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+from core.clickhouse_writer import SpillStore, replay_spill
+
+
+def main():
+    """
+    Переигрывает в ClickHouse пакеты, сброшенные на диск при недоступности СУБД.
+    Параметры подключения берутся из .env (как у ClickHouseLogger).
+    """
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Replay spilled ClickHouse batches")
+    parser.add_argument("--spill-dir", default=os.getenv("CLICKHOUSE_SPILL_DIR", os.path.join("data", "output", "clickhouse_spill")))
+    parser.add_argument("--dry-run", action="store_true", help="Только показать ожидающие пакеты")
+    args = parser.parse_args()
+
+    store = SpillStore(args.spill_dir)
+    files = store.pending()
+    print(f"Ожидают реплея: {len(files)} пакетов в {args.spill_dir}", flush=True)
+    if args.dry_run:
+        for path in files:
+            batch = SpillStore.load(path)
+            print(f"  {os.path.basename(path)}: {batch.table}, строк: {len(batch.data[0]) if batch.data else 0}", flush=True)
+        return
+    if not files:
+        return
+
+    import clickhouse_connect
+    client = clickhouse_connect.get_client(
+        host=os.getenv("CLICKHOUSE_HOST", "localhost"),
+        port=int(os.getenv("CLICKHOUSE_PORT", "8123")),
+        username=os.getenv("CLICKHOUSE_USER", "default"),
+        password=os.getenv("CLICKHOUSE_PASSWORD", "clickhouse_pass"),
+        secure=os.getenv("CLICKHOUSE_SECURE", "False").lower() in ("true", "1", "yes"),
+        settings={'insert_deduplicate': 0}
+    )
+    try:
+        written, remaining = replay_spill(client, args.spill_dir)
+    except Exception as e:
+        print(f"Ошибка реплея: {e}", file=sys.stderr, flush=True)
+        sys.exit(1)
+    finally:
+        client.close()
+    print(f"Записано пакетов: {written}, осталось: {remaining}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
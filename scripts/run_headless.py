@@ -80,6 +80,7 @@ def main():
         
     session = SimulationSession()
     session.run_scenario(args.scenario, override_steps=args.steps)
+    session.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,98 @@
+import argparse
+import sys
+import os
+import json
+import time
+
+# Добавляем корневую директорию проекта в path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model.collective import Collective
+from core.agent_factory import AgentFactory
+from scripts.run_headless import generate_research_agents
+from model.sweep import ParameterSweep, grid_design, latin_hypercube
+
+# Пример спецификации перебора (JSON):
+# {
+#     "scenario": "scripts/test_scenario.json",
+#     "design": "lhs",                       # "grid" — значения списками, "lhs" — диапазоны [min, max]
+#     "samples": 24,
+#     "space": {"*.temperature": [0.3, 2.0], "HARMONY.refusal_chance": [0.05, 0.5]},
+#     "metric": "trust",
+#     "band": [20, 80],
+#     "tolerance": 0.5, "window": 20,
+#     "stages": [30, 90, 300],
+#     "keep_fraction": 0.5,
+#     "replicas": 4,
+#     "seed": 0
+# }
+
+
+def main():
+    """
+    Перебор параметров архетипов по плану (сетка или латинский гиперкуб) с ранней остановкой.
+    Итог: data/output/sweeps/<имя спецификации>.json — параметры, статус и ряд метрики по точкам.
+    """
+    parser = argparse.ArgumentParser(description="Перебор параметров архетипов с ранней остановкой")
+    parser.add_argument("spec", type=str, help="JSON-спецификация перебора")
+    parser.add_argument("--output", type=str, help="Путь результата (по умолчанию data/output/sweeps/<spec>.json)")
+    args = parser.parse_args()
+
+    with open(args.spec, 'r', encoding='utf-8') as f:
+        spec = json.load(f)
+    with open(spec["scenario"], 'r', encoding='utf-8') as f:
+        scenario = json.load(f)
+
+    design = spec.get("design", "grid")
+    if design == "grid":
+        points = grid_design(spec["space"])
+    elif design == "lhs":
+        points = latin_hypercube(spec["space"], int(spec.get("samples", 16)), seed=spec.get("seed"))
+    else:
+        print(f"Error: unknown design '{design}' (grid | lhs)", file=sys.stderr)
+        sys.exit(1)
+
+    # Популяция строится так же, как SimulationSession.load_scenario, но без приемников логов
+    collective = Collective(seed=scenario.get("seed"))
+    for agent in generate_research_agents(scenario):
+        collective.add_agent(agent)
+    names = list(collective.agents.keys())
+    for agent in collective.agents.values():
+        AgentFactory.initialize_agent_relations(agent, names)
+
+    sweep = ParameterSweep(
+        collective, points,
+        metric=spec.get("metric", "trust"),
+        stages=spec.get("stages", (30, 90, 300)),
+        replicas=int(spec.get("replicas", 4)),
+        band=spec.get("band"),
+        tolerance=spec.get("tolerance"),
+        window=int(spec.get("window", 20)),
+        keep_fraction=float(spec.get("keep_fraction", 0.5)),
+        goal=spec.get("goal"),
+        seed=int(spec.get("seed") or 0),
+    )
+    print(f"Перебор: {len(points)} точек ({design}), этапы {sweep.stages}, метрика {sweep.metric}", flush=True)
+
+    started = time.time()
+    def on_stage(stage, horizon, results):
+        counts = {}
+        for r in results:
+            counts[r["status"]] = counts.get(r["status"], 0) + 1
+        print(f"  [Progress] этап {stage} (горизонт {horizon} дн.): {counts}", flush=True)
+    results = sweep.run(on_stage=on_stage)
+
+    spent, full = sweep.run_cost(results), sweep.full_cost()
+    print(f"Посчитано {spent} реплико-дней из {full} при полном переборе ({spent / full:.0%}) за {time.time() - started:.1f} с", flush=True)
+
+    name = os.path.splitext(os.path.basename(args.spec))[0]
+    output = args.output or os.path.join("data", "output", "sweeps", f"{name}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({"spec": spec, "replica_days": spent, "replica_days_full": full, "results": results},
+                  f, ensure_ascii=False, indent=1)
+    print(f"Результат: {output}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,23 @@
 import os
 import sys
 import json
+import zlib
 import subprocess
 import time
+import threading
+import traceback
+from contextlib import redirect_stdout, redirect_stderr
 from datetime import datetime
+from multiprocessing.util import Finalize
+from queue import Empty
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.batch_scheduler import plan_batch, configure_worker_threads, estimate_config_memory, MemoryGate
+from core.checkpoint import checkpoint_path_for
+from core.result_cache import ResultCache, run_key, describe
+from core.telemetry import TelemetryWriter, telemetry_path_for
+from core.job_queue import JobQueue, worker_id, DEFAULT_LEASE_SECONDS, PENDING, RUNNING, FAILED
 
 # Варианты изначальных отношений (Варианты 1, 2, 3)
 RELATION_MODES = ["EMPTY", "RANDOM", "MIXED"]
@@ -48,6 +62,12 @@ HETEROGENEOUS_RUNS = {
 
 ALL_RUNS = {**HOMOGENEOUS_RUNS, **HETEROGENEOUS_RUNS}
 ARCHIVE_DIR = "scenarios_archive"
+BATCH_LOG_DIR = os.path.join("data", "output", "batch_logs")
+CHECKPOINT_EVERY_DAYS = 30
+
+# Состояние долгоживущего воркера (заполняется в _init_worker один раз на процесс)
+_worker_events = None
+_worker_ch_logger = None
 
 def generate_config(run_id: str, mode: str, counts: dict) -> str:
     scenario_name = f"{run_id}_{mode}"
@@ -59,19 +79,55 @@ def generate_config(run_id: str, mode: str, counts: dict) -> str:
         "master_counts": {k: max(1, int(v * 0.08)) for k, v in counts.items()} if counts else {},
         "initial_relations_mode": mode,
         "semesters": 8,
-        "seed": hash(scenario_name) % 1000000 # Фиксируем seed для воспроизводимости (до миллиона для C++)
+        # Фиксируем seed для воспроизводимости (до миллиона для C++); crc32 не зависит от PYTHONHASHSEED
+        "seed": zlib.crc32(scenario_name.encode("utf-8")) % 1000000
     }
     
     filepath = os.path.join(ARCHIVE_DIR, f"{scenario_name}.json")
+    content = json.dumps(config, indent=4, ensure_ascii=False)
+    # Неизменный сценарий не перезаписывается
+    if os.path.exists(filepath):
+        with open(filepath, "r", encoding="utf-8") as f:
+            if f.read() == content:
+                return filepath
     with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(config, f, indent=4, ensure_ascii=False)
+        f.write(content)
         
     return filepath
 
+def cache_key(config_path: str) -> str:
+    with open(config_path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    return run_key(config, semesters=config.get("semesters", 8))
+
+def _done_marker(scenario: str) -> str:
+    return checkpoint_path_for(scenario) + ".done"
+
+def is_completed(config_path: str) -> bool:
+    return os.path.exists(_done_marker(os.path.splitext(os.path.basename(config_path))[0]))
+
+def reset_progress(config_path: str):
+    """Новый расчет сценария с нуля: контрольная точка и отметка о завершении удаляются."""
+    scenario = os.path.splitext(os.path.basename(config_path))[0]
+    for path in (checkpoint_path_for(scenario), _done_marker(scenario)):
+        if os.path.exists(path):
+            os.remove(path)
+
+def _mark_completed(scenario: str):
+    os.makedirs(os.path.dirname(_done_marker(scenario)), exist_ok=True)
+    with open(_done_marker(scenario), "w", encoding="utf-8") as f:
+        f.write(datetime.now().isoformat(timespec="seconds"))
+
 def run_simulation(config_path: str, is_test: bool = False):
     python_bin = "./venv/bin/python" if os.path.exists("./venv/bin/python") else "python"
     
-    cmd = [python_bin, "main.py", "--university", "--silent", "--scenario", config_path]
+    scenario = os.path.splitext(os.path.basename(config_path))[0]
+    checkpoint = checkpoint_path_for(scenario)
+    cmd = [python_bin, "main.py", "--university", "--silent", "--checkpoint", checkpoint,
+           "--checkpoint-every", str(CHECKPOINT_EVERY_DAYS), "--telemetry", telemetry_path_for(scenario),
+           "--force"] # Кэш результатов уже проверен пакетом
+    # Упавший ранее сценарий продолжается с контрольной точки
+    cmd.extend(["--resume", checkpoint] if os.path.exists(checkpoint) and not is_test else ["--scenario", config_path])
     if is_test:
         cmd.extend(["--semesters", "0"]) # В тестовом режиме 0 семестров (или минимально)
         cmd.extend(["--steps", "1"])
@@ -92,31 +148,320 @@ def run_simulation(config_path: str, is_test: bool = False):
         print(f"Ошибка при выполнении {config_path}")
         print(process.stderr.read())
         return False
+    if not is_test:
+        _mark_completed(scenario)
+    return True
+
+def _init_worker(events, core_slots, threads):
+    """
+    Инициализация воркера пула: свой набор ядер забирается из core_slots и возвращается туда при выходе
+    процесса. Если свободных наборов нет (замена упавшего воркера), воркер работает без привязки к ядрам.
+    """
+    try:
+        cores = core_slots.get_nowait()
+    except Empty:
+        cores = None
+    else:
+        Finalize(None, _return_core_slot, args=(core_slots, cores), exitpriority=10)
+    _setup_worker(events, threads, cores)
+
+def _return_core_slot(core_slots, cores):
+    try:
+        core_slots.put(cores)
+    except Exception:
+        pass # Пакет уже завершен, менеджер очереди остановлен
+
+def _setup_worker(events, threads, cores):
+    """
+    Подготовка долгоживущего воркера: модели, скомпилированное ядро и таблица архетипов
+    импортируются один раз, соединение с ClickHouse переиспользуется всеми сценариями процесса.
+    OpenMP ограничивается и процесс привязывается к cores до импорта ядра.
+    """
+    global _worker_events, _worker_ch_logger
+    _worker_events = events
+    configure_worker_threads(threads, cores)
+
+    import model.archetypes  # noqa: F401  (таблица архетипов)
+    import model.university_collective  # noqa: F401
+    import model.simulation_session as simulation_session
+    try:
+        import emotion_engine  # noqa: F401
+    except ImportError:
+        pass
+
+    if simulation_session.ClickHouseLogger:
+        try:
+            with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+                logger = simulation_session.ClickHouseLogger()
+            _worker_ch_logger = logger if logger.client else None
+        except Exception:
+            _worker_ch_logger = None
+
+def _emit(event: str, scenario: str, telemetry=None, **payload):
+    """Событие в общий канал пакета (консоль) и, если передан, в файл телеметрии сценария."""
+    _worker_events.put({"event": event, "scenario": scenario, "pid": os.getpid(), "time": time.time(), **payload})
+    if telemetry:
+        telemetry.emit(event, **payload)
+
+def run_scenario_in_worker(config_path: str, is_test: bool = False) -> bool:
+    """
+    Выполняет университетский сценарий внутри воркера; вывод симуляции пишется в BATCH_LOG_DIR.
+    Каждые CHECKPOINT_EVERY_DAYS дней пишется контрольная точка; если она осталась от упавшего
+    расчета, сценарий продолжается с нее тем же запуском. Телеметрия — в TELEMETRY_DIR/<сценарий>.jsonl.
+    """
+    from model.simulation_session import SimulationSession
+    from core.world_snapshot import warm_start_university
+
+    scenario = os.path.splitext(os.path.basename(config_path))[0]
+    checkpoint = checkpoint_path_for(scenario)
+    resume = os.path.exists(checkpoint) and not is_test
+    os.makedirs(BATCH_LOG_DIR, exist_ok=True)
+    started = time.time()
+    telemetry = TelemetryWriter(telemetry_path_for(scenario), scenario, append=resume)
+    _emit("started", scenario, telemetry, resumed=resume)
+
+    with open(os.path.join(BATCH_LOG_DIR, f"{scenario}.log"), "a" if resume else "w", encoding="utf-8") as log, \
+            redirect_stdout(log), redirect_stderr(log):
+        try:
+            if resume:
+                session = SimulationSession.from_checkpoint(checkpoint, ch_logger=_worker_ch_logger)
+                config = session.collective.config
+            else:
+                with open(config_path, "r", encoding="utf-8") as f:
+                    config = json.load(f)
+
+                univ = warm_start_university(config)
+                session = SimulationSession(
+                    collective=univ,
+                    run_name=config.get("run_name", "Headless University Run"),
+                    description=config.get("description", ""),
+                    scenario_name=config.get("scenario_name", scenario),
+                    logging_policy=config.get("logging"),
+                    steady_state=config.get("steady_state"),
+                    ch_logger=_worker_ch_logger
+                )
+            session.telemetry = telemetry
+
+            if is_test:
+                session.run_day()
+            else:
+                def on_progress(day, semesters_passed, target):
+                    if day % 10 == 0:
+                        _emit("progress", scenario, day=day, semesters=semesters_passed, target=target)
+                remaining = max(0, config.get("semesters", 8) - session.collective.semesters_passed)
+                session.run_semesters(remaining, on_progress=on_progress,
+                                      checkpoint_path=checkpoint, checkpoint_every=CHECKPOINT_EVERY_DAYS)
+            session.close()
+            if not is_test:
+                ResultCache().record(run_key(config, semesters=config.get("semesters", 8)), scenario, session)
+                _mark_completed(scenario)
+                if os.path.exists(checkpoint):
+                    os.remove(checkpoint)
+        except Exception as e:
+            traceback.print_exc()
+            _emit("failed", scenario, telemetry, error=f"{type(e).__name__}: {e}")
+            telemetry.close()
+            return False
+
+    _emit("finished", scenario, telemetry, elapsed=time.time() - started)
+    telemetry.close()
     return True
 
+def _run_task(task):
+    return run_scenario_in_worker(*task)
+
+def _format_event(event) -> str:
+    stamp = datetime.fromtimestamp(event["time"]).strftime('%H:%M:%S')
+    name = event["scenario"]
+    if event["event"] == "started":
+        resumed = " — продолжение с контрольной точки" if event.get("resumed") else ""
+        return f"[{stamp}] Выполнение: {name} (воркер {event['pid']}){resumed}"
+    if event["event"] == "progress":
+        return f"  [Progress] {name}: день {event['day']}, семестров {event['semesters']}/{event['target']}"
+    if event["event"] == "finished":
+        return f"[{stamp}] Завершено: {name} за {event['elapsed']/60:.1f} мин"
+    if event["event"] == "failed":
+        return f"[{stamp}] Ошибка при выполнении {name}: {event['error']} (лог: {BATCH_LOG_DIR}/{name}.log)"
+    return None
+
+def _print_events(events):
+    """Печатает структурированные события воркеров пула."""
+    while True:
+        event = events.get()
+        if event is None:
+            return
+        line = _format_event(event)
+        if line:
+            print(line, flush=True)
+
+class _ConsoleEvents:
+    """Канал событий воркера очереди: сразу в консоль процесса (stdout сценария перенаправлен в его лог)."""
+
+    def put(self, event):
+        line = _format_event(event)
+        if line:
+            print(line, file=sys.__stdout__, flush=True)
+
+def serve_queue(queue_path: str, threads: int = 1, cores=None, lease: float = DEFAULT_LEASE_SECONDS,
+                wait: bool = True, poll: float = 5.0) -> tuple:
+    """
+    Воркер файловой очереди: забирает сценарии из JobQueue под аренду, продлевает ее во время расчета
+    и отмечает итог. Задание пропавшего воркера вернется в очередь по истечении аренды и продолжится
+    с его контрольной точки. wait=True — не завершаться, пока в очереди есть выполняющиеся задания
+    (их может понадобиться подобрать). Возвращает (выполнено, неудачно).
+    """
+    queue = JobQueue(queue_path)
+    owner = worker_id()
+    _setup_worker(_ConsoleEvents(), threads, cores)
+    done = failed = 0
+    while True:
+        job = queue.claim(owner, lease)
+        if job is None:
+            counts = queue.counts()
+            if counts.get(PENDING) or (wait and counts.get(RUNNING)):
+                time.sleep(poll)
+                continue
+            return done, failed
+        with queue.leased(job, owner, lease) as lost:
+            ok = run_scenario_in_worker(job.payload["config_path"], job.payload.get("is_test", False))
+        if lost.is_set():
+            print(f"Очередь: аренда {job.id} перехвачена другим воркером, итог не записывается", file=sys.__stdout__, flush=True)
+        elif ok:
+            queue.complete(job.id, owner)
+            done += 1
+        else:
+            queue.fail(job.id, owner, error=f"см. {BATCH_LOG_DIR}/{job.id}.log")
+            failed += 1
+
+def _serve_queue_process(queue_path, threads, cores, lease):
+    serve_queue(queue_path, threads, cores, lease)
+
+def _run_queue_workers(queue_path: str, plan, lease: float):
+    """Запускает plan.workers локальных воркеров очереди (каждый на своем наборе ядер) и ждет их."""
+    from multiprocessing import Process
+    processes = [Process(target=_serve_queue_process, args=(queue_path, plan.threads_per_worker, cores, lease))
+                 for cores in plan.core_slices]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+def _run_admitted(pool, tasks, plan):
+    """
+    Отдает задачи пулу по мере освобождения памяти: сначала крупные сценарии,
+    свободные места добираются меньшими. Возвращает список результатов.
+    """
+    pending = sorted(((estimate_config_memory(task[0]), task) for task in tasks), key=lambda item: -item[0])
+    gate = MemoryGate(plan.memory_budget)
+    cond = threading.Condition()
+    results = []
+
+    def finished(ok, need):
+        with cond:
+            results.append(bool(ok))
+            gate.release(need)
+            cond.notify()
+
+    with cond:
+        while pending or gate.running:
+            admitted = None
+            if gate.running < plan.workers:
+                admitted = next((i for i, (need, _) in enumerate(pending) if gate.can_admit(need)), None)
+            if admitted is None:
+                cond.wait()
+                continue
+            need, task = pending.pop(admitted)
+            if plan.memory_budget and need > plan.memory_budget:
+                print(f"Scheduler: {os.path.basename(task[0])} (~{need / 2**30:.1f} ГБ) больше бюджета памяти, запускается в одиночку", flush=True)
+            gate.acquire(need)
+            pool.apply_async(
+                _run_task, (task,),
+                callback=lambda ok, need=need: finished(ok, need),
+                error_callback=lambda e, need=need: finished(False, need)
+            )
+    return results
+
 def main():
     import argparse
-    from multiprocessing import Pool
+    from multiprocessing import Pool, Manager
     
     parser = argparse.ArgumentParser()
     parser.add_argument("--test", action="store_true", help="Запустить по 1 шагу для проверки работоспособности")
-    parser.add_argument("--workers", type=int, default=10, help="Количество параллельных процессов")
+    parser.add_argument("--workers", type=int, default=None, help="Количество параллельных процессов (по умолчанию — по ядрам и памяти)")
+    parser.add_argument("--memory-budget", type=float, default=None, help="Бюджет памяти пакета в ГБ (по умолчанию 80%% доступной)")
+    parser.add_argument("--resume", action="store_true", help="Пропустить завершенные сценарии и продолжить прерванные с контрольных точек")
+    parser.add_argument("--force", action="store_true", help="Пересчитать сценарии, уже найденные в кэше результатов")
+    parser.add_argument("--isolated", action="store_true", help="Отдельный подпроцесс main.py на каждый сценарий (старый режим)")
+    parser.add_argument("--queue", type=str, metavar="DB", help="Поставить серию в файловую очередь SQLite и обрабатывать ее локальными воркерами")
+    parser.add_argument("--join", type=str, metavar="DB", help="Только воркеры: подключиться к очереди, созданной --queue (в т.ч. с другой машины)")
+    parser.add_argument("--lease", type=float, default=DEFAULT_LEASE_SECONDS, help="Срок аренды задания очереди, сек (по умолчанию %(default)s)")
     args = parser.parse_args()
+    budget = int(args.memory_budget * 2**30) if args.memory_budget else None
+
+    if args.join:
+        # Машина присоединяется к общей очереди: воркеров — по ее ядрам, памяти и оставшимся заданиям
+        queue = JobQueue(args.join)
+        plan = plan_batch(queue.pending_priorities() or [0], args.workers, budget)
+        print(f"Подключение к очереди {args.join} ({queue.counts()}): {plan.describe()}")
+        _run_queue_workers(args.join, plan, args.lease)
+        counts = queue.counts()
+        print(f"Очередь: {counts}")
+        sys.exit(1 if counts.get(FAILED) else 0)
 
-    # Собираем все задачи в список
+    # Собираем все задачи в список; уже посчитанные с теми же параметрами берутся из кэша
     tasks = []
+    cache = ResultCache()
     for run_id, counts in ALL_RUNS.items():
         for mode in RELATION_MODES:
             config_path = generate_config(run_id, mode, counts)
+            cached = None if args.test or args.force else cache.lookup(cache_key(config_path))
+            if cached:
+                print(f"Из кэша: {os.path.basename(config_path)} — {describe(cached)}")
+                continue
+            if args.resume and is_completed(config_path):
+                continue
+            if not args.resume:
+                reset_progress(config_path)
             tasks.append((config_path, args.test))
 
-    print(f"Начинаем серию из {len(tasks)} симуляций в {args.workers} потоках...")
+    if not tasks:
+        print("Все сценарии серии уже завершены.")
+        return
+
+    plan = plan_batch([estimate_config_memory(task[0]) for task in tasks], args.workers, budget)
+    print(f"Начинаем серию из {len(tasks)} симуляций: {plan.describe()}")
     
     start_time = time.time()
     
-    # Запускаем пул воркеров
-    with Pool(processes=args.workers) as pool:
-        results = pool.starmap(run_simulation, tasks)
+    if args.queue:
+        # Задания в файловой очереди: к ней могут подключиться воркеры других машин (--join)
+        queue = JobQueue(args.queue)
+        for config_path, is_test in tasks:
+            scenario = os.path.splitext(os.path.basename(config_path))[0]
+            queue.enqueue(scenario, {"config_path": config_path, "is_test": is_test}, priority=estimate_config_memory(config_path))
+        _run_queue_workers(args.queue, plan, args.lease)
+        counts = queue.counts()
+        print(f"Очередь: {counts}")
+        results = [not counts.get(FAILED)]
+    elif args.isolated:
+        # Подпроцессы main.py наследуют ограничение потоков OpenMP
+        os.environ["OMP_NUM_THREADS"] = str(plan.threads_per_worker)
+        with Pool(processes=plan.workers) as pool:
+            results = pool.starmap(run_simulation, tasks)
+    else:
+        # Долгоживущие воркеры берут сценарии по мере освобождения памяти и сообщают прогресс через общий канал
+        with Manager() as manager:
+            events = manager.Queue()
+            core_slots = manager.Queue()
+            for cores in plan.core_slices:
+                core_slots.put(cores)
+            printer = threading.Thread(target=_print_events, args=(events,), daemon=True)
+            printer.start()
+            with Pool(processes=plan.workers, initializer=_init_worker,
+                      initargs=(events, core_slots, plan.threads_per_worker)) as pool:
+                results = _run_admitted(pool, tasks, plan)
+            events.put(None)
+            printer.join()
     
     if all(results):
         elapsed = time.time() - start_time
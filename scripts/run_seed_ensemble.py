@@ -0,0 +1,66 @@
+import argparse
+import sys
+import os
+import json
+import time
+import numpy as np
+
+# Добавляем корневую директорию проекта в path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model.collective import Collective
+from core.agent_factory import AgentFactory
+from scripts.run_headless import generate_research_agents
+from model.ensemble import build_ensemble, run_ensemble, across_replicas
+
+
+def main():
+    """
+    Серия сидов одного сценария одним заданием: R реплик продвигаются синхронно в EnsembleEngine.
+    Результат — ряды сводок по дням и репликам в .npz (emotion_mean, relation_mean, interactions, ...)
+    и межрепликовые средние/СКО.
+    """
+    parser = argparse.ArgumentParser(description="Ансамбль реплик одного сценария (серия сидов)")
+    parser.add_argument("scenario", type=str, help="Path to scenario JSON file")
+    parser.add_argument("--replicas", "-r", type=int, default=16, help="Количество реплик (сидов)")
+    parser.add_argument("--steps", type=int, help="Number of days (overrides scenario)")
+    parser.add_argument("--seed", type=int, default=0, help="Базовый сид потоков реплик")
+    parser.add_argument("--output", type=str, help="Путь .npz (по умолчанию data/output/ensembles/<сценарий>.npz)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.scenario):
+        print(f"Error: Scenario file '{args.scenario}' not found.", file=sys.stderr)
+        sys.exit(1)
+
+    with open(args.scenario, 'r', encoding='utf-8') as f:
+        scenario = json.load(f)
+    steps = args.steps if args.steps is not None else scenario.get("steps", 100)
+
+    # Популяция строится так же, как SimulationSession.load_scenario, но без приемников логов
+    collective = Collective(seed=scenario.get("seed"))
+    for agent in generate_research_agents(scenario):
+        collective.add_agent(agent)
+    names = list(collective.agents.keys())
+    for agent in collective.agents.values():
+        AgentFactory.initialize_agent_relations(agent, names)
+
+    ensemble = build_ensemble(collective, args.replicas, seed=args.seed)
+    print(f"Ансамбль: {ensemble.num_replicas} реплик x {ensemble.num_agents} агентов, {steps} дней", flush=True)
+
+    started = time.time()
+    def on_day(day, summary):
+        if day % 10 == 0 or day == steps:
+            mean_rel = summary["relation_mean"].mean(axis=0)
+            print(f"  [Progress] день {day}/{steps}: средние U/A/T по репликам {[round(float(v), 2) for v in mean_rel]}", flush=True)
+    series = run_ensemble(ensemble, steps, on_day=on_day)
+
+    name = os.path.splitext(os.path.basename(args.scenario))[0]
+    output = args.output or os.path.join("data", "output", "ensembles", f"{name}.npz")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    np.savez_compressed(output, **series, **across_replicas(series),
+                        final_emotions=ensemble.emotions_array(), seed=args.seed)
+    print(f"Готово за {time.time() - started:.1f} с: {output}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import argparse
+import sys
+import os
+import json
+import time
+
+# Добавляем корневую директорию проекта в path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.telemetry import DEFAULT_TELEMETRY_DIR, summarize, format_summary
+
+
+def main():
+    """
+    Сводка по всем расчетам, пишущим телеметрию (data/output/telemetry/*.jsonl):
+    состояние, день и семестры, скорость (дней и слотов в секунду), RSS и очередь логов.
+    """
+    parser = argparse.ArgumentParser(description="Сводка телеметрии параллельных расчетов")
+    parser.add_argument("--dir", type=str, default=DEFAULT_TELEMETRY_DIR, help="Каталог телеметрии")
+    parser.add_argument("--watch", type=float, metavar="SEC", help="Обновлять сводку каждые SEC секунд")
+    parser.add_argument("--json", action="store_true", help="Вывести сводку в JSON")
+    args = parser.parse_args()
+
+    while True:
+        runs = summarize(args.dir)
+        if args.json:
+            print(json.dumps(runs, ensure_ascii=False, indent=1), flush=True)
+        else:
+            if args.watch:
+                print("\033[2J\033[H", end="")
+            print(format_summary(runs), flush=True)
+        if not args.watch:
+            break
+        time.sleep(args.watch)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import os
+import sys
 import time
 import signal
 import threading
@@ -7,12 +8,16 @@ import telebot
 from telebot import types
 from dotenv import load_dotenv
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.telemetry import DEFAULT_TELEMETRY_DIR, TelemetryFollower, summarize, format_summary
+
 # Загрузка конфигов
 load_dotenv()
 TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 LOG_FILE = "simulation_batch.log"
 PID_FILE = "simulation_batch.pid"
+TELEMETRY_DIR = DEFAULT_TELEMETRY_DIR
 
 if not TOKEN or not CHAT_ID:
     print("Ошибка: TELEGRAM_BOT_TOKEN или TELEGRAM_CHAT_ID не найдены в .env")
@@ -43,7 +48,11 @@ def get_status():
     except Exception as e:
         return f"⚠️ Ошибка при проверке статуса: {e}"
 
-def restart_simulation():
+def restart_simulation(fresh: bool = False):
+    """
+    Перезапуск серии. По умолчанию завершенные сценарии пропускаются, прерванные продолжаются
+    с контрольных точек (данные в ClickHouse сохраняются). fresh=True — очистка базы и расчет с нуля.
+    """
     # 1. Убиваем старые процессы
     try:
         subprocess.run("ps aux | grep run_research_batch.py | grep -v grep | awk '{print $2}' | xargs kill -9", shell=True)
@@ -51,28 +60,39 @@ def restart_simulation():
     except:
         pass
     
-    # 2. Очищаем базу (опционально, но обычно нужно для рестарта)
-    try:
-        from clickhouse_connect import get_client
-        client = get_client(host='localhost', port=8123, username='default', password='clickhouse_pass')
-        client.command("TRUNCATE TABLE agent_states")
-        client.command("TRUNCATE TABLE agent_relations")
-        client.command("TRUNCATE TABLE interactions")
-        client.command("TRUNCATE TABLE agent_registry")
-        client.command("TRUNCATE TABLE simulation_runs")
-        client.close()
-    except:
-        pass
+    # 2. Очищаем базу (только для расчета с нуля)
+    if fresh:
+        try:
+            from clickhouse_connect import get_client
+            client = get_client(host='localhost', port=8123, username='default', password='clickhouse_pass')
+            client.command("TRUNCATE TABLE agent_states")
+            client.command("TRUNCATE TABLE agent_relations")
+            client.command("TRUNCATE TABLE agent_relations_delta")
+            client.command("TRUNCATE TABLE interactions")
+            client.command("TRUNCATE TABLE agent_states_agg")
+            client.command("TRUNCATE TABLE interactions_agg")
+            client.command("TRUNCATE TABLE agent_registry")
+            client.command("TRUNCATE TABLE agent_registry_lookup")
+            client.command("TRUNCATE TABLE simulation_runs")
+            # Сводки (rollups) очищаются вместе с сырыми таблицами
+            for rollup in ("run_progress", "daily_emotions_by_archetype", "daily_emotions_by_group", "daily_interactions"):
+                client.command(f"TRUNCATE TABLE {rollup}")
+            client.close()
+        except:
+            pass
 
     # 3. Запускаем заново
-    log_f = open(LOG_FILE, "w")
-    process = subprocess.Popen(["./venv/bin/python", "scripts/run_research_batch.py"], 
-                               stdout=log_f, stderr=log_f, start_new_session=True)
+    cmd = ["./venv/bin/python", "scripts/run_research_batch.py"]
+    if not fresh:
+        cmd.append("--resume")
+    log_f = open(LOG_FILE, "w" if fresh else "a")
+    process = subprocess.Popen(cmd, stdout=log_f, stderr=log_f, start_new_session=True)
     
     with open(PID_FILE, "w") as f:
         f.write(str(process.pid))
     
-    return f"🚀 Симуляция перезапущена! (PID: {process.pid})"
+    mode = "с нуля" if fresh else "с контрольных точек"
+    return f"🚀 Симуляция перезапущена {mode}! (PID: {process.pid})"
 
 def get_resources():
     try:
@@ -108,10 +128,11 @@ def get_detailed_progress():
     try:
         from clickhouse_connect import get_client
         client = get_client(host='localhost', port=8123, username='default', password='clickhouse_pass')
+        # Сводка run_progress наполняется материализованным представлением — без сканирования agent_states
         query = """
-            SELECT r.scenario_name, MAX(s.day_id) as day
-            FROM agent_states s 
-            JOIN simulation_runs r ON s.run_id = r.run_id 
+            SELECT r.scenario_name, maxMerge(p.max_day) as day
+            FROM run_progress p 
+            JOIN simulation_runs r ON p.run_id = r.run_id 
             GROUP BY r.scenario_name
             ORDER BY day DESC
         """
@@ -147,11 +168,14 @@ def send_welcome(message):
     btn_prog = types.KeyboardButton("📈 Прогресс")
     btn_res = types.KeyboardButton("🖥 Ресурсы")
     btn_logs = types.KeyboardButton("📜 Фулл логи")
+    btn_tel = types.KeyboardButton("📡 Телеметрия")
     btn_restart = types.KeyboardButton("🚀 Рестарт")
+    btn_restart_fresh = types.KeyboardButton("🧹 Рестарт с нуля")
     
     markup.row(btn_status, btn_prog)
     markup.row(btn_res, btn_logs)
-    markup.row(btn_restart)
+    markup.row(btn_tel)
+    markup.row(btn_restart, btn_restart_fresh)
     bot.reply_to(message, "Бот мониторинга симуляции коллектива автоматов\nИспользуй кнопки ниже:", reply_markup=markup)
 
 @bot.message_handler(func=lambda message: True)
@@ -166,6 +190,8 @@ def handle_message(message):
         bot.send_message(CHAT_ID, get_detailed_progress(), parse_mode="Markdown")
     elif message.text == "🖥 Ресурсы":
         bot.send_message(CHAT_ID, get_resources(), parse_mode="HTML")
+    elif message.text == "📡 Телеметрия":
+        bot.send_message(CHAT_ID, f"<pre>{format_summary(summarize(TELEMETRY_DIR))}</pre>", parse_mode="HTML")
     elif message.text == "📜 Фулл логи":
         if os.path.exists(LOG_FILE):
             with open(LOG_FILE, "r") as f:
@@ -173,60 +199,49 @@ def handle_message(message):
             bot.send_message(CHAT_ID, f"Последние логи:\n<pre>{content}</pre>", parse_mode="HTML")
         else:
             bot.send_message(CHAT_ID, "Файл лога не найден.")
-    elif message.text == "🚀 Рестарт симуляции":
-        msg = bot.send_message(CHAT_ID, "⏳ Перезапускаю всё (10 потоков + очистка ClickHouse)... Подожди.")
+    elif message.text in ("🚀 Рестарт", "🚀 Рестарт симуляции"):
+        msg = bot.send_message(CHAT_ID, "⏳ Перезапускаю серию с контрольных точек... Подожди.")
         res = restart_simulation()
         bot.edit_message_text(res, CHAT_ID, msg.message_id)
+    elif message.text == "🧹 Рестарт с нуля":
+        msg = bot.send_message(CHAT_ID, "⏳ Перезапускаю всё (очистка ClickHouse и контрольных точек)... Подожди.")
+        res = restart_simulation(fresh=True)
+        bot.edit_message_text(res, CHAT_ID, msg.message_id)
 
-# --- Фоновая задача для слежения за логами (Live Feed) ---
-def log_tailer():
-    """Следит за файлом лога and пересылает важные строки (с поддержкой ротации файла)."""
-    print("Log Tailer: Запущен.")
-    
-    last_inode = None
-    f = None
+# --- Фоновая задача: лента событий из телеметрии расчетов (Live Feed) ---
+def format_event(event):
+    """Текст уведомления по событию телеметрии; None — событие не пересылается."""
+    name, kind = event.get("scenario"), event.get("event")
+    if kind == "started":
+        resumed = " (продолжение с контрольной точки)" if event.get("resumed") else ""
+        return f"▶️ {name}: старт{resumed}"
+    if kind == "semester":
+        return f"🎓 {name}: семестр {event['semesters']}/{event['target']} (день {event['day']}, агентов {event['agents']})"
+    if kind == "finished":
+        return f"✅ {name}: завершено за {event['elapsed']/60:.1f} мин"
+    if kind == "failed":
+        return f"❌ {name}: ошибка {event.get('error')}"
+    return None
+
+def telemetry_tailer():
+    """Следит за файлами телеметрии (JSON-lines) и пересылает ключевые события расчетов."""
+    print("Telemetry Tailer: Запущен.")
+    follower = TelemetryFollower(TELEMETRY_DIR)
     
     while True:
         try:
-            if not os.path.exists(LOG_FILE):
-                time.sleep(0.1)
-                continue
-                
-            current_stat = os.stat(LOG_FILE)
-            current_inode = current_stat.st_ino
-            current_size = current_stat.st_size
-            
-            # Если файл изменился (пересоздан) или уменьшился (Truncate)
-            if current_inode != last_inode or (f and current_size < f.tell()):
-                if f: f.close()
-                f = open(LOG_FILE, "r")
-                # Если файл новый/обрезанный - читаем с начала, иначе с конца
-                if last_inode is not None:
-                    f.seek(0)
-                else:
-                    f.seek(0, os.SEEK_END)
-                last_inode = current_inode
-                print(f"Log Tailer: Файл {LOG_FILE} переоткрыт (Size: {current_size}).")
-            
-            line = f.readline()
-            if not line:
-                time.sleep(0.1) # Ускоряем опрос до 0.1 сек
-                continue
-                
-            clean_line = line.strip()
-            if not clean_line: continue
-            
-            # Фильтруем важные сообщения
-            if "[Progress]" in clean_line or "[1/" in clean_line or "Ошибка" in clean_line or "Выполнение:" in clean_line or "[System]" in clean_line or "Начинаем серию" in clean_line or "Traceback" in clean_line or "AttributeError" in clean_line:
-                bot.send_message(CHAT_ID, f"🔔 {clean_line}")
-                
+            for event in follower.poll():
+                text = format_event(event)
+                if text:
+                    bot.send_message(CHAT_ID, text)
+            time.sleep(1)
         except Exception as e:
             print(f"Ошибка в tailer: {e}")
             time.sleep(1)
 
 if __name__ == "__main__":
-    # Запуск тайлера в отдельном потоке
-    threading.Thread(target=log_tailer, daemon=True).start()
+    # Запуск ленты событий в отдельном потоке
+    threading.Thread(target=telemetry_tailer, daemon=True).start()
     
     print("Bot: Запущен...")
     while True:
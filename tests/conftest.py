@@ -0,0 +1,48 @@
+import os
+import sys
+
+# Тесты запускаются из корня проекта: python -m pytest -q
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import contextlib
+import io
+import threading
+
+import pytest
+
+
+def quiet(func, *args, **kwargs):
+    """Вызов без служебного вывода симуляции в stdout."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args, **kwargs)
+
+
+def make_university(seed: int = 7, total_bac: int = 75, total_mag: int = 15, **config):
+    from model.university_collective import UniversityCollective
+    config = {"scenario_name": "test", "bachelor_counts": {}, "master_counts": {},
+              "total_bac": total_bac, "total_mag": total_mag, "seed": seed, **config}
+    return quiet(UniversityCollective, seed=seed, config=config)
+
+
+@pytest.fixture
+def university():
+    return make_university()
+
+
+class RecordingClient:
+    """Клиент-приемник: запоминает вставки; gate задерживает вставки, fail — имитирует недоступность СУБД."""
+
+    def __init__(self, gate=False, fail=False):
+        self.inserted = []
+        self.fail = fail
+        self.started = threading.Event()
+        self.gate = threading.Event()
+        if not gate:
+            self.gate.set()
+
+    def insert(self, table, data, column_names=None, column_oriented=False):
+        self.started.set()
+        self.gate.wait(5)
+        if self.fail:
+            raise ConnectionError("ClickHouse недоступен")
+        self.inserted.append((table, data))
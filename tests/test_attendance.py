@@ -0,0 +1,120 @@
+import copy
+
+import numpy as np
+
+from model.constants import AgentStatus, TimeSlotType
+from tests.conftest import make_university, quiet
+
+
+def _run_day(university, on_slot=None):
+    """Шаги до конца учебного дня (следующий шаг — переход дня)."""
+    while True:
+        result = quiet(university.perform_next_step)
+        if any(status == "New_Day_Ready" for _, _, status in result):
+            return
+        if on_slot:
+            on_slot(university)
+
+
+def _weekday(university):
+    while university.current_date.weekday() >= 5:
+        _run_day(university)
+
+
+def test_trait_edit_applies_after_invalidate(university):
+    _weekday(university)
+    university._roster() # Кэш состава уже собран
+    for agent in university.agents.values():
+        agent.skip_tendency = 1.0
+    university.invalidate_roster()
+
+    seen = set()
+    _run_day(university, lambda u: seen.update(a.status for a in u.agents.values()))
+    assert AgentStatus.IN_CLASS not in seen
+
+
+def test_day_flags_published_to_agents(university):
+    _weekday(university)
+    checks = []
+
+    def check(u):
+        names = u._roster()[0]
+        arrived = np.array([u.agents[name].arrived_today for name in names])
+        left = np.array([u.agents[name].left_campus_today for name in names])
+        checks.append((arrived == u._arrived).all() and (left == u._left).all())
+
+    _run_day(university, check)
+    assert checks and all(checks)
+    assert any(agent.arrived_today for agent in university.agents.values())
+
+
+def test_roster_rebuild_keeps_day_flags(university):
+    _weekday(university)
+    for _ in range(4):
+        quiet(university.perform_next_step)
+    status, arrived, left = university._status.copy(), university._arrived.copy(), university._left.copy()
+    assert left.any()
+
+    university.invalidate_roster()
+    university._roster()
+    np.testing.assert_array_equal(university._status, status)
+    np.testing.assert_array_equal(university._arrived, arrived)
+    np.testing.assert_array_equal(university._left, left)
+
+
+def _reference_study_slot(university, rooms, has_more, skip_draw, stay_draw):
+    """Прежний поагентный цикл посещаемости (с теми же случайными числами)."""
+    names, agents = university._roster()[:2]
+    result = []
+    for i, agent in enumerate(agents):
+        status, arrived, left = agent.status, agent.arrived_today, agent.left_campus_today
+        if not left:
+            if skip_draw[i] < agent.skip_tendency:
+                left = left or arrived
+                status = AgentStatus.HOME
+            elif rooms[i] < 0:
+                if not arrived:
+                    status = AgentStatus.HOME
+                elif has_more[i] or stay_draw[i] < agent.sportiness:
+                    status = AgentStatus.BREAK
+                else:
+                    status, left = AgentStatus.HOME, True
+            else:
+                status, arrived = AgentStatus.IN_CLASS, True
+        result.append((status, arrived, left))
+    return result
+
+
+def test_vectorised_attendance_matches_reference():
+    university = make_university(seed=11)
+    _weekday(university)
+    manager = university.uni_manager
+    pairs = {TimeSlotType.PAIR_1: 0, TimeSlotType.PAIR_2: 1, TimeSlotType.PAIR_3: 2, TimeSlotType.PAIR_4: 3}
+    checked = 0
+    for _ in range(len(university.day_schedule_slots)):
+        slot_type = university.day_schedule_slots[university.current_slot_idx]
+        if slot_type in pairs and university.current_slot_idx > 0:
+            names, _, group_rows = university._roster()[:3]
+            schedule, has_later_class = manager.compiled_schedule()
+            day, slot = university.current_date.weekday(), pairs[slot_type]
+            skip_draw, stay_draw = copy.deepcopy(university.attendance_rng).random((2, len(names)))
+            expected = _reference_study_slot(university, schedule[group_rows, day, slot],
+                                             has_later_class[group_rows, day, slot], skip_draw, stay_draw)
+            quiet(university.perform_next_step)
+            actual = [(a.status, a.arrived_today, a.left_campus_today) for a in university._roster()[1]]
+            assert actual == expected
+            checked += 1
+        else:
+            quiet(university.perform_next_step)
+    assert checked >= 2
+
+
+def test_attendance_is_reproducible():
+    def statuses(seed):
+        university = make_university(seed=seed)
+        trace = []
+        for _ in range(3):
+            _run_day(university, lambda u: trace.append(u._status.copy()))
+        return np.array(trace)
+
+    np.testing.assert_array_equal(statuses(5), statuses(5))
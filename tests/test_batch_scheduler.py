@@ -0,0 +1,50 @@
+import pytest
+
+from core import batch_scheduler
+from core.batch_scheduler import MemoryGate, estimate_memory, plan_batch
+from tests.conftest import quiet
+
+GB = 2**30
+
+
+@pytest.fixture
+def eight_cores(monkeypatch):
+    monkeypatch.setattr(batch_scheduler, "available_cores", lambda: list(range(8)))
+
+
+def test_estimate_grows_with_population_squared():
+    small = estimate_memory({"total_bac": 300, "total_mag": 40})
+    large = estimate_memory({"total_bac": 1500, "total_mag": 120})
+    assert small < large
+    assert estimate_memory({}) == large # Размеры по умолчанию, как в UniversityCollective
+
+
+def test_plan_never_oversubscribes_cores(eight_cores):
+    plan = plan_batch([GB] * 20, memory_budget=100 * GB)
+    assert (plan.workers, plan.threads_per_worker) == (8, 1)
+    plan = plan_batch([GB] * 3, memory_budget=100 * GB)
+    assert (plan.workers, plan.threads_per_worker) == (3, 2)
+    cores = [core for part in plan.core_slices for core in part]
+    assert len(cores) == len(set(cores)) == 6
+
+
+def test_plan_limits_workers_by_memory(eight_cores):
+    plan = plan_batch([4 * GB, 4 * GB, 1 * GB, 1 * GB], memory_budget=8 * GB + GB // 2)
+    # Одновременно влезают только два самых крупных сценария: 4 + 4 ГБ
+    assert (plan.workers, plan.threads_per_worker) == (2, 4)
+    assert plan_batch([20 * GB], memory_budget=9 * GB).workers == 1
+
+
+def test_explicit_workers_beyond_cores_disable_pinning(eight_cores):
+    plan = quiet(plan_batch, [GB], workers=12, memory_budget=0)
+    assert plan.workers == 12 and plan.core_slices == [None] * 12
+
+
+def test_memory_gate_admission():
+    gate = MemoryGate(10)
+    assert gate.can_admit(20) # Пустой пакет допускает и задачу крупнее бюджета
+    gate.acquire(6)
+    assert gate.can_admit(4) and not gate.can_admit(5)
+    gate.release(6)
+    assert gate.in_use == 0 and gate.running == 0
+    assert MemoryGate(0).can_admit(10**12)
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from core.run_store import RunStore, RunStoreReader
+from model.collective import CPP_ENGINE_AVAILABLE
+from tests.conftest import make_university, quiet
+
+pytestmark = pytest.mark.skipif(not CPP_ENGINE_AVAILABLE, reason="C++ ядро не собрано")
+
+DAYS = 8
+
+
+def _session(tmp_path):
+    from model.simulation_session import SimulationSession
+    return SimulationSession(collective=make_university(), output_dir=str(tmp_path),
+                             run_store=RunStore(str(tmp_path)))
+
+
+def _state(session):
+    engine = session.collective.cpp_engine
+    return session.collective.current_step, engine.emotions_array().copy(), engine.relations_array().copy()
+
+
+@pytest.mark.parametrize("split", [1, 4, 5])
+def test_resume_matches_straight_run(tmp_path, split):
+    from model.simulation_session import SimulationSession
+
+    straight = _session(tmp_path / "straight")
+    for _ in range(DAYS):
+        quiet(straight.run_day)
+    straight.close()
+
+    first = _session(tmp_path / "resumed")
+    for _ in range(split):
+        quiet(first.run_day)
+    path = str(tmp_path / "run.ckpt")
+    quiet(first.save_checkpoint, path)
+    # Запись после точки отбрасывается при возобновлении
+    quiet(first.run_day)
+    first.close()
+
+    resumed = quiet(SimulationSession.from_checkpoint, path)
+    assert resumed.run_id == first.run_id
+    for _ in range(DAYS - split):
+        quiet(resumed.run_day)
+    resumed.close()
+
+    day, emotions, relations = _state(straight)
+    resumed_day, resumed_emotions, resumed_relations = _state(resumed)
+    assert resumed_day == day
+    np.testing.assert_array_equal(emotions, resumed_emotions)
+    np.testing.assert_array_equal(relations, resumed_relations)
+
+    # Лог возобновленного запуска совпадает с логом прямого
+    logged = RunStoreReader(straight.run_store.path).read('states')
+    resumed_logged = RunStoreReader(resumed.run_store.path).read('states')
+    for column in ('day_id', 'slot_id', 'agent_id', 'sadness_joy', 'alienation_openness'):
+        np.testing.assert_array_equal(logged[column], resumed_logged[column])
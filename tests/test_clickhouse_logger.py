@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("clickhouse_connect")
+
+from core.clickhouse_logger import ClickHouseLogger, STATES_COLUMNS, REGISTRY_COLUMNS
+from tests.conftest import make_university
+
+
+class _Writer:
+    def __init__(self):
+        self.batches = []
+
+    def submit(self, batch):
+        self.batches.append(batch)
+
+
+class _Engine:
+    def __init__(self, n):
+        self._emotions = np.zeros((n, 7), dtype=np.int8)
+
+    def emotions_array(self):
+        return self._emotions
+
+
+def _offline_logger():
+    logger = ClickHouseLogger.__new__(ClickHouseLogger)
+    logger.run_id = "00000000-0000-0000-0000-000000000000"
+    logger.client = object()
+    logger.writer = _Writer()
+    logger.relations_buffer = []
+    logger.layout = 0
+    return logger
+
+
+def test_states_and_registry_carry_layout():
+    university = make_university()
+    university._update_id_maps()
+    logger = _offline_logger()
+
+    logger.log_agent_registry(university, layout=0)
+    logger.log_agent_states(1, 9, _Engine(len(university._id_map)))
+    university.remove_agents(sorted(university.agents)[:5])
+    university._update_id_maps()
+    logger.log_agent_registry(university, layout=1)
+    logger.log_agent_states(2, 9, _Engine(len(university._id_map)))
+
+    registry = [b for b in logger.writer.batches if b.table == 'agent_registry']
+    states = [b for b in logger.writer.batches if b.table == 'agent_states']
+    layout_col = REGISTRY_COLUMNS.index('layout')
+    assert [{row[layout_col] for row in b.data} for b in registry] == [{0}, {1}]
+    assert len(registry[1].data) == len(university._id_map)
+    assert [set(b.data[STATES_COLUMNS.index('layout')].tolist()) for b in states] == [{0}, {1}]
+
+
+class _NumpyClient:
+    """Клиент, отдающий результаты в форме query_np: структурированный массив при разных типах колонок."""
+
+    def __init__(self, emotions, relations):
+        self.results = [emotions, relations]
+
+    def query_np(self, query, parameters=None):
+        return self.results.pop(0)
+
+
+def test_fetch_state_reads_numpy_columns():
+    emotions = np.zeros(2, dtype=[('agent_id', np.uint32)] + [(f'e{k}', np.int8) for k in range(7)])
+    emotions['agent_id'] = [3, 5]
+    emotions['e6'] = [-4, 9]
+    relations = np.zeros(1, dtype=[('subject_id', np.uint32), ('object_id', np.uint32),
+                                   ('utility', np.int8), ('affinity', np.int8), ('trust', np.int8)])
+    relations[0] = (3, 5, 1, 2, 3)
+    logger = _offline_logger()
+    logger.writer = None
+    logger.client = _NumpyClient(emotions, relations)
+
+    state, rel = logger.fetch_state(logger.run_id, 1, 2)
+    assert state['agent_id'].tolist() == [3, 5]
+    assert state['values'].shape == (2, 7) and state['values'][:, 6].tolist() == [-4, 9]
+    assert rel['values'].tolist() == [[1, 2, 3]] and rel['object_id'].tolist() == [5]
+
+    logger.client = _NumpyClient(np.zeros((0, 8), dtype=np.int64), np.zeros((0, 5), dtype=np.int64))
+    state, rel = logger.fetch_state(logger.run_id, 1, 2)
+    assert state['values'].shape == (0, 7) and rel['values'].shape == (0, 3)
@@ -0,0 +1,25 @@
+import datetime
+
+import numpy as np
+
+from core.clickhouse_writer import AsyncBatchWriter, InsertBatch, SpillStore, replay_spill
+from tests.conftest import RecordingClient, quiet
+
+
+def test_failed_batches_spill_and_replay(tmp_path):
+    spill_dir = str(tmp_path / "spill")
+    client = RecordingClient(fail=True)
+    writer = AsyncBatchWriter(client, max_queue=4, spill_dir=spill_dir)
+    stamp = datetime.datetime(2024, 9, 1, 8, 30)
+    writer.submit(InsertBatch('simulation_runs', [['run', stamp, 'имя']], ['run_id', 'start_time', 'run_name'], droppable=False))
+    writer.submit(InsertBatch('agent_states', [np.arange(3, dtype=np.uint32)], ['agent_id'], column_oriented=True))
+    quiet(writer.close, 5)
+    assert writer.spilled_batches == 2 and writer.failed_batches == 0
+    assert len(SpillStore(spill_dir).pending()) == 2
+
+    client.fail = False
+    assert replay_spill(client, spill_dir) == (2, 0)
+    assert SpillStore(spill_dir).pending() == []
+    (runs_table, runs), (states_table, states) = client.inserted
+    assert runs_table == 'simulation_runs' and runs == [['run'], [stamp], ['имя']]
+    assert states_table == 'agent_states' and states[0].tolist() == [0, 1, 2]
@@ -0,0 +1,48 @@
+import threading
+
+from core.clickhouse_writer import AsyncBatchWriter, InsertBatch, QueuePolicy
+from tests.conftest import RecordingClient, quiet
+
+
+def _batch(i, droppable=True, table='agent_states'):
+    return InsertBatch(table, [[i]], ['day_id'], droppable=droppable)
+
+
+def _fill(policy, submitted, max_queue=2):
+    """Первый пакет занимает поток записи, остальные упираются в очередь."""
+    client = RecordingClient(gate=True)
+    writer = AsyncBatchWriter(client, max_queue=max_queue, policy=policy)
+    writer.submit(_batch(0))
+    assert client.started.wait(5)
+    # Принятый при полной очереди пакет ждет места — поток записи освобождается с задержкой
+    release = threading.Timer(0.2, client.gate.set)
+    release.start()
+    for batch in submitted:
+        writer.submit(batch)
+    release.join()
+    quiet(writer.close, 5)
+    return writer, [data[0][0] for _, data in client.inserted]
+
+
+def test_block_policy_keeps_every_batch():
+    client = RecordingClient()
+    writer = AsyncBatchWriter(client, max_queue=1, policy=QueuePolicy.BLOCK)
+    for i in range(20):
+        writer.submit(_batch(i))
+    quiet(writer.close, 5)
+    assert [data[0][0] for _, data in client.inserted] == list(range(20))
+    assert writer.dropped_batches == 0
+
+
+def test_drop_oldest_spares_undroppable_batches():
+    writer, written = _fill(QueuePolicy.DROP_OLDEST, [_batch(1, droppable=False), _batch(2), _batch(3), _batch(4)])
+    assert written == [0, 1, 4]
+    assert writer.dropped_batches == 2
+
+
+def test_downsample_keeps_every_kth_batch_under_load():
+    writer, written = _fill(QueuePolicy.DOWNSAMPLE, [_batch(i) for i in range(1, 5)])
+    # Очередь заполнена пакетами 1 и 2; из следующих принимается каждый второй (4 — дождавшись места)
+    assert written == [0, 1, 2, 4]
+    assert writer.dropped_batches == 1
+
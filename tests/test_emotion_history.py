@@ -0,0 +1,67 @@
+import numpy as np
+
+from core.emotion_history import EmotionHistory, EmotionHistoryWriter, MISSING
+
+
+def _frame(n, value):
+    return np.full((n, 7), value, dtype=np.int8)
+
+
+def test_history_grows_past_capacity(tmp_path):
+    path = str(tmp_path / "run.emo")
+    writer = EmotionHistoryWriter(path, max_agents=3, slots_per_day=2)
+    writer.set_layout(0, ["a", "b", "c"], 0, 0)
+    writer.record(0, 0, _frame(3, 1))
+    writer.record(0, 1, _frame(3, 2))
+    writer.set_layout(1, ["a", "b", "c", "d", "e"], 1, 0)
+    writer.record(1, 0, _frame(5, 3))
+    writer.record(1, 1, _frame(5, 4))
+    writer.close()
+
+    history = EmotionHistory(path)
+    assert history.num_days == 2 and history.max_agents >= 5
+    # Кадры, записанные до расширения, сохранены и дополнены MISSING
+    assert (history.frame(0, 1)[:3] == 2).all()
+    assert (history.frame(0, 1)[3:] == MISSING).all()
+    assert (history.frame(1, 0)[:5] == 3).all()
+    assert history.agents(0, 1) == ["a", "b", "c"]
+    assert history.agents(1, 1) == ["a", "b", "c", "d", "e"]
+
+
+def test_reopen_drops_frames_and_layouts_after_point(tmp_path):
+    path = str(tmp_path / "run.emo")
+    writer = EmotionHistoryWriter(path, max_agents=4, slots_per_day=2)
+    writer.set_layout(0, ["a", "b"], 0, 0)
+    writer.record(0, 0, _frame(2, 1))
+    writer.record(0, 1, _frame(2, 1))
+    frames = writer.frames_written
+    writer.set_layout(1, ["b", "c"], 1, 0)
+    writer.record(1, 0, _frame(2, 5))
+    writer.close()
+
+    writer = EmotionHistoryWriter.reopen(path, frames)
+    assert writer.layout == 0
+    writer.record(1, 0, _frame(2, 7))
+    writer.record(1, 1, _frame(2, 7))
+    writer.close()
+
+    history = EmotionHistory(path)
+    assert len(history.layouts) == 1
+    assert history.agents(1, 0) == ["a", "b"]
+    assert (history.frame(1, 0)[:2] == 7).all()
+
+
+def test_gap_before_growth_reads_as_missing(tmp_path):
+    path = str(tmp_path / "run.emo")
+    writer = EmotionHistoryWriter(path, max_agents=3, slots_per_day=2)
+    writer.record(0, 0, _frame(3, 1))
+    # Пропуск дня совпал с ростом коллектива (ротация после перемотки)
+    writer.record(2, 1, _frame(6, 4))
+    writer.close()
+
+    history = EmotionHistory(path)
+    assert history.num_days == 3 and history.max_agents >= 6
+    assert (history.frame(0, 0)[:3] == 1).all()
+    for day, slot in ((0, 1), (1, 0), (1, 1), (2, 0)):
+        assert (history.frame(day, slot) == MISSING).all()
+    assert (history.frame(2, 1)[:6] == 4).all()
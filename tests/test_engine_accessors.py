@@ -0,0 +1,81 @@
+import pytest
+
+from model.collective import CPP_ENGINE_AVAILABLE
+
+pytestmark = pytest.mark.skipif(not CPP_ENGINE_AVAILABLE, reason="C++ ядро не собрано")
+
+if CPP_ENGINE_AVAILABLE:
+    import emotion_engine # Каталог core добавлен в sys.path модулем model.collective
+
+
+def test_relation_row_rejects_out_of_range_index():
+    engine = emotion_engine.Engine(3)
+    assert len(engine.get_relation_row(2)) == 9
+    for idx in (-1, 3):
+        with pytest.raises(IndexError):
+            engine.get_relation_row(idx)
+
+
+def test_primary_emotions_rejects_out_of_range_index():
+    engine = emotion_engine.Engine(3)
+    assert engine.get_primary_emotions([0, 2]) == [-1, 0, -1, 0]
+    with pytest.raises(IndexError):
+        engine.get_primary_emotions([0, 3])
+    with pytest.raises(IndexError):
+        engine.get_primary_emotions([-1])
+
+
+class _Value:
+    """Значение виджета диалога (ползунок, выпадающий список)."""
+
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def destroy(self):
+        pass
+
+
+def _save_relation(university, agent, other, utility, affinity, trust):
+    from gui.agent_state_dialog import AgentStateDialog
+    dialog = AgentStateDialog.__new__(AgentStateDialog)
+    dialog.agent, dialog.collective, dialog.top = agent, university, _Value(None)
+    dialog.archetype_var, dialog.other_agent_var, dialog.emotion_vars = _Value(""), _Value(other), {}
+    dialog.sensitivity_scale = _Value(agent.sensitivity * 10)
+    dialog.sport_scale = _Value(agent.sportiness * 100)
+    dialog.skip_scale = _Value(agent.skip_tendency * 100)
+    dialog.utility_scale, dialog.affinity_scale, dialog.trust_scale = _Value(utility), _Value(affinity), _Value(trust)
+    dialog.on_save()
+
+
+def test_dialog_relation_edit_reaches_engine(university):
+    from tests.conftest import quiet
+    while not university._engine_in_sync() or not university._id_map:
+        quiet(university.perform_next_step)
+    names = sorted(university.agents)
+    agent, other = university.agents[names[0]], names[1]
+    _save_relation(university, agent, other, 7, -3, 9)
+
+    row = university.get_relation_row(agent.id)
+    assert row[university._id_map[other]].tolist() == [7, -3, 9]
+    assert university.relations_matrix[university._id_map[agent.id], university._id_map[other]].tolist() == [7, -3, 9]
+
+
+def test_stale_python_relations_do_not_overwrite_engine(tmp_path):
+    from core.run_store import RunStore
+    from model.simulation_session import SimulationSession
+    from tests.conftest import make_university, quiet
+
+    def run(tmp, spoil):
+        university = make_university()
+        session = SimulationSession(collective=university, output_dir=str(tmp), run_store=RunStore(str(tmp)))
+        for day in range(4):
+            quiet(session.run_day)
+            if spoil:
+                university.relations_matrix[:] = 100 # Python-копия отстала от ядра
+        session.close()
+        return university.cpp_engine.relations_array().copy()
+
+    assert (run(tmp_path / "a", False) == run(tmp_path / "b", True)).all()
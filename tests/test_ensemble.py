@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from model.collective import CPP_ENGINE_AVAILABLE
+from tests.conftest import quiet
+
+pytestmark = pytest.mark.skipif(not CPP_ENGINE_AVAILABLE, reason="C++ ядро не собрано")
+
+
+def _ensemble(university, replicas=3, seed=1):
+    from model.ensemble import build_ensemble
+    return quiet(build_ensemble, university, replicas, seed=seed)
+
+
+def test_replicas_start_from_collective_state(university):
+    ensemble = _ensemble(university)
+    base = university.cpp_engine
+    for r in range(ensemble.num_replicas):
+        np.testing.assert_array_equal(ensemble.emotions_array()[r], base.emotions_array())
+        np.testing.assert_array_equal(ensemble.relations_array()[r], base.relations_array())
+
+
+def test_same_seed_reproduces_and_replicas_diverge(university):
+    from model.ensemble import run_ensemble
+    days = []
+    series = run_ensemble(_ensemble(university), 5, on_day=lambda day, summary: days.append(day))
+    again = run_ensemble(_ensemble(university), 5)
+    assert days == [1, 2, 3, 4, 5]
+    assert series["emotion_mean"].shape == (5, 3, 7)
+    for key in series:
+        np.testing.assert_array_equal(series[key], again[key])
+    # Реплики — независимые потоки случайных чисел
+    assert not np.array_equal(series["relation_mean"][-1, 0], series["relation_mean"][-1, 1])
+    assert series["interactions"].sum() > 0
+
+
+def test_across_replicas_statistics(university):
+    from model.ensemble import across_replicas, run_ensemble
+    series = run_ensemble(_ensemble(university), 2)
+    stats = across_replicas(series)
+    np.testing.assert_allclose(stats["relation_mean_mean"], series["relation_mean"].astype(np.float64).mean(axis=1))
+    assert stats["relation_mean_std"].shape == (2, 3)
+    single = across_replicas(run_ensemble(_ensemble(university, replicas=1), 2))
+    assert not single["emotion_mean_std"].any()
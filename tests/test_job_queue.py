@@ -0,0 +1,97 @@
+import multiprocessing
+import time
+
+from core.job_queue import DONE, FAILED, PENDING, RUNNING, JobQueue
+
+
+def _queue(tmp_path, **kwargs):
+    return JobQueue(str(tmp_path / "queue.db"), **kwargs)
+
+
+def test_claim_order_and_completion(tmp_path):
+    queue = _queue(tmp_path)
+    queue.enqueue("small", {"n": 1}, priority=1)
+    queue.enqueue("large", {"n": 2}, priority=5)
+    job = queue.claim("w1")
+    assert (job.id, job.payload, job.attempts) == ("large", {"n": 2}, 1)
+    assert not queue.complete("large", "w2") # Чужая аренда
+    assert queue.complete("large", "w1")
+    assert queue.claim("w1").id == "small"
+    assert queue.claim("w1") is None
+    assert queue.counts() == {DONE: 1, RUNNING: 1}
+
+
+def test_fail_retries_until_attempts_exhausted(tmp_path):
+    queue = _queue(tmp_path, max_attempts=2)
+    queue.enqueue("job", {})
+    assert queue.fail(queue.claim("w").id, "w", "first")
+    assert queue.counts() == {PENDING: 1}
+    assert queue.fail(queue.claim("w").id, "w", "second")
+    assert queue.jobs()[0]["status"] == FAILED and queue.jobs()[0]["error"] == "second"
+
+    queue.enqueue("fatal", {})
+    queue.fail(queue.claim("w").id, "w", retry=False)
+    assert queue.counts() == {FAILED: 2}
+
+
+def test_expired_lease_is_requeued(tmp_path):
+    queue = _queue(tmp_path, max_attempts=2)
+    queue.enqueue("job", {})
+    queue.claim("lost", lease=0.01)
+    time.sleep(0.05)
+    job = queue.claim("other")
+    assert (job.id, job.attempts) == ("job", 2)
+    assert not queue.heartbeat("job", "lost")
+    assert queue.heartbeat("job", "other")
+
+    # Вторая просрочка исчерпывает попытки
+    queue.heartbeat("job", "other", lease=0.01)
+    time.sleep(0.05)
+    assert queue.claim("third") is None
+    assert queue.jobs()[0]["error"] == "lease expired, attempts exhausted"
+
+
+def test_enqueue_resets_finished_job_but_not_running(tmp_path):
+    queue = _queue(tmp_path)
+    queue.enqueue("job", {"v": 1})
+    queue.complete(queue.claim("w").id, "w")
+    queue.enqueue("job", {"v": 2})
+    job = queue.claim("w")
+    assert (job.payload, job.attempts) == ({"v": 2}, 1)
+    queue.enqueue("job", {"v": 3})
+    assert queue.jobs()[0]["status"] == RUNNING
+
+
+def test_leased_block_renews_lease(tmp_path):
+    queue = _queue(tmp_path)
+    queue.enqueue("job", {})
+    job = queue.claim("w", lease=0.3)
+    with queue.leased(job, "w", lease=0.3) as lost:
+        time.sleep(0.5)
+        assert not lost.is_set()
+        assert queue.claim("other") is None
+    assert queue.complete("job", "w")
+
+
+def _claim_all(path, owner, out):
+    queue = JobQueue(path)
+    while (job := queue.claim(owner)) is not None:
+        out.put(job.id)
+        queue.complete(job.id, owner)
+
+
+def test_jobs_claimed_once_across_processes(tmp_path):
+    path = str(tmp_path / "queue.db")
+    queue = JobQueue(path)
+    for i in range(40):
+        queue.enqueue(f"job{i:02d}", {})
+    out = multiprocessing.get_context("fork").Queue()
+    workers = [multiprocessing.get_context("fork").Process(target=_claim_all, args=(path, f"w{k}", out))
+               for k in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    claimed = sorted(out.get(timeout=5) for _ in range(40))
+    assert claimed == [f"job{i:02d}" for i in range(40)]
+    assert out.empty() and queue.counts() == {DONE: 40}
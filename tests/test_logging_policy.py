@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from core.logging_policy import LoggingPolicy
+from core.run_store import RunStore
+from model.collective import CPP_ENGINE_AVAILABLE
+from tests.conftest import make_university, quiet
+
+
+@pytest.mark.parametrize("config", [
+    {"relations": {"aggregate_only": True}},
+    {"states": {"every_day": 2}},
+    {"agent_sample": {"fraction": 0.5, "sede": 1}},
+    {"interactions": "all"},
+    {"stats": {}},
+])
+def test_unknown_keys_rejected(config):
+    with pytest.raises(ValueError):
+        LoggingPolicy(config)
+
+
+def test_default_cadence():
+    policy = LoggingPolicy()
+    assert policy.should_log("interactions", 1, 1, False)
+    assert not policy.should_log("states", 1, 3, False)
+    assert policy.should_log("states", 1, 9, True)
+    assert not policy.should_log("relations", 4, 9, True)
+    assert policy.should_log("relations", 6, 9, True)
+    policy.quiet_factor = 2
+    assert not policy.should_log("relations", 3, 9, True)
+
+
+def _run(tmp_path, config, days=7, quiet_factor=1):
+    from model.simulation_session import SimulationSession
+
+    university = make_university()
+    session = SimulationSession(collective=university, output_dir=str(tmp_path),
+                                run_store=RunStore(str(tmp_path)), logging_policy=config)
+    session.logging_policy.quiet_factor = quiet_factor
+    for _ in range(days):
+        quiet(session.run_day)
+    session.close()
+    engine = university.cpp_engine
+    return engine.emotions_array().copy(), engine.relations_array().copy()
+
+
+@pytest.mark.skipif(not CPP_ENGINE_AVAILABLE, reason="C++ ядро не собрано")
+@pytest.mark.parametrize("config, quiet_factor", [
+    ({"relations": {"every_days": 5}, "states": {"every_days": 2, "aggregate_only": True}}, 1),
+    ({"interactions": {"slots": "last"}, "agent_sample": {"fraction": 0.3, "seed": 1}, "emotion_history": False}, 1),
+    (None, 4),
+])
+def test_policy_does_not_change_dynamics(tmp_path, config, quiet_factor):
+    emotions, relations = _run(tmp_path / "base", None)
+    other_emotions, other_relations = _run(tmp_path / "other", config, quiet_factor=quiet_factor)
+    np.testing.assert_array_equal(emotions, other_emotions)
+    np.testing.assert_array_equal(relations, other_relations)
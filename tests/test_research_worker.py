@@ -0,0 +1,82 @@
+import json
+import queue
+
+import pytest
+
+from core.telemetry import read_events
+from model.collective import CPP_ENGINE_AVAILABLE
+
+pytestmark = pytest.mark.skipif(not CPP_ENGINE_AVAILABLE, reason="C++ ядро не собрано")
+
+
+def _scenario(tmp_path, name, **overrides):
+    config = {"scenario_name": name, "bachelor_counts": {}, "master_counts": {},
+              "total_bac": 75, "total_mag": 15, "seed": 7, **overrides}
+    path = tmp_path / f"{name}.json"
+    path.write_text(json.dumps(config), encoding="utf-8")
+    return str(path)
+
+
+def _drain(events):
+    out = []
+    while not events.empty():
+        out.append(events.get())
+    return out
+
+
+def test_worker_survives_failed_scenario(tmp_path, monkeypatch):
+    import scripts.run_research_batch as batch
+
+    monkeypatch.chdir(tmp_path) # Логи, снимки и телеметрия — во временном каталоге
+    for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "OMP_PROC_BIND"):
+        monkeypatch.setenv(var, "1")
+    monkeypatch.setattr(batch, "_worker_ch_logger", None)
+    events = queue.SimpleQueue()
+    batch._setup_worker(events, threads=1, cores=None)
+
+    ok = _scenario(tmp_path, "ok")
+    broken = _scenario(tmp_path, "broken", total_bac="много")
+    assert batch.run_scenario_in_worker(ok, is_test=True)
+    assert not batch.run_scenario_in_worker(broken, is_test=True)
+    assert batch.run_scenario_in_worker(ok, is_test=True)
+
+    emitted = _drain(events)
+    kinds = [(e["scenario"], e["event"]) for e in emitted]
+    assert kinds == [("ok", "started"), ("ok", "finished"), ("broken", "started"), ("broken", "failed"),
+                     ("ok", "started"), ("ok", "finished")]
+    error = next(e["error"] for e in emitted if e["event"] == "failed")
+    assert error.split(":")[0] in (tmp_path / batch.BATCH_LOG_DIR / "broken.log").read_text(encoding="utf-8")
+    telemetry = read_events(batch.telemetry_path_for("ok"))
+    assert [e["event"] for e in telemetry][0] == "started" and telemetry[-1]["event"] == "finished"
+
+
+def _worker_cores(_):
+    import os
+    return sorted(os.sched_getaffinity(0))
+
+
+def test_replacement_workers_reuse_core_slot(monkeypatch):
+    import multiprocessing
+    import scripts.run_research_batch as batch
+    from core.batch_scheduler import available_cores
+
+    for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "OMP_PROC_BIND"):
+        monkeypatch.setenv(var, "1")
+    context = multiprocessing.get_context("fork")
+    core = available_cores()[:1]
+    with context.Manager() as manager:
+        events, core_slots = manager.Queue(), manager.Queue()
+        core_slots.put(core)
+        # Каждый воркер выполняет одну задачу и заменяется новым — набор ядер переходит к замене
+        with context.Pool(1, initializer=batch._init_worker, initargs=(events, core_slots, 1),
+                          maxtasksperchild=1) as pool:
+            assert pool.map(_worker_cores, range(3), chunksize=1) == [core] * 3
+
+
+def test_worker_without_free_slot_starts_unpinned(monkeypatch):
+    import scripts.run_research_batch as batch
+
+    monkeypatch.setattr(batch, "_setup_worker", lambda events, threads, cores: setup.append(cores))
+    setup = []
+    batch._init_worker(queue.SimpleQueue(), queue.Queue(), 1)
+    assert setup == [None]
@@ -0,0 +1,52 @@
+from types import SimpleNamespace
+
+from core import result_cache
+from core.result_cache import ResultCache, run_key
+from model.archetypes import ARCHETYPE_WEIGHTS, ArchetypeEnum
+
+SCENARIO = {"run_name": "base", "description": "x", "seed": 7, "agents": {"bac": 40, "mag": 10}}
+
+
+def test_key_ignores_cosmetic_fields_and_key_order():
+    renamed = {"agents": {"mag": 10, "bac": 40}, "seed": 7, "run_name": "copy", "description": "y"}
+    assert run_key(SCENARIO) == run_key(renamed)
+
+
+def test_key_tracks_seed_params_and_archetypes(monkeypatch):
+    key = run_key(SCENARIO, semesters=2)
+    assert run_key(SCENARIO, semesters=3) != key
+    assert run_key(SCENARIO, seed=8, semesters=2) != key
+    assert run_key(SCENARIO, seed=7, semesters=2) == key
+    monkeypatch.setattr(ARCHETYPE_WEIGHTS[ArchetypeEnum.HUNT], "decay_rate", 0.5)
+    assert run_key(SCENARIO, semesters=2) != key
+
+
+def test_key_tracks_engine_sources(tmp_path, monkeypatch):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "engine.cpp").write_text("int a;")
+    monkeypatch.setattr(result_cache, "CORE_DIR", str(tmp_path))
+    monkeypatch.setattr(result_cache, "BUILD_INFO_FILE", str(tmp_path / ".build_info"))
+    key = run_key(SCENARIO)
+    (tmp_path / "src" / "engine.cpp").write_text("int b;")
+    assert run_key(SCENARIO) != key
+
+
+def _session(run_store_path=None):
+    run_store = SimpleNamespace(path=run_store_path) if run_store_path else None
+    return SimpleNamespace(ch_logger=None, run_store=run_store, run_id="r1", output_dir="out")
+
+
+def test_record_lookup_invalidate(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"))
+    store = tmp_path / "store"
+    store.mkdir()
+    assert cache.lookup("k") is None
+
+    entry = cache.record("k", "base", _session(str(store)))
+    assert cache.lookup("k") == entry and entry["sink"] == "run_store"
+    assert list((tmp_path / "cache").iterdir()) == [tmp_path / "cache" / "k.json"]
+
+    store.rmdir() # Локальное хранилище удалено — запись недействительна
+    assert cache.lookup("k") is None
+    cache.invalidate("k")
+    assert not (tmp_path / "cache" / "k.json").exists()
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from model.collective import CPP_ENGINE_AVAILABLE
+from tests.conftest import make_university, quiet
+
+pytestmark = pytest.mark.skipif(not CPP_ENGINE_AVAILABLE, reason="C++ ядро не собрано")
+
+
+def test_engine_relations_survive_rotation():
+    u = make_university(total_bac=300, total_mag=30, master_chance=0.0)
+    year = u.current_academic_year
+    # Поток 4-го курса выпускается при ротации; 2-й курс остается (и не совпадает по id с новым набором)
+    graduates = {name for name in u.agents if f"-{str(year - 3)[2:]}-" in name}
+    for name in graduates:
+        u.agents[name].enrollment_year = year - 3
+    survivors = sorted(name for name in u.agents if name.startswith("S-") and f"-{str(year - 1)[2:]}-" in name)
+    assert graduates and len(survivors) > 1
+    a, b = survivors[0], survivors[-1]
+
+    quiet(u._sync_to_cpp)
+    # Изменение только на стороне ядра (Python-матрица пересинхронизируется раз в 3 дня)
+    u.cpp_engine.set_relation(u._id_map[a], u._id_map[b], 77, -66, 55)
+    assert tuple(u.relations_matrix[u._id_map[a], u._id_map[b]]) != (77, -66, 55)
+
+    quiet(u._handle_graduation_and_enrollment)
+    assert not graduates & set(u.agents)
+
+    i, j = u._id_map[a], u._id_map[b]
+    assert tuple(int(v) for v in u.relations_matrix[i, j]) == (77, -66, 55)
+    assert u.agents[a].relations[b] == {"utility": 77, "affinity": -66, "trust": 55}
+
+
+def test_remove_agents_compacts_matrix_without_engine(university):
+    u = university
+    u._update_id_maps()
+    names = sorted(u.agents)
+    a, b = names[5], names[-1]
+    before = u.relations_matrix[u._id_map[a], u._id_map[b]].copy()
+    u.remove_agents(names[:3])
+    assert u.relations_matrix.shape[0] == len(names) - 3
+    assert np.array_equal(u.relations_matrix[u._id_map[a], u._id_map[b]], before)
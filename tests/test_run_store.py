@@ -0,0 +1,86 @@
+import os
+
+import numpy as np
+import pytest
+
+from core.run_store import RunStore, RunStoreReader
+from model.collective import CPP_ENGINE_AVAILABLE
+from tests.conftest import make_university, quiet
+
+
+def _log_day(store, collective, day_id):
+    names = sorted(collective._id_map)
+    pairs = [(names[i], names[i + 1], 'success') for i in range(3)]
+    store.log_interactions(day_id, 1, None, interactions_list=pairs, name_to_id=collective._id_map)
+
+
+def test_reopen_trims_chunks_after_day(tmp_path, university):
+    university._update_id_maps()
+    store = RunStore(str(tmp_path), chunk_rows=4)
+    for day_id in range(1, 6):
+        _log_day(store, university, day_id)
+    store.close()
+
+    reopened = RunStore.reopen(store.path, after_day=3)
+    reopened.close()
+    reader = RunStoreReader(store.path)
+    days = reader.read('interactions')['day_id']
+    assert len(days) == 9 and days.max() == 3
+
+    # Файлы чанков после точки удалены, манифест ссылается только на существующие
+    listed = {chunk["file"] for chunk in reader.manifest["chunks"]}
+    on_disk = {f"interactions/{name}" for name in os.listdir(os.path.join(store.path, 'interactions'))}
+    assert listed == on_disk
+
+
+def test_registry_written_per_layout(tmp_path, university):
+    university._update_id_maps()
+    store = RunStore(str(tmp_path))
+    store.log_agent_registry(university, layout=0)
+    first = dict(university._reverse_id_map)
+    _log_day(store, university, 1)
+
+    university.remove_agents(sorted(university.agents)[:5])
+    university._update_id_maps()
+    store.log_agent_registry(university, layout=1)
+    _log_day(store, university, 2)
+    store.close()
+
+    reader = RunStoreReader(store.path)
+    assert reader.layout == 1
+    assert reader.registry(0) == first
+    assert reader.registry(1) == university._reverse_id_map
+    rows = reader.read('interactions')
+    assert rows['layout'][rows['day_id'] == 1].tolist() == [0, 0, 0]
+    assert rows['layout'][rows['day_id'] == 2].tolist() == [1, 1, 1]
+
+    # Возобновление с точки до ротации отбрасывает реестр новой раскладки
+    RunStore.reopen(store.path, after_day=1, layout=0).close()
+    reader = RunStoreReader(store.path)
+    assert reader.layout == 0
+    assert reader.registry(1) == {}
+    assert reader.registry() == first
+
+
+@pytest.mark.skipif(not CPP_ENGINE_AVAILABLE, reason="C++ ядро не собрано")
+def test_session_relogs_registry_after_roster_change(tmp_path):
+    from model.simulation_session import SimulationSession
+
+    university = make_university()
+    store = RunStore(str(tmp_path))
+    session = SimulationSession(collective=university, output_dir=str(tmp_path), run_store=store)
+    quiet(session.run_day)
+    assert session.layout == 0
+
+    university.remove_agents(sorted(university.agents)[:5])
+    quiet(session.run_day)
+    quiet(session.run_day)
+    session.close()
+
+    reader = RunStoreReader(store.path)
+    assert session.layout == 1
+    assert reader.registry(1) == university._reverse_id_map
+    states = reader.read('states')
+    late = states['layout'] == 1
+    assert late.any() and states['agent_id'][late].max() < len(university.agents)
+    assert np.all(np.diff(states['layout'].astype(np.int64)) >= 0)
@@ -0,0 +1,27 @@
+import numpy as np
+
+
+def test_tensor_matches_group_schedules(university):
+    manager = university.uni_manager
+    tensor, has_later_class = manager.compiled_schedule()
+    groups = manager.get_all_groups()
+    rows = manager.group_indices(groups)
+
+    for group_id, g in zip(groups, rows):
+        for day in range(7):
+            schedule = manager.get_group_schedule(group_id, day)
+            for slot in range(4):
+                room_id = schedule[slot] if slot < len(schedule) else "EMPTY"
+                expected = -1 if room_id == "EMPTY" else manager.room_index[room_id]
+                assert tensor[g, day, slot] == expected
+                # Прежнее правило: впереди есть занятия, если в оставшихся парах дня не только окна
+                later = any(r != "EMPTY" for r in schedule[slot + 1:]) if slot < len(schedule) else False
+                assert has_later_class[g, day, slot] == later
+
+
+def test_unknown_group_maps_to_empty_row(university):
+    manager = university.uni_manager
+    tensor, has_later_class = manager.compiled_schedule()
+    row = manager.group_indices(["no-such-group", None])
+    assert (row == len(manager.get_all_groups())).all()
+    assert (tensor[row] == -1).all() and not has_later_class[row].any()
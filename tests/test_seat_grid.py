@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from core.university_manager import SeatGrid
+
+
+def _reference_neighbors(i, capacity, cols):
+    """Прежний расчет соседей места в циклах рассадки и общения."""
+    neighbors = []
+    if i % cols > 0:
+        neighbors.append(i - 1)
+    if i % cols < cols - 1 and i + 1 < capacity:
+        neighbors.append(i + 1)
+    if i >= cols:
+        neighbors.append(i - cols)
+    if i + cols < capacity:
+        neighbors.append(i + cols)
+    return neighbors
+
+
+@pytest.mark.parametrize("capacity, cols", [(30, 6), (102, 6), (1500, 42), (1000, 42), (5, 6), (7, 1)])
+def test_neighbors_match_modulo_formula(capacity, cols):
+    grid = SeatGrid(capacity, cols)
+    assert grid.neighbors.shape == (capacity, 4)
+    for i in range(capacity):
+        expected = _reference_neighbors(i, capacity, cols)
+        assert grid.neighbor_lists[i] == expected
+        assert [n for n in grid.neighbors[i] if n >= 0] == expected
+
+
+def test_gym_clusters_match_column_filter():
+    capacity, cols = 1000, 42
+    grid = SeatGrid(capacity, cols)
+    slice_w = cols / 3.0
+    expected = [int((i % cols) / slice_w) for i in range(capacity)]
+    assert grid.gym_clusters.tolist() == expected
+
+
+def test_manager_shares_grids_and_coordinates(university):
+    manager = university.uni_manager
+    assert manager.seat_grid(30, 6) is manager.seat_grid(30, 6)
+    for room_id in ("CORRIDOR", "GYM", next(iter(manager.rooms_info))):
+        coords = manager.seat_coordinates(room_id)
+        for s_idx in (0, len(coords) // 2, len(coords) - 1):
+            assert tuple(coords[s_idx]) == pytest.approx(manager._compute_seat_coordinates(room_id, s_idx))
+            assert manager.get_seat_coordinates(room_id, s_idx) == pytest.approx(tuple(coords[s_idx]))
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from core.steady_state import SteadyStateDetector
+
+
+def _day(day, n=20, period=7, noise=None):
+    """Периодическое состояние с периодом period (плюс шум, если задан генератор)."""
+    phase = day % period
+    emotions = np.full((n, 7), phase, dtype=np.int8)
+    relations = np.full((n, n, 3), -phase, dtype=np.int8)
+    if noise is not None:
+        emotions = emotions + noise.integers(-20, 20, emotions.shape).astype(np.int8)
+    return emotions, relations
+
+
+LAYOUT = {f"a{i}": i for i in range(20)}
+
+
+def test_periodic_trajectory_becomes_stationary():
+    detector = SteadyStateDetector({"lag": 7, "window": 5})
+    flags = [detector.update(*_day(day), LAYOUT) for day in range(7 + 5)]
+    # Первое сравнение — на 8-й день, стационарность — после window сравнений в допуске
+    assert flags[-1] and not any(flags[:-1])
+    assert detector.last_norms == (0.0, 0.0)
+
+
+def test_noisy_trajectory_stays_active():
+    rng = np.random.default_rng(0)
+    detector = SteadyStateDetector({"lag": 7, "window": 5})
+    assert not any(detector.update(*_day(day, noise=rng), LAYOUT) for day in range(40))
+
+
+def test_roster_change_resets_history():
+    detector = SteadyStateDetector({"lag": 7, "window": 5})
+    for day in range(12):
+        detector.update(*_day(day), LAYOUT)
+    assert detector.stationary
+    assert not detector.update(*_day(12, n=19), {f"a{i}": i for i in range(19)})
+    assert detector.last_norms is None
+
+
+def test_relation_sample_bounds_memory():
+    detector = SteadyStateDetector({"lag": 2, "window": 1, "sample_pairs": 50})
+    detector.update(*_day(0), LAYOUT)
+    assert detector._states[0][1].size == 50
+
+
+@pytest.mark.parametrize("config", [{"action": "pause"}, {"window": 0}, {"tolerance": 0.1}])
+def test_invalid_config_rejected(config):
+    with pytest.raises(ValueError):
+        SteadyStateDetector(config)
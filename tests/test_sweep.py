@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from model.collective import CPP_ENGINE_AVAILABLE
+from model.sweep import (COMPLETED, NOT_PROMISING, OUT_OF_BAND, ParameterSweep, grid_design,
+                         latin_hypercube)
+from tests.conftest import quiet
+
+needs_engine = pytest.mark.skipif(not CPP_ENGINE_AVAILABLE, reason="C++ ядро не собрано")
+
+
+@pytest.mark.parametrize("space", [{"HARMONY.weights": [1]}, {"KING.temperature": [1]}, {"temperature": [1]}])
+def test_bad_parameter_keys_rejected(space):
+    with pytest.raises(ValueError):
+        grid_design(space)
+
+
+def test_grid_design_is_full_product():
+    points = grid_design({"HARMONY.temperature": [0.5, 1.0], "*.decay_rate": [0.1, 0.2, 0.3]})
+    assert len(points) == 6
+    assert {(p["HARMONY.temperature"], p["*.decay_rate"]) for p in points} == \
+        {(t, d) for t in (0.5, 1.0) for d in (0.1, 0.2, 0.3)}
+
+
+def test_latin_hypercube_covers_every_stratum():
+    space = {"HARMONY.temperature": [0.0, 2.0], "HUNT.refusal_chance": [0.0, 1.0]}
+    points = latin_hypercube(space, 10, seed=3)
+    for key, (low, high) in space.items():
+        strata = np.floor((np.array([p[key] for p in points]) - low) / (high - low) * 10)
+        assert sorted(strata) == list(range(10))
+    assert latin_hypercube(space, 10, seed=3) == points
+
+
+@needs_engine
+def test_point_overrides_only_its_archetype(university):
+    from model.ensemble import build_ensemble
+    from model.sweep import apply_point
+    ensemble = quiet(build_ensemble, university, 2)
+    base = list(university.cpp_engine.state.archetype_configs)
+    apply_point(ensemble, base, dict(university._arch_map), {"HARMONY.temperature": 3.0})
+    harmony = university._arch_map["Harmony"]
+    for r in range(2):
+        temperatures = [conf.temperature for conf in ensemble.replica(r).state.archetype_configs]
+        expected = [3.0 if idx == harmony else conf.temperature for idx, conf in enumerate(base)]
+        np.testing.assert_allclose(temperatures, expected)
+
+
+@needs_engine
+def test_staged_sweep_prunes_points(university):
+    points = grid_design({"*.temperature": [0.5, 1.0, 2.0, 4.0]})
+    sweep = ParameterSweep(university, points, stages=(5, 10, 20), replicas=2)
+    results = quiet(sweep.run)
+    statuses = [r["status"] for r in results]
+    assert statuses.count(COMPLETED) == 1 and statuses.count(NOT_PROMISING) == 3
+    assert sorted(r["days"] for r in results) == [5, 5, 10, 20]
+    assert all(len(r["history"]) == r["days"] for r in results)
+    assert sweep.run_cost(results) < sweep.full_cost()
+
+
+@needs_engine
+def test_points_share_replica_streams(university):
+    # Одинаковые точки с общими случайными числами дают одинаковые ряды: ранг зависит только от параметров
+    points = grid_design({"HARMONY.temperature": [1.0, 1.0]})
+    sweep = ParameterSweep(university, points, stages=(10,), replicas=2, seed=3)
+    first, second = quiet(sweep.run)
+    assert first["history"] == second["history"]
+
+
+@needs_engine
+def test_out_of_band_points_stop_after_first_stage(university):
+    points = grid_design({"*.temperature": [0.5, 1.0]})
+    sweep = ParameterSweep(university, points, stages=(5, 20), replicas=2, band=(1000, 2000))
+    results = quiet(sweep.run)
+    assert [(r["status"], r["days"]) for r in results] == [(OUT_OF_BAND, 5)] * 2
+
+
+@pytest.mark.parametrize("kwargs", [{"metric": "joy"}, {"stages": (90, 30)}, {"goal": "best"}])
+def test_invalid_sweep_settings_rejected(kwargs):
+    with pytest.raises(ValueError):
+        ParameterSweep(None, [], **kwargs)
@@ -0,0 +1,91 @@
+import os
+import socket
+import subprocess
+import sys
+
+from core.telemetry import (FAILED, FINISHED, RUNNING, STALL_AFTER_SECONDS, STALLED, TelemetryFollower,
+                            TelemetryWriter, format_summary, read_events, run_summary, summarize)
+
+
+def _write(path, scenario, days, finish=None, append=False):
+    writer = TelemetryWriter(str(path), scenario, append=append)
+    if not append:
+        writer.emit("started")
+    for day in days:
+        writer.emit("day", day=day, semesters=0, target=2, rss=2**20, slots_per_day=9, backlog={"queue": 3})
+    if finish == FINISHED:
+        writer.emit("finished", elapsed=1.5)
+    elif finish == FAILED:
+        writer.emit("failed", error="boom")
+    writer.close()
+
+
+def test_partial_last_line_is_skipped(tmp_path):
+    path = tmp_path / "a.jsonl"
+    _write(path, "a", [1, 2])
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"event": "day", "day"')
+    assert [e["event"] for e in read_events(str(path))] == ["started", "day", "day"]
+
+
+def test_run_summary_progress_and_states(tmp_path):
+    path = tmp_path / "a.jsonl"
+    _write(path, "a", range(1, 6))
+    summary = run_summary(read_events(str(path)))
+    assert summary["state"] == RUNNING # Процесс теста жив
+    assert summary["host"] == socket.gethostname()
+    assert summary["day"] == 5 and summary["target"] == 2 and summary["backlog"] == {"queue": 3}
+
+    _write(path, "a", [6], finish=FINISHED, append=True)
+    assert run_summary(read_events(str(path)))["state"] == FINISHED
+    _write(path, "a", [], finish=FAILED)
+    assert run_summary(read_events(str(path)))["error"] == "boom"
+
+
+def test_rate_from_day_events():
+    events = [{"event": "started", "time": 0.0, "scenario": "a"}]
+    events += [{"event": "day", "time": float(t), "day": t + 1, "slots_per_day": 9} for t in range(5)]
+    summary = run_summary(events)
+    assert summary["days_per_sec"] == 1.0 and summary["slots_per_sec"] == 9.0
+
+
+def test_dead_process_is_stalled():
+    child = subprocess.Popen([sys.executable, "-c", "pass"])
+    child.wait()
+    events = [{"event": "started", "time": 0.0, "scenario": "a", "pid": child.pid}]
+    assert run_summary(events)["state"] == STALLED
+
+
+def test_remote_run_judged_by_event_age():
+    # PID другой машины локально не проверяется: живой расчет не должен выглядеть зависшим
+    events = [{"event": "started", "time": 1000.0, "scenario": "a", "host": "other-node", "pid": 1},
+              {"event": "day", "time": 1100.0, "scenario": "a", "host": "other-node", "pid": 1, "day": 1}]
+    summary = run_summary(events, now=1100.0 + STALL_AFTER_SECONDS - 1)
+    assert summary["state"] == RUNNING and summary["host"] == "other-node"
+    assert run_summary(events, now=1100.0 + STALL_AFTER_SECONDS + 1)["state"] == STALLED
+
+
+def test_summarize_and_format(tmp_path):
+    _write(tmp_path / "b.jsonl", "b", [1], finish=FINISHED)
+    _write(tmp_path / "a.jsonl", "a", [1, 2])
+    runs = summarize(str(tmp_path))
+    assert [r["scenario"] for r in runs] == ["a", "b"]
+    text = format_summary(runs)
+    assert text.splitlines()[1].startswith("a") and "Итого" in text
+    assert format_summary([]) == "Нет данных телеметрии."
+
+
+def test_follower_returns_only_new_events(tmp_path):
+    _write(tmp_path / "a.jsonl", "a", [1])
+    follower = TelemetryFollower(str(tmp_path))
+    assert follower.poll() == []
+
+    _write(tmp_path / "a.jsonl", "a", [2], append=True)
+    _write(tmp_path / "b.jsonl", "b", [])
+    assert [(e["scenario"], e["event"]) for e in follower.poll()] == [("a", "day"), ("b", "started")]
+    assert follower.poll() == []
+
+    # Расчет начат заново — файл короче прежнего смещения
+    _write(tmp_path / "a.jsonl", "a", [])
+    assert [e["event"] for e in follower.poll()] == ["started"]
+    assert os.path.getsize(tmp_path / "a.jsonl") == follower._offsets[str(tmp_path / "a.jsonl")]
@@ -0,0 +1,43 @@
+import os
+
+import numpy as np
+import pytest
+
+from core.world_snapshot import RELATIONS_FILE, snapshot_path_for, warm_start_university, world_key
+from model.collective import CPP_ENGINE_AVAILABLE
+from tests.conftest import quiet
+
+CONFIG = {"scenario_name": "test", "bachelor_counts": {}, "master_counts": {},
+          "total_bac": 75, "total_mag": 15, "seed": 7}
+
+
+def test_world_key_ignores_run_settings():
+    key = world_key(CONFIG)
+    assert world_key({**CONFIG, "scenario_name": "other", "semesters": 4}) == key
+    assert world_key(CONFIG, seed=8) != key
+    assert world_key({**CONFIG, "total_bac": 80}) != key
+
+
+def _run(university, steps=60):
+    for _ in range(steps):
+        quiet(university.perform_next_step)
+    engine = university.cpp_engine
+    return engine.emotions_array().copy(), engine.relations_array().copy()
+
+
+@pytest.mark.skipif(not CPP_ENGINE_AVAILABLE, reason="C++ ядро не собрано")
+def test_snapshot_run_matches_fresh_run(tmp_path):
+    built = quiet(warm_start_university, CONFIG, snapshot_dir=str(tmp_path))
+    path = snapshot_path_for(CONFIG, snapshot_dir=str(tmp_path))
+    saved_relations = np.load(os.path.join(path, RELATIONS_FILE))
+    emotions, relations = _run(built)
+    assert (relations != saved_relations).any()
+
+    loaded = quiet(warm_start_university, CONFIG, snapshot_dir=str(tmp_path))
+    assert loaded is not built
+    loaded_emotions, loaded_relations = _run(loaded)
+    np.testing.assert_array_equal(emotions, loaded_emotions)
+    np.testing.assert_array_equal(relations, loaded_relations)
+
+    # Матрица снимка отображена с копированием при записи — файл не меняется
+    np.testing.assert_array_equal(np.load(os.path.join(path, RELATIONS_FILE)), saved_relations)
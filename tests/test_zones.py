@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from tests.conftest import make_university, quiet
+
+
+@pytest.mark.parametrize("room_id", ["CORRIDOR", "GYM"])
+def test_zones_cover_every_seat_once(university, room_id):
+    manager = university.uni_manager
+    seats = np.concatenate([seat_ids for seat_ids, _ in manager.room_zones(room_id)])
+    assert np.array_equal(np.sort(seats), np.arange(manager.rooms_info[room_id]["capacity"]))
+
+
+def test_spill_moves_overflow_to_nearest_zone(university):
+    zone_of = np.array([0] * 12 + [1] * 3 + [2] * 1)
+    spilled = university._spill_zone_overflow(zone_of, [5, 5, 5, 5])
+    assert np.bincount(spilled, minlength=4).tolist() == [5, 5, 5, 1]
+    # Агенты неполных зон остаются на месте
+    assert (spilled[12:] == zone_of[12:]).all()
+
+
+def test_spill_keeps_assignment_without_overflow(university):
+    zone_of = np.array([0, 1, 1, 2])
+    state = university.attendance_rng.bit_generator.state
+    assert university._spill_zone_overflow(zone_of, [2, 2, 2]) is zone_of
+    assert university.attendance_rng.bit_generator.state == state
+
+
+def test_crowded_wing_is_seated_in_neighbouring_zones():
+    university = make_university(total_bac=450, total_mag=0)
+    names = university._roster()[0]
+    university._zone_of["CORRIDOR"][:] = 0 # Весь холл собирается в одном крыле
+    members = np.arange(len(names))
+    seated, _ = quiet(university._seat_in_zones, "CORRIDOR", members, "BREAK")
+    placed = [name for name in seated if name]
+    assert len(placed) == len(names) == len(set(placed))